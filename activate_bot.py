@@ -1,5 +1,6 @@
-from database import DatabaseManager
-from api import BinanceAPI
+from types import SimpleNamespace
+import numpy as np
+from database import DatabaseManager, MIN_ACCOUNT_BALANCE, MAX_ACCOUNT_BALANCE
 from utils import Utils
 
 class ActivateBot:
@@ -15,6 +16,8 @@ class ActivateBot:
                   storing or analyzing historical signal data.
     """
 
+    MIN_AGREEING_FLAGS = 2  # Number of indicators that have to agree before a trade
+
     def __init__(self, user_obj, ws_class, bi_class):
         """
         Initializes the trading bot with user and indicator references.
@@ -28,6 +31,132 @@ class ActivateBot:
         self.ws_class = ws_class
         self.bi_class = bi_class
 
+    @staticmethod
+    def count_flags(bi_class, direction):
+        """
+        Counts how many of the RSI, MACD and Supertrend flags point in one direction.
+
+        Args:
+            bi_class: Object holding `rsi_flag`, `macd_flag` and `st_flag`.
+            direction (int): 1 to count buy signals, -1 to count sell signals.
+
+        Returns:
+            int: The number of agreeing indicators (0 to 3).
+        """
+        return sum(1 for flag in (bi_class.rsi_flag, bi_class.macd_flag, bi_class.st_flag) if flag * direction > 0)
+
+    @staticmethod
+    def trade_profit(trading_amount, buy_price, sell_price):
+        """
+        Values a position bought at `buy_price` and sold at `sell_price`.
+
+        Args:
+            trading_amount (float): Dollar amount invested at the buy.
+            buy_price (float): BTC price at the buy.
+            sell_price (float): BTC price at the sell.
+
+        Returns:
+            tuple: (new_trading_amount, profit_loss) in dollars.
+        """
+        per_diff = ((sell_price - buy_price) / buy_price)
+        multiplier_value = 1 + per_diff
+        new_trading_amount = multiplier_value * trading_amount
+        return new_trading_amount, new_trading_amount - trading_amount
+
+    @staticmethod
+    def simulate(prices, rsi_flags, macd_flags, st_flags, invest_thres, balance, max_trades=None):
+        """
+        Runs the buy/sell state machine of buy_btc and sell_btc over whole flag arrays.
+
+        A position is opened on the first bar with at least MIN_AGREEING_FLAGS buy flags and
+        closed on the first later bar with at least as many sell flags; each entry and exit
+        is found with a search over the signal bars instead of stepping through every day.
+        Each position invests `invest_thres` percent of the balance, its profit/loss is
+        `trade_profit`, and the balance only takes it if the result stays inside the
+        DatabaseManager balance limits, exactly as the day-by-day Backtester loop does.
+
+        Args:
+            prices (np.ndarray): Trade price per bar, NaN for bars without a candle (no trading).
+            rsi_flags (np.ndarray): RSI flag per bar.
+            macd_flags (np.ndarray): MACD flag per bar.
+            st_flags (np.ndarray): Supertrend flag per bar.
+            invest_thres (float): Percentage of the balance invested per trade.
+            balance (float): Balance before the first bar.
+            max_trades (int): Stop after this many completed trades, or None.
+
+        Returns:
+            dict: Per trade arrays `entries` and `exits` (bar indices), `money_in`,
+                  `balance_before`, `profit_loss` and `balance_after`, where `entries` and
+                  `money_in` also hold the position still open at the end; `open_entry`, its
+                  entry bar (or None); `last_bar`, the index of
+                  the last bar simulated; `final_balance`; and `equity`, balance plus open
+                  position value per bar up to `last_bar` (NaN on bars without a price).
+        """
+        prices = np.asarray(prices, dtype=float)
+        start_balance = balance
+        flags = np.stack([rsi_flags, macd_flags, st_flags])
+        priced = ~np.isnan(prices)
+        buy_bars = np.flatnonzero(priced & ((flags > 0).sum(axis=0) >= ActivateBot.MIN_AGREEING_FLAGS))
+        sell_bars = np.flatnonzero(priced & ((flags < 0).sum(axis=0) >= ActivateBot.MIN_AGREEING_FLAGS))
+
+        # Alternate between the next buy signal and the next sell signal after it
+        entries, exits = [], []
+        position = 0
+        while max_trades is None or len(exits) < max_trades:
+            next_buy = np.searchsorted(buy_bars, position)
+            if next_buy == len(buy_bars):
+                break
+            entries.append(int(buy_bars[next_buy]))
+            next_sell = np.searchsorted(sell_bars, entries[-1] + 1)
+            if next_sell == len(sell_bars):
+                break
+            exits.append(int(sell_bars[next_sell]))
+            position = exits[-1] + 1
+
+        open_entry = entries[-1] if len(entries) > len(exits) else None
+        last_bar = len(prices) - 1
+        if max_trades is not None and len(exits) >= max_trades:
+            last_bar = exits[-1] if exits else min(0, last_bar)  # The loop checks the limit after each bar
+
+        # Position sizing and the balance limits depend on the previous trade, one step per trade
+        money_in, balance_before, profit_loss, balance_after = [], [], [], []
+        for entry, sell in zip(entries, exits):
+            balance_before.append(balance)
+            money_in.append(balance * (invest_thres / 100))
+            _, trade_profit_loss = ActivateBot.trade_profit(money_in[-1], float(prices[entry]), float(prices[sell]))
+            if MIN_ACCOUNT_BALANCE < balance + trade_profit_loss < MAX_ACCOUNT_BALANCE:
+                balance += trade_profit_loss
+            profit_loss.append(trade_profit_loss)
+            balance_after.append(balance)
+        if open_entry is not None:
+            money_in.append(balance * (invest_thres / 100))
+
+        # Equity: the balance after the trades closed so far plus the value of the open position
+        bars = np.arange(last_bar + 1)
+        entries, exits, money_in = np.array(entries, dtype=int), np.array(exits, dtype=int), np.array(money_in)
+        equity = np.concatenate([[start_balance], balance_after])[np.searchsorted(exits, bars, side="right")]
+        trade = np.searchsorted(entries, bars, side="right") - 1
+        ends = np.append(exits, [last_bar + 1] * (len(entries) - len(exits)))  # The open position is held to the end
+        holding = (trade >= 0) & (bars < ends[np.maximum(trade, 0)]) if len(entries) else np.zeros(len(bars), dtype=bool)
+        if holding.any():
+            held = trade[holding]
+            buy_prices = prices[entries[held]]
+            equity[holding] += (1 + (prices[bars[holding]] - buy_prices) / buy_prices) * money_in[held] - money_in[held]
+        equity[~priced[:last_bar + 1]] = np.nan
+
+        return {
+            "entries": entries,
+            "exits": exits,
+            "money_in": money_in,
+            "balance_before": np.array(balance_before),
+            "profit_loss": np.array(profit_loss),
+            "balance_after": np.array(balance_after),
+            "open_entry": open_entry,
+            "last_bar": last_bar,
+            "final_balance": balance,
+            "equity": equity,
+        }
+
     def buy_btc(self, given_date):
         """
         Executes a buy order for Bitcoin if 2 or more technical indicators are positive.
@@ -36,30 +165,21 @@ class ActivateBot:
         - Checks if at least two out of three flags (RSI, MACD, ST) suggest buying.
         - Retrieves the user's current account balance.
         - Determines trading amount based on investment threshold.
-        - Fetches the BTC price on the given date using BinanceAPI.
+        - Reads the BTC price on the given date from the indicators' price snapshot.
         - Updates the trade history for a buy transaction.
 
         Args:
             given_date (str): Date string in 'YYYY-MM-DD' format used to fetch historical BTC price.
         """
         self.buy_btc_price = 0
-        combined_flag = 0
         
-        # Check individual buy signals
-        if self.ws_class.bi.rsi_flag > 0:
-            combined_flag += 1
-        if self.ws_class.bi.macd_flag > 0:
-            combined_flag += 1
-        if self.ws_class.bi.st_flag > 0:
-            combined_flag += 1
-
         # Execute buy if at least 2 indicators are positive
-        if combined_flag >= 2:
+        if ActivateBot.count_flags(self.ws_class.bi, 1) >= ActivateBot.MIN_AGREEING_FLAGS:
             print("time to buy")
             self.balance = self.user_obj.db.get_account_balance(self.user_obj.username)
             print("account balabce before", self.balance)
             self.trading_amount = self.balance * ((self.user_obj.thresholds["invest_thres"][0]) / 100)
-            self.buy_btc_price = BinanceAPI.get_price_on_day(given_date)
+            self.buy_btc_price = self.bi_class.get_price_on_day(given_date)
             print("bought", self.trading_amount, "$ amount of bitcoin at", self.buy_btc_price)
             self.user_obj.db.update_trade_history_buy(given_date, self.user_obj, self, self.bi_class)
 
@@ -77,25 +197,14 @@ class ActivateBot:
             given_date (str): Date string in 'YYYY-MM-DD' format used to fetch historical BTC price.
         """
         self.sell_btc_price = 0
-        combined_flag = 0
-
-        # Check individual sell signals
-        if self.ws_class.bi.rsi_flag < 0:
-            combined_flag += 1
-        if self.ws_class.bi.macd_flag < 0:
-            combined_flag += 1
-        if self.ws_class.bi.st_flag < 0:
-            combined_flag += 1
 
         # Execute sell if at least 2 indicators are negative
-        if combined_flag >= 2:
+        if ActivateBot.count_flags(self.ws_class.bi, -1) >= ActivateBot.MIN_AGREEING_FLAGS:
             print("time to sell")
-            self.sell_btc_price = BinanceAPI.get_price_on_day(given_date)
-            per_diff = ((self.sell_btc_price - self.buy_btc_price) / self.buy_btc_price)
-            multiplier_value = 1 + per_diff
-            self.new_trading_amount = multiplier_value * self.trading_amount
-
-            self.profit_loss = self.new_trading_amount - self.trading_amount
+            self.sell_btc_price = self.bi_class.get_price_on_day(given_date)
+            self.new_trading_amount, self.profit_loss = ActivateBot.trade_profit(
+                self.trading_amount, self.buy_btc_price, self.sell_btc_price
+            )
 
             self.user_obj.db.update_account_balance(self.user_obj.username, self.profit_loss)
             self.balance = self.user_obj.db.get_account_balance(self.user_obj.username)
@@ -103,3 +212,34 @@ class ActivateBot:
             print("profit/loss=", self.profit_loss)
             print("account balabce after", self.balance)
             self.user_obj.db.update_trade_history_sell(given_date, self.user_obj, self, self.bi_class)
+
+    def record_trade(self, trade):
+        """
+        Records a trade made by the headless Backtester in the trade history and account
+        balance, the same way buy_btc and sell_btc record trades made day by day.
+
+        Args:
+            trade (dict): A trade from Backtester.run, keyed like the trade_history columns.
+                          Trades without a `selling_time` are recorded as open buys.
+        """
+        self.balance = trade["balance_before"]
+        self.trading_amount = trade["money_in"]
+        self.buy_btc_price = trade["buy_price"]
+        buy_values = SimpleNamespace(
+            rsi=trade["rsi_buy"], macd=trade["macd_buy"], supertrend=trade["supertrend_buy"],
+            rsi_flag=trade["rsi_flag_buy"], macd_flag=trade["macd_flag_buy"], st_flag=trade["supertrend_flag_buy"]
+        )
+        self.user_obj.db.update_trade_history_buy(trade["buying_time"], self.user_obj, self, buy_values)
+        if trade.get("selling_time") is None:
+            return
+
+        self.sell_btc_price = trade["sell_price"]
+        self.new_trading_amount = self.trading_amount + trade["profit_loss"]
+        self.profit_loss = trade["profit_loss"]
+        self.user_obj.db.update_account_balance(self.user_obj.username, self.profit_loss)
+        self.balance = self.user_obj.db.get_account_balance(self.user_obj.username)
+        sell_values = SimpleNamespace(
+            rsi=trade["rsi_sell"], macd=trade["macd_sell"], supertrend=trade["supertrend_sell"],
+            rsi_flag=trade["rsi_flag_sell"], macd_flag=trade["macd_flag_sell"], st_flag=trade["supertrend_flag_sell"]
+        )
+        self.user_obj.db.update_trade_history_sell(trade["selling_time"], self.user_obj, self, sell_values)
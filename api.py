@@ -1,17 +1,267 @@
+import json
 import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import matplotlib.dates as mdates
+from binance_session import BinanceSession
+from candle_store import CandleStore
+from known_gaps import KnownGaps
+from response_cache import ResponseCache
+from utils import Utils
 
 
 class BinanceAPI:
-    API_BASE_URL= "https://api.binance.com/api/v3"
+    BINANCE_API_URL = "https://api.binance.com/api/v3"  # The real exchange, whose candles may be kept for good
+    API_BASE_URL= BINANCE_API_URL
+    KLINES_PAGE_LIMIT = 1000  # Most candles Binance returns for one /klines request
+    MAX_PARALLEL_CHUNKS = 4  # Page-sized chunks requested at the same time
+    KLINES_WEIGHT = 2  # Binance request weight of one /klines request
+    TICKER_WEIGHT = 2  # Binance request weight of /ticker/price for one symbol
+    TICKER_BATCH_WEIGHT = 4  # Weight of /ticker/price with symbols=[...] or for all symbols, whatever the count
+    candle_store = None  # Opened lazily by get_candle_store()
+    session = BinanceSession()  # Pooled keep-alive connection shared by every request
+    cache = ResponseCache()  # Coalesces identical requests and keeps their results briefly
+    TICKER_TTL = 1.0  # Seconds a ticker price is reused
+    KLINES_TTL = 2.0  # Seconds a range holding a forming candle is reused (at most until it closes)
+    CLOSED_KLINES_TTL = 300.0  # Seconds a range of closed candles is reused
+
+    @staticmethod
+    def get_candle_store():
+        """Returns the shared on-disk candle store, opening it on first use."""
+        if BinanceAPI.candle_store is None:
+            BinanceAPI.candle_store = CandleStore()
+        return BinanceAPI.candle_store
+
+    @staticmethod
+    def parse_klines(rows):
+        """Turns raw /klines rows into candle tuples (open_time, open, high, low, close, volume, close_time)."""
+        return [
+            (int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]), int(row[6]))
+            for row in rows
+        ]
+
+    @staticmethod
+    def page_spans(from_ts, to_ts, interval="1d"):
+        """
+        Splits a range into chunks of at most one page of candles.
+
+        Returns:
+            list: (start_ts, end_ts) pairs in order; a single pair for calendar intervals
+                  (1w, 1M) whose length is not fixed.
+        """
+        step = Utils.interval_ms(interval)
+        if step is None:
+            return [(from_ts, to_ts)]
+        chunk = step * BinanceAPI.KLINES_PAGE_LIMIT
+        return [(start, min(start + chunk - 1, to_ts)) for start in range(from_ts, to_ts + 1, chunk)]
+
+    @staticmethod
+    def stitch_klines(pages, interval="1d"):
+        """
+        Joins chunks of candles into one list ordered by open time, dropping duplicates
+        (a later chunk wins) and reporting candles missing between the first and last one.
+
+        Parameters:
+            pages (list): Lists of candle tuples, in any order.
+            interval (str): Kline interval, used to detect gaps.
+
+        Returns:
+            list: Candle tuples ordered by open time.
+        """
+        candles = {candle[0]: candle for page in pages for candle in page}
+        open_times = sorted(candles)
+        step = Utils.interval_ms(interval)
+        if step is not None and open_times:
+            for gap_start, gap_end in CandleStore.missing_spans(open_times, open_times[0], open_times[-1], step):
+                print(f"Missing {interval} klines from {datetime.fromtimestamp(gap_start / 1000)} to {datetime.fromtimestamp(gap_end / 1000)}")
+        return [candles[open_time] for open_time in open_times]
+
+    @staticmethod
+    def fetch_span(from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        """Requests one span of klines, following full pages in order."""
+        endpoint = f"{BinanceAPI.API_BASE_URL}/klines"
+        candles = []
+        while from_ts <= to_ts:
+            params = {
+                "symbol": symbol,
+                "interval": interval,
+                "startTime": from_ts,
+                "endTime": to_ts,
+                "limit": BinanceAPI.KLINES_PAGE_LIMIT
+            }
+            response = BinanceAPI.session.get(endpoint, params=params, weight=BinanceAPI.KLINES_WEIGHT)
+            response.raise_for_status()
+            page = BinanceAPI.parse_klines(response.json())
+            candles.extend(page)
+            if not page or page[-1][6] >= to_ts:
+                break  # No more candles, or the last one already reaches the end of the span
+            from_ts = page[-1][0] + 1  # Continue after the last candle of a full page
+        return candles
+
+    @staticmethod
+    def fetch_pages(spans, symbol="BTCUSDT", interval="1d"):
+        """
+        Requests several spans of klines, split into page-sized chunks that are fetched
+        in parallel by at most MAX_PARALLEL_CHUNKS threads.
+
+        Returns:
+            list: One candle list per chunk, in order.
+
+        Raises:
+            requests.exceptions.RequestException: If any chunk fails.
+        """
+        chunks = [(symbol, start, end) for span in spans for start, end in BinanceAPI.page_spans(span[0], span[1], interval)]
+        return BinanceAPI.fetch_chunks(chunks, interval)
+
+    @staticmethod
+    def fetch_chunks(chunks, interval="1d"):
+        """
+        Requests page-sized chunks of klines, possibly of different symbols, sharing one
+        pool of at most MAX_PARALLEL_CHUNKS threads.
+
+        Parameters:
+            chunks (list): (symbol, start_ts, end_ts) tuples.
+            interval (str): Kline interval (e.g., "1d").
+
+        Returns:
+            list: One candle list per chunk, in order.
+        """
+        if len(chunks) <= 1:
+            return [BinanceAPI.fetch_span(start, end, symbol, interval) for symbol, start, end in chunks]
+        with ThreadPoolExecutor(max_workers=min(BinanceAPI.MAX_PARALLEL_CHUNKS, len(chunks))) as executor:
+            return list(executor.map(lambda chunk: BinanceAPI.fetch_span(chunk[1], chunk[2], chunk[0], interval), chunks))
+
+    @staticmethod
+    def fetch_klines(from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        """
+        Requests klines straight from Binance without touching the local store. Ranges
+        longer than one page are fetched as parallel chunks and stitched back together.
+
+        Parameters:
+            from_ts (int): Start time in milliseconds.
+            to_ts (int): End time in milliseconds.
+            symbol (str): Trading pair symbol (e.g., "BTCUSDT").
+            interval (str): Kline interval (e.g., "1d").
+
+        Returns:
+            list: Candle tuples (open_time, open, high, low, close, volume, close_time) ordered by open time.
+        """
+        return BinanceAPI.stitch_klines(BinanceAPI.fetch_pages([(from_ts, to_ts)], symbol, interval), interval)
+
+    @staticmethod
+    def get_klines(from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        """
+        Returns the klines for a range, reading closed candles from the local store first
+        and only requesting the spans that are missing from Binance.
+
+        Candles that have not closed yet are returned but never stored, so the
+        current day is always refreshed.
+
+        Parameters:
+            from_ts (int): Start time in milliseconds.
+            to_ts (int): End time in milliseconds.
+            symbol (str): Trading pair symbol (e.g., "BTCUSDT").
+            interval (str): Kline interval (e.g., "1d").
+
+        Returns:
+            list: Candle tuples (open_time, open, high, low, close, volume, close_time) ordered by open time.
+        """
+        candles = BinanceAPI.cache.get(
+            ("klines", symbol, interval, from_ts, to_ts),
+            lambda: BinanceAPI.get_many_klines(from_ts, to_ts, [symbol], interval)[symbol],
+            lambda candles: BinanceAPI.klines_ttl(candles, to_ts),
+        )
+        return list(candles)  # Callers may change their list, not the cached one
+
+    @staticmethod
+    def klines_ttl(candles, to_ts):
+        """
+        Returns how many seconds a kline range may be served from the cache: briefly, and
+        never past the close of its forming candle, while the range reaches the present;
+        longer once every candle in it has closed.
+        """
+        now_ts = time.time() * 1000
+        forming = [candle[6] for candle in candles if candle[6] >= now_ts]
+        if forming:
+            return min(BinanceAPI.KLINES_TTL, (min(forming) + 1 - now_ts) / 1000)
+        if to_ts >= now_ts:
+            return BinanceAPI.KLINES_TTL  # The next candle may open before the range ends
+        return BinanceAPI.CLOSED_KLINES_TTL
+
+    @staticmethod
+    def get_many_klines(from_ts, to_ts, symbols, interval="1d"):
+        """
+        Returns the klines of several symbols for the same range, like get_klines. The
+        spans missing from the local store are collected for every symbol first and then
+        fetched together, so a basket of pairs is refreshed by one pool of parallel
+        requests instead of one symbol after another.
+
+        Parameters:
+            from_ts (int): Start time in milliseconds.
+            to_ts (int): End time in milliseconds.
+            symbols (list): Trading pair symbols (e.g., ["BTCUSDT", "ETHUSDT"]).
+            interval (str): Kline interval (e.g., "1d").
+
+        Returns:
+            dict: Candle tuples ordered by open time, keyed by symbol.
+        """
+        step = Utils.interval_ms(interval)
+        if step is None:
+            return {symbol: BinanceAPI.fetch_klines(from_ts, to_ts, symbol, interval) for symbol in symbols}  # Calendar intervals are not cached
+
+        store = BinanceAPI.get_candle_store()
+        cached = {symbol: store.get_candles(symbol, interval, from_ts, to_ts) for symbol in symbols}
+        missing = {
+            symbol: store.known_gaps.subtract(
+                symbol, interval, CandleStore.missing_spans([candle[0] for candle in cached[symbol]], from_ts, to_ts, step), step
+            )
+            for symbol in symbols
+        }
+        chunks = [
+            (symbol, start, end)
+            for symbol in symbols
+            for span in missing[symbol]
+            for start, end in BinanceAPI.page_spans(span[0], span[1], interval)
+        ]
+        fetched = {symbol: [] for symbol in symbols}
+        for chunk, page in zip(chunks, BinanceAPI.fetch_chunks(chunks, interval)):
+            fetched[chunk[0]].extend(page)
+        for symbol in symbols:
+            # Closed candles a successful fetch did not return do not exist on Binance
+            open_times = [candle[0] for candle in fetched[symbol]]
+            store.known_gaps.add(symbol, interval, [
+                gap for start, end in KnownGaps.closed(missing[symbol], step)
+                for gap in CandleStore.missing_spans(open_times, start, end, step)
+            ])
+
+        now_ts = int(time.time() * 1000)
+        klines = {}
+        for symbol in symbols:
+            if not fetched[symbol]:
+                klines[symbol] = cached[symbol]
+                continue
+            store.save_candles(symbol, interval, [candle for candle in fetched[symbol] if candle[6] < now_ts])
+            in_range = [candle for candle in fetched[symbol] if from_ts <= candle[0] <= to_ts]
+            klines[symbol] = BinanceAPI.stitch_klines([cached[symbol], in_range], interval)
+        return klines
+
     @staticmethod
     def get_ticker_price( symbol="BTCUSDT"):
+            """Fetch the latest price for a given symbol, reusing a price fetched within TICKER_TTL seconds."""
+            return BinanceAPI.cache.get(
+                ("ticker", symbol),
+                lambda: BinanceAPI.request_ticker_price(symbol),
+                lambda price: BinanceAPI.TICKER_TTL if isinstance(price, float) else None,
+            )
+
+    @staticmethod
+    def request_ticker_price( symbol="BTCUSDT"):
             """Fetch the latest price for a given symbol from Binance Testnet."""
             endpoint = f"{BinanceAPI.API_BASE_URL}/ticker/price"
             params = {"symbol": symbol}
             try:
-                response = requests.get(endpoint, params=params, timeout=10)
+                response = BinanceAPI.session.get(endpoint, params=params, weight=BinanceAPI.TICKER_WEIGHT)
                 response.raise_for_status()  # Raises an HTTPError for bad responses (4xx or 5xx)
                 data = response.json()
                 return float(data["price"])
@@ -26,34 +276,62 @@ class BinanceAPI:
                 return(f"Error: Unexpected response API format.")
             
     @staticmethod
-    def get_price_on_day(given_date):
+    def get_ticker_prices(symbols):
+        """
+        Fetch the latest prices of several symbols with a single /ticker/price request.
+
+        Parameters:
+            symbols (list): Trading pair symbols (e.g., ["BTCUSDT", "ETHUSDT"]).
+
+        Returns:
+            dict: Latest price keyed by symbol, or an error message if the request failed.
+        """
+        prices = BinanceAPI.cache.get(
+            ("tickers", tuple(symbols)),
+            lambda: BinanceAPI.request_ticker_prices(symbols),
+            lambda prices: BinanceAPI.TICKER_TTL if isinstance(prices, dict) else None,
+        )
+        return dict(prices) if isinstance(prices, dict) else prices
+
+    @staticmethod
+    def request_ticker_prices(symbols):
+        """Sends the /ticker/price request behind get_ticker_prices."""
+        endpoint = f"{BinanceAPI.API_BASE_URL}/ticker/price"
+        params = {"symbols": json.dumps(list(symbols), separators=(",", ":"))}
+        try:
+            response = BinanceAPI.session.get(endpoint, params=params, weight=BinanceAPI.TICKER_BATCH_WEIGHT)
+            response.raise_for_status()
+            return {item["symbol"]: float(item["price"]) for item in response.json()}
+        except requests.exceptions.RequestException as e:
+            print(f"Request error: {e}")
+            return "API Request error"
+        except ValueError:
+            print(f"Error: Could not parse response. {response.status_code}, {response.text}")
+            return "Error: Could not parse API response."
+        except (KeyError, TypeError):
+            print(f"Error: Unexpected response format.{response.status_code}, {response.text}")
+            return "Error: Unexpected response API format."
+
+    @staticmethod
+    def get_price_on_day(given_date, symbol="BTCUSDT", interval="1d"):
         """
         Fetch the closing price for a given symbol on a specific day from Binance Testnet.
 
         Parameters:
-            symbol (str): Trading pair symbol (e.g., "BTCUSDT")
-            date_str (str): Date in "YYYY-MM-DD" format
+            given_date (datetime): The day (or time) to price.
+            symbol (str): Trading pair symbol (e.g., "BTCUSDT").
+            interval (str): Kline interval; the price is the close of the first candle
+                            opening within one interval before `given_date`.
 
         Returns:
             float: Closing price for that day, or error message if not found.
         """
-        endpoint = f"{BinanceAPI.API_BASE_URL}/klines"
-
-        from_ts = given_date - timedelta(days=1)
+        from_ts = given_date - timedelta(milliseconds=Utils.interval_ms(interval) or 86_400_000)
         from_ts = int(from_ts.timestamp() * 1000) 
         to_ts = int(given_date.timestamp() * 1000) 
 
-        params = {
-            "symbol": "BTCUSDT",
-            "interval": "1d",
-            "startTime": from_ts,
-            "endTime": to_ts
-        }
-
         try:
-            response = requests.get(endpoint, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = BinanceAPI.get_klines(from_ts, to_ts, symbol, interval)
             
             if data:
                 closing_price = float(data[0][4])  # The 5th element is the "Close" price
@@ -70,33 +348,28 @@ class BinanceAPI:
             return(f"Data processing error: {e}")
         
     @staticmethod  
-    def get_prices_day_range(data, from_date, to_date):
+    def get_prices_day_range(data, from_date, to_date, symbol="BTCUSDT", interval="1d"):
         """
         Fetches closing, high, and low prices from Binance API for a date range.
 
         Parameters:
             from_date (str): Start date in 'YYYY-MM-DD' format.
             to_date (str): End date in 'YYYY-MM-DD' format.
+            symbol (str): Trading pair symbol (e.g., "BTCUSDT").
+            interval (str): Kline interval (e.g., "1h").
         """
-        endpoint = f"{BinanceAPI.API_BASE_URL}/klines"
         from_ts = int(from_date.timestamp() * 1000)
         to_ts = int(to_date.timestamp() * 1000)
 
-        params = {
-            "symbol": "BTCUSDT",
-            "interval": "1d",
-            "startTime": from_ts,
-            "endTime": to_ts
-        }
-
         try:
-            response = requests.get(endpoint, params=params, timeout=10)
-            response.raise_for_status()
-            response_data = response.json()
+            response_data = BinanceAPI.get_klines(from_ts, to_ts, symbol, interval)
 
             data.prices = [float(candle[4]) for candle in response_data]  # Closing prices
             data.highs = [float(candle[2]) for candle in response_data]   # High prices
             data.lows = [float(candle[3]) for candle in response_data]    # Low prices
+            expected = Utils.expected_candles(from_ts, to_ts, interval)
+            if expected is not None and len(data.prices) < expected:
+                print(f"Expected {expected} {interval} candles, got {len(data.prices)}")
             return(len(data.prices))
 
         except requests.exceptions.RequestException as e:
@@ -107,29 +380,21 @@ class BinanceAPI:
             return(0)
     
     @staticmethod 
-    def get_ohlc_day_range(from_date, to_date):
+    def get_ohlc_day_range(from_date, to_date, symbol="BTCUSDT", interval="1d"):
         """
         Fetches closing, high, and low prices from Binance API for a date range.
 
         Parameters:
             from_date (str): Start date in 'YYYY-MM-DD' format.
             to_date (str): End date in 'YYYY-MM-DD' format.
+            symbol (str): Trading pair symbol (e.g., "BTCUSDT").
+            interval (str): Kline interval (e.g., "1h").
         """
-        endpoint = f"{BinanceAPI.API_BASE_URL}/klines"
         from_ts = int(from_date.timestamp() * 1000)
         to_ts = int(to_date.timestamp() * 1000)
 
-        params = {
-            "symbol": "BTCUSDT",
-            "interval": "1d",
-            "startTime": from_ts,
-            "endTime": to_ts
-        }
-
         try:
-            response = requests.get(endpoint, params=params, timeout=10)
-            response.raise_for_status()
-            response_data = response.json()
+            response_data = BinanceAPI.get_klines(from_ts, to_ts, symbol, interval)
 
             ohlc_data = []
             for candle in response_data:
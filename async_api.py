@@ -0,0 +1,183 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from api import BinanceAPI
+from candle_store import CandleStore
+from known_gaps import KnownGaps
+from utils import Utils
+
+
+class AsyncBinanceAPI:
+    """
+    AsyncBinanceAPI lets asyncio code await kline windows and tickers without blocking
+    its event loop.
+
+    It is an executor wrapper, not a native asyncio HTTP client: every request is a
+    blocking call of the pooled BinanceSession (the same one BinanceAPI uses, so retries,
+    cassettes and the request weight limit are shared) run on a pool of `max_concurrency`
+    threads, and at most that many requests are in flight. For plain threaded code
+    BinanceAPI.fetch_chunks gives the same parallelism; use this class when the caller is
+    already a coroutine. Long ranges are split into page-sized chunks that are requested
+    concurrently.
+
+    Attributes:
+        base_url (str): API root, e.g. a local stand-in server when testing.
+        session (BinanceSession): HTTP session used for every request.
+        store (CandleStore): Cache of closed candles for this API root, or None to always fetch.
+        max_concurrency (int): Worker threads, and so the most requests in flight at once.
+    """
+
+    def __init__(self, base_url=None, session=None, max_concurrency=8, store=None):
+        """
+        Initializes the client.
+
+        Args:
+            base_url (str): API root; defaults to BinanceAPI.API_BASE_URL.
+            session (BinanceSession): Session to send requests with; defaults to BinanceAPI.session.
+            max_concurrency (int): Most requests in flight at once.
+            store (CandleStore): Where closed candles are cached. Binance's candles go to the
+                                 shared BinanceAPI store by default; a client for another API
+                                 root (e.g. a stand-in server) caches nothing unless given its
+                                 own store, so its candles never mix with Binance history.
+        """
+        self.base_url = base_url or BinanceAPI.API_BASE_URL
+        self.session = session or BinanceAPI.session
+        if store is None and base_url is None:
+            store = BinanceAPI.get_candle_store()
+        self.store = store
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="binance")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shuts down the worker threads."""
+        self.executor.shutdown(wait=False)
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """Runs a blocking call on the worker threads and awaits its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def get_json(self, path, params, weight):
+        """
+        Sends one GET request and returns the decoded JSON body.
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails after the session's retries.
+        """
+        response = await self.run_blocking(self.session.get, f"{self.base_url}{path}", params=params, weight=weight)
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch_span(self, from_ts, to_ts, symbol, interval):
+        """Requests one span of klines, following full pages in order."""
+        candles = []
+        while from_ts <= to_ts:
+            params = {
+                "symbol": symbol,
+                "interval": interval,
+                "startTime": from_ts,
+                "endTime": to_ts,
+                "limit": BinanceAPI.KLINES_PAGE_LIMIT
+            }
+            page = BinanceAPI.parse_klines(await self.get_json("/klines", params, BinanceAPI.KLINES_WEIGHT))
+            candles.extend(page)
+            if not page or page[-1][6] >= to_ts:
+                break  # No more candles, or the last one already reaches the end of the span
+            from_ts = page[-1][0] + 1
+        return candles
+
+    async def fetch_klines(self, from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        """
+        Requests klines from Binance without touching the local store. Ranges longer than
+        one page are split into page-sized chunks that are fetched concurrently and
+        stitched together with BinanceAPI.stitch_klines.
+
+        Args:
+            from_ts (int): Start time in milliseconds.
+            to_ts (int): End time in milliseconds.
+            symbol (str): Trading pair symbol (e.g., "BTCUSDT").
+            interval (str): Kline interval (e.g., "1d").
+
+        Returns:
+            list: Candle tuples (open_time, open, high, low, close, volume, close_time) ordered by open time.
+        """
+        return BinanceAPI.stitch_klines(await self.fetch_pages([(from_ts, to_ts)], symbol, interval), interval)
+
+    async def fetch_pages(self, spans, symbol, interval):
+        """Requests several spans of klines as page-sized chunks, all at once, and returns one candle list per chunk."""
+        chunks = [chunk for span in spans for chunk in BinanceAPI.page_spans(span[0], span[1], interval)]
+        return await asyncio.gather(*(self.fetch_span(start, end, symbol, interval) for start, end in chunks))
+
+    async def get_klines(self, from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        """
+        Returns the klines for a range like BinanceAPI.get_klines: closed candles come from
+        the client's store and only the missing spans are requested, all of them at once.
+        Without a store the whole range is requested.
+        """
+        step = Utils.interval_ms(interval)
+        if step is None or self.store is None:
+            return await self.fetch_klines(from_ts, to_ts, symbol, interval)
+
+        store = self.store
+        cached = await self.run_blocking(store.get_candles, symbol, interval, from_ts, to_ts)
+        missing = CandleStore.missing_spans([candle[0] for candle in cached], from_ts, to_ts, step)
+        missing = store.known_gaps.subtract(symbol, interval, missing, step)
+        if not missing:
+            return cached
+
+        fetched = [candle for page in await self.fetch_pages(missing, symbol, interval) for candle in page]
+        open_times = [candle[0] for candle in fetched]
+        store.known_gaps.add(symbol, interval, [  # Closed candles the fetch did not return do not exist
+            gap for start, end in KnownGaps.closed(missing, step)
+            for gap in CandleStore.missing_spans(open_times, start, end, step)
+        ])
+
+        now_ts = int(time.time() * 1000)
+        await self.run_blocking(store.save_candles, symbol, interval, [candle for candle in fetched if candle[6] < now_ts])
+
+        fetched = [candle for candle in fetched if from_ts <= candle[0] <= to_ts]
+        return BinanceAPI.stitch_klines([cached, fetched], interval)
+
+    async def get_many_klines(self, windows):
+        """
+        Fetches several kline windows concurrently.
+
+        Args:
+            windows (list): (from_ts, to_ts, symbol, interval) tuples.
+
+        Returns:
+            list: The candle list of each window, in the same order.
+        """
+        return await asyncio.gather(*(self.get_klines(*window) for window in windows))
+
+    async def get_ticker_price(self, symbol="BTCUSDT"):
+        """
+        Fetches the latest price for a symbol.
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails.
+            KeyError, ValueError: If the response is not a price.
+        """
+        data = await self.get_json("/ticker/price", {"symbol": symbol}, BinanceAPI.TICKER_WEIGHT)
+        return float(data["price"])
+
+    async def get_ticker_prices(self, symbols):
+        """
+        Fetches the latest price of several symbols with one /ticker/price request and
+        returns them as {symbol: price}.
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails.
+            KeyError, ValueError: If the response is not a list of prices.
+        """
+        params = {"symbols": json.dumps(list(symbols), separators=(",", ":"))}
+        data = await self.get_json("/ticker/price", params, BinanceAPI.TICKER_BATCH_WEIGHT)
+        return {item["symbol"]: float(item["price"]) for item in data}
@@ -0,0 +1,266 @@
+import time
+from types import SimpleNamespace
+import numpy as np
+from activate_bot import ActivateBot
+from bot_indicators import BotIndicators
+from database import MIN_ACCOUNT_BALANCE, MAX_ACCOUNT_BALANCE
+
+
+class Backtester:
+    """
+    Backtester replays the bot's strategy over a historical date range without the GUI.
+
+    Every day (or bar of the chosen interval) the RSI, MACD and Supertrend flags are
+    calculated with BotIndicators and ActivateBot's rule is applied: buy when at least two
+    flags are positive, sell when at least two are negative. Position sizing, profit/loss and the account balance limits
+    follow ActivateBot and DatabaseManager, but nothing is written to the database and
+    there is no waiting between days. With precomputed indicators the whole range is
+    simulated at once by ActivateBot.simulate, which gives the same trades as the loop.
+
+    Attributes:
+        thresholds: Risk thresholds in the form returned by DatabaseManager.get_risk_thresholds.
+        from_date (datetime): First day of the backtest.
+        to_date (datetime): Last day of the backtest.
+        start_balance (float): Account balance at the start.
+        max_trades (int): Stop after this many completed trades, or None to use the whole range.
+        precompute (bool): Calculate all days up front with BotIndicators.precompute_range.
+        vectorized (bool): Simulate the precomputed range with array operations instead of day by day.
+        bi (BotIndicators): Indicator calculator; holds the values of the last simulated day.
+    """
+
+    def __init__(self, thresholds, from_date, to_date, balance, max_trades=None, precompute=True, source=None, interval="1d", symbol="BTCUSDT", warmup_tolerance=BotIndicators.WARMUP_TOLERANCE, vectorized=True):
+        """
+        Initializes the backtest.
+
+        Args:
+            thresholds: Risk thresholds, indexable as thresholds["rsi_oversold"][0].
+            from_date (datetime): First day of the backtest.
+            to_date (datetime): Last day of the backtest.
+            balance (float): Account balance at the start.
+            max_trades (int): Stop after this many completed trades (the GUI uses 1), or None.
+            precompute (bool): Fetch and calculate the whole range in one pass instead of
+                               loading a window per day.
+            source (MarketDataSource): Where candles come from, e.g. a FileMarketData to run
+                                       offline; Binance when not given.
+            interval (str): Bar length the strategy trades on, e.g. "1d" or "4h".
+            symbol (str): Trading pair to backtest, e.g. "ETHUSDT".
+            warmup_tolerance (float): Seed weight the indicator windows are sized for, or None for
+                                      LOOKBACK_BARS windows; see BotIndicators.warmup_for.
+            vectorized (bool): Use ActivateBot.simulate when the range was precomputed.
+        """
+        self.thresholds = thresholds
+        self.from_date = from_date
+        self.to_date = to_date
+        self.start_balance = balance
+        self.max_trades = max_trades
+        self.precompute = precompute
+        self.vectorized = vectorized
+        self.bi = BotIndicators(SimpleNamespace(
+            thresholds=thresholds, trading_preference=0, from_date=from_date, to_date=to_date
+        ), source, interval, symbol, warmup_tolerance)
+
+    def calculate_flags(self, given_date):
+        """Calculates the indicator values and flags of one day into `self.bi`."""
+        if self.bi.load_precomputed(given_date):
+            return
+        self.bi.take_snapshot(given_date)
+        self.bi.calculate_rsi(given_date)
+        self.bi.calculate_macd(given_date)
+        self.bi.calculate_supertrend(given_date)
+
+    def indicator_values(self, side):
+        """Returns the current indicator values under their trade_history column names for `side` ("buy" or "sell")."""
+        return {
+            f"rsi_{side}": self.bi.rsi,
+            f"macd_{side}": self.bi.macd,
+            f"supertrend_{side}": self.bi.supertrend,
+            f"rsi_flag_{side}": self.bi.rsi_flag,
+            f"macd_flag_{side}": self.bi.macd_flag,
+            f"supertrend_flag_{side}": self.bi.st_flag,
+        }
+
+    def run(self):
+        """
+        Steps through the date range as fast as the indicators can be calculated.
+
+        Returns:
+            dict: `trades`, the completed trades as dicts keyed like the trade_history
+                  columns; `open_position`, the trade still held at the end (or None);
+                  `equity_curve`, (date, balance plus open position value) per day; and
+                  `stats` with day and trade counts, balances, timings and the bars
+                  fetched per tick (with an interval other than 1d, "days" counts bars).
+        """
+        started = time.perf_counter()
+        if self.precompute and self.bi.precompute_range(self.from_date, self.to_date) and self.vectorized:
+            return self.run_vectorized(started)
+        invest_thres = self.bi.thresholds["invest_thres"]
+        balance = self.start_balance
+        trades, equity_curve = [], []
+        position = None
+        days = 0
+
+        given_date = self.from_date
+        while given_date <= self.to_date:
+            self.calculate_flags(given_date)
+            price = self.bi.get_price_on_day(given_date)
+            days += 1
+            if not isinstance(price, float):
+                given_date += self.bi.bar  # No candle for this day
+                continue
+
+            if position is None:
+                if ActivateBot.count_flags(self.bi, 1) >= ActivateBot.MIN_AGREEING_FLAGS:
+                    position = {
+                        "buying_time": given_date,
+                        "money_in": balance * (invest_thres / 100),
+                        "buy_price": price,
+                        "balance_before": balance,
+                        **self.indicator_values("buy"),
+                    }
+            elif ActivateBot.count_flags(self.bi, -1) >= ActivateBot.MIN_AGREEING_FLAGS:
+                _, profit_loss = ActivateBot.trade_profit(position["money_in"], position["buy_price"], price)
+                if MIN_ACCOUNT_BALANCE < balance + profit_loss < MAX_ACCOUNT_BALANCE:
+                    balance += profit_loss
+                position.update({
+                    "selling_time": given_date,
+                    "sell_price": price,
+                    "profit_loss": profit_loss,
+                    "balance_after": balance,
+                    **self.indicator_values("sell"),
+                })
+                trades.append(position)
+                position = None
+
+            equity = balance
+            if position is not None:
+                equity += ActivateBot.trade_profit(position["money_in"], position["buy_price"], price)[1]
+            equity_curve.append((given_date, equity))
+
+            if self.max_trades is not None and len(trades) >= self.max_trades:
+                break
+            given_date += self.bi.bar
+
+        elapsed = time.perf_counter() - started
+        return {
+            "trades": trades,
+            "open_position": position,
+            "equity_curve": equity_curve,
+            "stats": {
+                "days": days,
+                "last_day": min(given_date, self.to_date),
+                "trades": len(trades),
+                "start_balance": self.start_balance,
+                "final_balance": balance,
+                "total_profit_loss": balance - self.start_balance,
+                "elapsed_seconds": elapsed,
+                "days_per_second": days / elapsed if elapsed > 0 else float("inf"),
+                "warmup_bars": self.bi.warmup["total"],
+            },
+        }
+
+    @staticmethod
+    def max_drawdown(equity, start_balance):
+        """
+        Largest fall of an equity curve from its running peak (the start balance included).
+
+        Args:
+            equity (np.ndarray): Equity values in time order, e.g. from an equity curve.
+            start_balance (float): Balance before the first value.
+
+        Returns:
+            tuple: (drawdown in dollars, drawdown in percent of the peak).
+        """
+        equity = np.concatenate([[start_balance], np.asarray(equity, dtype=float)])
+        peaks = np.maximum.accumulate(equity)
+        return float((peaks - equity).max()), float(((peaks - equity) / peaks * 100).max())
+
+    def bar_prices(self, bars):
+        """
+        Returns the price get_price_on_day gives for each of `bars` bars from `from_date`
+        (the close of the candle opened within one bar before it), NaN where there is none.
+        """
+        snapshot = self.bi.snapshot
+        step = int(self.bi.bar.total_seconds() * 1000)
+        bar_ts = int(self.from_date.timestamp() * 1000) + step * np.arange(bars, dtype=np.int64)
+        index = np.searchsorted(snapshot.open_times, bar_ts - step, "left")
+        found = index < len(snapshot.open_times)
+        found[found] = snapshot.open_times[index[found]] <= bar_ts[found]
+        prices = np.full(bars, np.nan)
+        prices[found] = snapshot.klines["close"][index[found]]
+        return prices
+
+    def run_vectorized(self, started):
+        """
+        Simulates the precomputed range with ActivateBot.simulate.
+
+        Args:
+            started (float): perf_counter value when the run started, for the timings.
+
+        Returns:
+            dict: The same result as `run`.
+        """
+        pre = self.bi.precomputed
+        bars = pre["bars"]
+        prices = self.bar_prices(bars)
+        simulation = ActivateBot.simulate(
+            prices, pre["rsi_flag"], pre["macd_flag"], pre["st_flag"],
+            self.bi.thresholds["invest_thres"], self.start_balance, self.max_trades,
+        )
+
+        def bar_date(index):
+            return self.from_date + int(index) * self.bi.bar
+
+        def values(index, side):
+            self.bi.load_precomputed(bar_date(index))
+            return self.indicator_values(side)
+
+        trades = []
+        for number, (entry, sell) in enumerate(zip(simulation["entries"], simulation["exits"])):
+            trades.append({
+                "buying_time": bar_date(entry),
+                "money_in": float(simulation["money_in"][number]),
+                "buy_price": float(prices[entry]),
+                "balance_before": float(simulation["balance_before"][number]),
+                **values(entry, "buy"),
+                "selling_time": bar_date(sell),
+                "sell_price": float(prices[sell]),
+                "profit_loss": float(simulation["profit_loss"][number]),
+                "balance_after": float(simulation["balance_after"][number]),
+                **values(sell, "sell"),
+            })
+        position = None
+        if simulation["open_entry"] is not None:
+            entry = simulation["open_entry"]
+            position = {
+                "buying_time": bar_date(entry),
+                "money_in": float(simulation["money_in"][-1]),
+                "buy_price": float(prices[entry]),
+                "balance_before": float(simulation["final_balance"]),
+                **values(entry, "buy"),
+            }
+
+        last_bar = simulation["last_bar"]
+        equity = simulation["equity"]
+        equity_curve = [(bar_date(index), float(equity[index])) for index in np.flatnonzero(~np.isnan(equity))]
+        days = last_bar + 1 if bars else 0
+        if days:
+            self.bi.load_precomputed(bar_date(last_bar))  # Leave the last simulated day in `bi`, like the loop
+        last_day = bar_date(last_bar) if self.max_trades is not None and len(trades) >= self.max_trades else self.to_date
+
+        elapsed = time.perf_counter() - started
+        return {
+            "trades": trades,
+            "open_position": position,
+            "equity_curve": equity_curve,
+            "stats": {
+                "days": days,
+                "last_day": min(last_day, self.to_date),
+                "trades": len(trades),
+                "start_balance": self.start_balance,
+                "final_balance": simulation["final_balance"],
+                "total_profit_loss": simulation["final_balance"] - self.start_balance,
+                "elapsed_seconds": elapsed,
+                "days_per_second": days / elapsed if elapsed > 0 else float("inf"),
+                "warmup_bars": self.bi.warmup["total"],
+            },
+        }
@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class BinanceSession:
+    """
+    BinanceSession is the single HTTP client behind BinanceAPI.
+
+    It keeps a pooled keep-alive requests.Session so repeated calls reuse their TCP/TLS
+    connection, tracks the request weight Binance reports in the X-MBX-USED-WEIGHT-1M
+    header, waits for the next minute window before a request would push the weight past
+    the limit, and retries connection errors, timeouts, 5xx and 429 responses with
+    jittered exponential backoff.
+
+    Attributes:
+        weight_limit (int): Request weight allowed per minute.
+        used_weight (int): Weight used in the current minute, as last reported by Binance
+                           plus the weight of requests sent since.
+        request_count (int): Requests sent, including retries.
+        retry_count (int): Requests that were retried.
+        throttle_seconds (float): Total time spent waiting for weight or backoff.
+        cassette (Cassette): Records responses, or answers requests from a recording
+                             instead of the network; None for plain requests.
+    """
+
+    WEIGHT_LIMIT = 6000          # Binance spot request weight per minute
+    WEIGHT_HEADROOM = 0.9        # Share of the limit used before throttling
+    MAX_RETRIES = 4
+    BACKOFF_BASE = 0.5           # Seconds before the first retry (upper bound of the jitter)
+    BACKOFF_CAP = 8.0
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+    POOL_SIZE = 16
+
+    def __init__(self, weight_limit=WEIGHT_LIMIT):
+        self.weight_limit = weight_limit
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.POOL_SIZE, pool_maxsize=self.POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.lock = threading.Lock()
+        self.window = int(time.time() // 60)
+        self.used_weight = 0
+        self.request_count = 0
+        self.retry_count = 0
+        self.throttle_seconds = 0.0
+        self.cassette = None
+
+    def reserve_weight(self, weight):
+        """Blocks until `weight` fits in the current minute window, then books it."""
+        while True:
+            with self.lock:
+                now = time.time()
+                window = int(now // 60)
+                if window != self.window:
+                    self.window = window
+                    self.used_weight = 0
+                if self.used_weight + weight <= self.weight_limit * self.WEIGHT_HEADROOM:
+                    self.used_weight += weight
+                    self.request_count += 1
+                    return
+                wait = (window + 1) * 60 - now
+            print(f"Request weight {self.used_weight}/{self.weight_limit}, waiting {wait:.1f}s")
+            self.sleep(wait)
+
+    def record_weight(self, response):
+        """Updates the used weight from the X-MBX-USED-WEIGHT-1M response header."""
+        used = response.headers.get("X-MBX-USED-WEIGHT-1M")
+        if used is None:
+            return
+        with self.lock:
+            if int(time.time() // 60) == self.window:
+                self.used_weight = max(self.used_weight, int(used))
+
+    def sleep(self, seconds):
+        """Waits and counts the time as throttling."""
+        with self.lock:
+            self.throttle_seconds += seconds
+        time.sleep(seconds)
+
+    def backoff(self, attempt, retry_after=None):
+        """Sleeps before retry number `attempt`, honouring a Retry-After header when present."""
+        if retry_after is not None:
+            delay = float(retry_after)
+        else:
+            delay = random.uniform(0, min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** attempt))
+        with self.lock:
+            self.retry_count += 1
+        self.sleep(delay)
+
+    def get(self, url, params=None, weight=1, timeout=10):
+        """
+        Sends a GET request with weight accounting and retries.
+
+        Args:
+            url (str): Endpoint URL.
+            params (dict): Query parameters.
+            weight (int): Binance request weight of the call.
+            timeout (float): Seconds to wait for the server.
+
+        Returns:
+            requests.Response: The final response. Callers still call raise_for_status(),
+                               since a 4xx other than 429 is returned without retrying.
+
+        Raises:
+            requests.exceptions.RequestException: If the request still fails after MAX_RETRIES retries.
+        """
+        cassette = self.cassette
+        if cassette is not None and cassette.replaying:
+            return cassette.replay(url, params)
+
+        attempt = 0
+        sent_at = time.monotonic()
+        while True:
+            self.reserve_weight(weight)
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.MAX_RETRIES:
+                    raise
+                self.backoff(attempt)
+                attempt += 1
+                continue
+
+            self.record_weight(response)
+            if response.status_code == 418:
+                print("IP banned by Binance, retry after", response.headers.get("Retry-After"), "seconds")
+            elif response.status_code in self.RETRY_STATUS and attempt < self.MAX_RETRIES:
+                self.backoff(attempt, response.headers.get("Retry-After"))
+                attempt += 1
+                continue
+            if cassette is not None:
+                cassette.record(url, params, response, sent_at, time.monotonic() - sent_at)
+            return response
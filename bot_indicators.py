@@ -1,5 +1,9 @@
-from api import BinanceAPI
+import numpy as np
+import requests
 from datetime import datetime, timedelta
+from indicator_engine import IndicatorEngine
+from market_data import MarketDataSource, MarketSnapshot
+from streaming_indicators import StreamingIndicators
 from utils import Utils
 
 class BotIndicators:
@@ -18,20 +22,51 @@ class BotIndicators:
         continuous_trade (bool): Flag to determine whether continuous trading is enabled.
         from_date (datetime): The start date for fetching historical data.
         to_date (datetime): The end date for fetching historical data.
+        source (MarketDataSource): Where candles and prices come from (Binance, a file or memory).
+        interval (str): Kline interval the indicators run on; every window is a number of these bars.
+        bar (timedelta): Length of one bar.
+        warmup_tolerance (float): Seed weight the windows are sized for, None for LOOKBACK_BARS windows.
+        warmup (dict): Bars before the tick that the `rsi`, `macd` and `supertrend` windows
+                       span, and the `total` fetched per tick.
+        snapshot (MarketSnapshot): Price window shared by all indicators for the current tick.
+        streaming (StreamingIndicators): Incremental indicator state used by live trading.
+        precomputed (dict): Per-bar indicator values of a historical range, see `precompute_range`.
     """
 
-    def __init__(self, user_obj):
+    LOOKBACK_BARS = 100  # Indicator window when no warm-up tolerance is set
+    WARMUP_TOLERANCE = 0.01  # Seed weight the MACD and Supertrend windows are sized for; None keeps LOOKBACK_BARS
+
+    def __init__(self, user_obj, source=None, interval="1d", symbol="BTCUSDT", warmup_tolerance=WARMUP_TOLERANCE):
         """
         Initializes the BotIndicators class with the user's settings and configurations.
         
         Args:
             user_obj (object): The user's configuration object that contains trading preferences and thresholds.
+            source (MarketDataSource): Market data provider; MarketDataSource.default(interval) when not given.
+            interval (str): Kline interval of fixed length (e.g., "1d", "4h", "15m").
+            symbol (str): Trading pair the indicators run on (e.g., "BTCUSDT", "ETHUSDT").
+            warmup_tolerance (float): The MACD and Supertrend windows are sized from the thresholds
+                                      so their seeds weigh less than this (see `warmup_for`);
+                                      None uses LOOKBACK_BARS windows instead.
+
+        Raises:
+            ValueError: If the interval has no fixed length (1w, 1M) or is unknown.
         """
         self.user_obj = user_obj
-        self.symbol = "BTCUSDT"
+        self.symbol = symbol
+        self.source = source or MarketDataSource.default(interval)
+        if Utils.interval_ms(interval) is None:
+            raise ValueError(f"Unsupported indicator interval: {interval}")
+        self.interval = interval
+        self.bar = timedelta(milliseconds=Utils.interval_ms(interval))
         self.prices = None  # Stores fetched prices to avoid redundant API calls
         self.highs, self.lows, self.prices = None, None, None
         self.thresholds = self.get_risk_thresholds(self.user_obj.thresholds)
+        self.warmup_tolerance = warmup_tolerance
+        self.warmup = BotIndicators.warmup_for(self.thresholds, warmup_tolerance)
+        self.snapshot = None
+        self.streaming = None
+        self.precomputed = None
 
         # Setup for continuous or non-continuous trading
         if self.user_obj.trading_preference == 1:
@@ -64,6 +99,301 @@ class BotIndicators:
             "supertrend_multiplier": thresholds["supertrend_multiplier"][0]
         }
 
+    @staticmethod
+    def thresholds_by_level(frame):
+        """
+        Converts rows of the risk_thresholds table into threshold dicts.
+
+        Args:
+            frame (pd.DataFrame): Rows as returned by DatabaseManager.get_all_risk_thresholds.
+
+        Returns:
+            dict: Threshold dicts in the form of `get_risk_thresholds`, keyed by risk level.
+        """
+        keys = ("invest_thres", "rsi_oversold", "rsi_overbought", "macd_fast_ema", "macd_slow_ema",
+                "macd_signal_ema", "supertrend_atr_period", "supertrend_multiplier")
+        return {int(row["risk_level"]): {key: row[key] for key in keys} for _, row in frame.iterrows()}
+
+    @staticmethod
+    def warmup_for(thresholds, tolerance=WARMUP_TOLERANCE):
+        """
+        Returns the bars each indicator window spans for one threshold set.
+
+        Args:
+            thresholds (dict): Threshold dict in the form of `get_risk_thresholds`.
+            tolerance (float): Largest seed weight (see IndicatorEngine.warmup_bars), or None
+                               for LOOKBACK_BARS windows.
+
+        Returns:
+            dict: Bars needed by `rsi`, `macd` and `supertrend`, and the `total` to fetch.
+        """
+        if tolerance is None:
+            return {
+                "rsi": IndicatorEngine.RSI_PERIOD + 1,
+                "macd": BotIndicators.LOOKBACK_BARS,
+                "supertrend": BotIndicators.LOOKBACK_BARS,
+                "total": BotIndicators.LOOKBACK_BARS,
+            }
+        return IndicatorEngine.warmup_bars(thresholds, tolerance)
+
+    @staticmethod
+    def warmup_by_level(levels, tolerance=WARMUP_TOLERANCE):
+        """
+        Reports the warm-up of several risk levels, e.g. to see how much history each one needs.
+
+        Args:
+            levels (dict or list): Threshold dicts keyed by risk level (see `thresholds_by_level`)
+                                   or in a list.
+            tolerance (float): Largest seed weight, or None for LOOKBACK_BARS windows.
+
+        Returns:
+            dict or list: The `warmup_for` dict of each level, keyed or ordered like `levels`.
+        """
+        if isinstance(levels, dict):
+            return {level: BotIndicators.warmup_for(thresholds, tolerance) for level, thresholds in levels.items()}
+        return [BotIndicators.warmup_for(thresholds, tolerance) for thresholds in levels]
+
+    def calculate_levels(self, given_date, levels):
+        """
+        Calculates RSI, MACD and Supertrend for several risk levels from one price window.
+
+        The window is taken from the tick snapshot (fetched if it does not cover the window)
+        and every level is evaluated by IndicatorEngine.compute_levels, which calculates the
+        intermediates the levels have in common only once. The window spans the longest
+        warm-up of this instance and the levels (see `warmup_by_level`), and the RSI is read
+        from the same time window calculate_rsi loads.
+
+        Args:
+            given_date (datetime): The date to evaluate.
+            levels (dict or list): Threshold dicts keyed by risk level (see `thresholds_by_level`)
+                                   or in a list.
+
+        Returns:
+            dict or list: Per level, keyed or ordered like `levels`: the latest `rsi`, `macd`
+                          and `supertrend_value` with their `rsi_flag`, `macd_flag` and `st_flag`,
+                          and the `rsi_values`, `macd_line`, `signal_line` and `supertrend` series.
+                          None if the prices could not be loaded.
+        """
+        warmups = BotIndicators.warmup_by_level(levels, self.warmup_tolerance)
+        totals = [warmup["total"] for warmup in (warmups.values() if isinstance(warmups, dict) else warmups)]
+        total = max([self.warmup["total"], *totals])
+        from_date = given_date - total * self.bar
+        if self.snapshot is None or not self.snapshot.covers(from_date, given_date):
+            self.snapshot = MarketSnapshot.fetch(given_date, total * self.bar, self.symbol, self.source, self.interval)
+            if self.snapshot is None:
+                return None
+        klines = self.snapshot.get_kline_array(int(from_date.timestamp() * 1000), int(given_date.timestamp() * 1000))
+        if len(klines) < IndicatorEngine.RSI_PERIOD + 1:
+            print("Not enough data for the risk levels")
+            return None
+        results = IndicatorEngine.compute_levels(klines["close"], klines["high"], klines["low"], levels)
+
+        # Latest RSI over the same time window calculate_rsi loads; off a bar boundary it
+        # holds one candle less than warmup["rsi"] + 1
+        rsi_from_ts = int((given_date - self.warmup["rsi"] * self.bar).timestamp() * 1000)
+        rsi = float(IndicatorEngine.rsi_last(klines["close"][klines["open_time"] >= rsi_from_ts]))
+        for level, result in (results.items() if isinstance(results, dict) else enumerate(results)):
+            result["rsi"] = rsi
+            result["rsi_flag"] = IndicatorEngine.rsi_flag(rsi, levels[level])
+        return results
+
+    def take_snapshot(self, given_date):
+        """
+        Fetches the price window for a tick once, so the indicators and the trade price
+        are all read from it instead of requesting their own windows.
+
+        Args:
+            given_date (datetime): The date of the current tick.
+        """
+        self.snapshot = MarketSnapshot.fetch(given_date, self.warmup["total"] * self.bar, self.symbol, self.source, self.interval)
+
+    @staticmethod
+    def take_snapshots(indicators, given_date):
+        """
+        Fetches the tick windows of a basket of BotIndicators (one per symbol) together,
+        so the candles missing for all symbols are requested as one batch.
+
+        Args:
+            indicators (list): BotIndicators sharing the same source and interval.
+            given_date (datetime): The date of the current tick.
+        """
+        if not indicators:
+            return
+        first = indicators[0]
+        snapshots = MarketSnapshot.fetch_many(
+            given_date, first.warmup["total"] * first.bar, [bi.symbol for bi in indicators], first.source, first.interval
+        )
+        for bi in indicators:
+            bi.snapshot = snapshots[bi.symbol] if snapshots else None
+
+    def load_prices(self, from_date, to_date):
+        """
+        Fills `self.prices`, `self.highs` and `self.lows` for a date range, using the
+        tick snapshot when it covers the range and the market data source otherwise.
+
+        Args:
+            from_date (datetime): Start of the range.
+            to_date (datetime): End of the range.
+
+        Returns:
+            int: The number of candles loaded.
+        """
+        if self.snapshot is not None and self.snapshot.covers(from_date, to_date):
+            return self.snapshot.get_prices_day_range(self, from_date, to_date)
+        return self.source.get_prices_day_range(self, from_date, to_date, self.symbol, self.interval)
+
+    def get_price_on_day(self, given_date):
+        """
+        Returns the closing price for a day, from the tick snapshot when possible.
+
+        Args:
+            given_date (datetime): The day to look up.
+
+        Returns:
+            float: Closing price for that day, or error message if not found.
+        """
+        if self.snapshot is not None and self.snapshot.covers(given_date - self.bar, given_date):
+            return self.snapshot.get_price_on_day(given_date)
+        return self.source.get_price_on_day(given_date, self.symbol, self.interval)
+
+    def calculate_live(self, given_date, candles=None):
+        """
+        Updates RSI, MACD and Supertrend for a live tick from the newest candles only.
+
+        The first tick, or any tick after a missing candle, fetches the full window and
+        seeds the streaming state; every other tick requests the last two candles (or
+        takes them from a price stream) and advances the state and the snapshot in O(1).
+
+        Args:
+            given_date (datetime): The time of the current tick.
+            candles (list): The latest candles pushed by a BinanceStream, if one is running; closed
+                            candles the stream skipped are fetched from the source.
+        
+        Returns:
+            None: The indicator values and flags are stored in the same attributes as the calculate_* methods.
+        """
+        now_ts = int(given_date.timestamp() * 1000)
+        updated = False
+        if self.streaming is not None and self.snapshot is not None:
+            try:
+                step = self.streaming.step
+                if not candles:
+                    candles = self.source.get_klines(now_ts - 2 * step, now_ts, self.symbol, self.interval)
+                elif candles[0][0] > self.streaming.last_open_time + step:
+                    # The stream never delivered the final message of a candle; fetch the closed ones it skipped
+                    missed = self.source.get_klines(self.streaming.last_open_time + step, candles[0][0] - 1, self.symbol, self.interval)
+                    candles = [candle for candle in missed if candle[6] < now_ts] + list(candles)
+                updated = self.streaming.update(candles, now_ts)
+                if updated:
+                    self.snapshot.advance(candles, given_date)
+            except requests.exceptions.RequestException as e:
+                print(f"Request error: {e}")
+                return
+            except (ValueError, KeyError, IndexError) as e:
+                print(f"Data processing error: {e}")
+                return
+
+        if not updated:
+            self.take_snapshot(given_date)
+            if self.snapshot is None:
+                return
+            self.streaming = StreamingIndicators(self.thresholds, Utils.interval_ms(self.interval))
+            self.streaming.seed(self.snapshot.candles, now_ts)
+
+        self.rsi, self.rsi_flag = self.streaming.rsi, self.streaming.rsi_flag
+        self.macd, self.macd_flag = self.streaming.macd, self.streaming.macd_flag
+        self.supertrend, self.st_flag = self.streaming.supertrend, self.streaming.st_flag
+        print("live RSI ", self.rsi, " MACD ", self.macd, " supertrend ", self.supertrend)
+
+    def precompute_range(self, from_date, to_date):
+        """
+        Calculates RSI, MACD and Supertrend for every bar of a historical range in one pass.
+
+        The whole range plus the warm-up window is fetched once, and the same per-bar windows
+        that calculate_rsi, calculate_macd and calculate_supertrend would load are evaluated
+        together as batches, so `load_precomputed` gives identical values without any
+        further requests or loops.
+
+        Args:
+            from_date (datetime): First day of the range.
+            to_date (datetime): Last day of the range.
+
+        Returns:
+            bool: True if the values were calculated, False if the prices could not be fetched.
+        """
+        lookback = (to_date - from_date) // self.bar * self.bar + self.warmup["total"] * self.bar
+        self.snapshot = MarketSnapshot.fetch(to_date, lookback, self.symbol, self.source, self.interval)
+        if self.snapshot is None or not len(self.snapshot.klines):
+            return False
+
+        open_times = self.snapshot.open_times
+        closes = np.ascontiguousarray(self.snapshot.klines["close"])
+        highs = np.ascontiguousarray(self.snapshot.klines["high"])
+        lows = np.ascontiguousarray(self.snapshot.klines["low"])
+
+        bars = [from_date + i * self.bar for i in range((to_date - from_date) // self.bar + 1)]
+        def window_index(delta_bars, side):
+            return np.searchsorted(open_times, [int((bar - delta_bars * self.bar).timestamp() * 1000) for bar in bars], side=side)
+        ends = window_index(0, "right")
+        rsi_starts = window_index(self.warmup["rsi"], "left")
+        macd_starts = window_index(self.warmup["macd"], "left")
+        supertrend_starts = window_index(self.warmup["supertrend"], "left")
+
+        values = {key: np.full(len(bars), np.nan) for key in ("rsi", "macd", "supertrend")}
+        flags = {key: np.zeros(len(bars), dtype=int) for key in ("rsi_flag", "macd_flag", "st_flag")}
+
+        for rows, indices in IndicatorEngine.window_batches(rsi_starts, ends):
+            if indices.shape[1] < IndicatorEngine.RSI_PERIOD + 1:
+                print("Not enough data for RSI")
+                continue
+            values["rsi"][rows] = IndicatorEngine.rsi_last(closes[indices])
+            flags["rsi_flag"][rows] = IndicatorEngine.rsi_flags(values["rsi"][rows], self.thresholds)
+
+        slow_period = int(self.thresholds["macd_slow_ema"])
+        signal_period = int(self.thresholds["macd_signal_ema"])
+        atr_period = int(self.thresholds["supertrend_atr_period"])
+        for rows, indices in IndicatorEngine.window_batches(macd_starts, ends):
+            if indices.shape[1] < slow_period + signal_period:
+                print("Not enough data for MACD")
+                continue
+            macd = IndicatorEngine.macd(closes[indices], self.thresholds["macd_fast_ema"], slow_period, signal_period)
+            values["macd"][rows] = macd["macd_line"][:, -1]
+            flags["macd_flag"][rows] = macd["macd_flags"][:, -1]
+
+        for rows, indices in IndicatorEngine.window_batches(supertrend_starts, ends):
+            if indices.shape[1] < atr_period + 2:
+                print("Not enough data for Supertrend")
+                continue
+            supertrend = IndicatorEngine.supertrend(closes[indices], highs[indices], lows[indices], atr_period)
+            values["supertrend"][rows] = supertrend["supertrend"][:, -1]
+            flags["st_flag"][rows] = supertrend["st_flags"][:, -1]
+
+        self.precomputed = {"from_date": from_date, "bars": len(bars), **values, **flags}
+        return True
+
+    def load_precomputed(self, given_date):
+        """
+        Sets the indicator values and flags of one bar from `precompute_range`.
+
+        Args:
+            given_date (datetime): A bar inside the precomputed range.
+
+        Returns:
+            bool: True if the day was found, False otherwise.
+        """
+        if self.precomputed is None:
+            return False
+        index = (given_date - self.precomputed["from_date"]) // self.bar
+        if not 0 <= index < self.precomputed["bars"]:
+            return False
+        self.rsi = float(self.precomputed["rsi"][index])
+        self.macd = float(self.precomputed["macd"][index])
+        self.supertrend = float(self.precomputed["supertrend"][index])
+        self.rsi_flag = int(self.precomputed["rsi_flag"][index])
+        self.macd_flag = int(self.precomputed["macd_flag"][index])
+        self.st_flag = int(self.precomputed["st_flag"][index])
+        return True
+
     def calculate_rsi(self, given_date):
         """
         Calculates the Relative Strength Index (RSI) for the given date based on historical price data.
@@ -74,51 +404,22 @@ class BotIndicators:
         Returns:
             None: The RSI value is stored in the instance variable `self.rsi`.
         """
-        period = 14
-        from_date = given_date - timedelta(days=period+1)
+        period = IndicatorEngine.RSI_PERIOD
+        from_date = given_date - self.warmup["rsi"] * self.bar
         to_date = given_date
-        BinanceAPI.get_prices_day_range(self, from_date, to_date)
-        gains, losses = [], []
-
-        # Compute initial gains and losses
-        for i in range(1, period + 1):
-            change = self.prices[i] - self.prices[i - 1]
-            gains.append(max(change, 0))
-            losses.append(abs(min(change, 0)))
-
-        # Compute initial average gain and loss
-        avg_gain = sum(gains) / period
-        avg_loss = sum(losses) / period
-
-        # Compute RSI for the most recent price
-        change = self.prices[-1] - self.prices[-2]
-        gain = max(change, 0)
-        loss = abs(min(change, 0))
-
-        # Calculate smoothed averages
-        avg_gain = ((avg_gain * (period - 1)) + gain) / period
-        avg_loss = ((avg_loss * (period - 1)) + loss) / period
-
-        # Compute RSI
-        rs = avg_gain / avg_loss if avg_loss != 0 else 100  # Prevent division by zero
-        self.rsi = 100 - (100 / (1 + rs))
+        self.load_prices(from_date, to_date)
+
+        self.rsi = float(IndicatorEngine.rsi_last(np.array(self.prices), period))
         print("RSI ", self.rsi, self.thresholds["rsi_overbought"], self.thresholds["rsi_oversold"])
         
         # Determine RSI status (Buy, Sell, or Hold)
-        if self.rsi > self.thresholds["rsi_overbought"]:
-            status = "Sell"
-            self.rsi_flag = -1
-        elif self.rsi < self.thresholds["rsi_oversold"]:
-            status = "Buy"
-            self.rsi_flag = 1
-        else:
-            self.rsi_flag = 0
-
-        return
+        self.rsi_flag = IndicatorEngine.rsi_flag(self.rsi, self.thresholds)
 
     def calculate_historical_rsi(self, given_date):
         """
         Calculates the historical RSI based on closing prices over a given time period.
+        The window is the tick's whole warm-up (`warmup["total"]`), so it is read from
+        the same snapshot as the other indicators.
 
         Args:
             given_date (datetime): The date for which to calculate historical RSI.
@@ -126,44 +427,10 @@ class BotIndicators:
         Returns:
             None: The historical RSI values are stored in `self.rsi_values`.
         """
-        period = 14
-        from_date = given_date - timedelta(days=100)
+        from_date = given_date - self.warmup["total"] * self.bar
         to_date = given_date
-        BinanceAPI.get_prices_day_range(self, from_date, to_date)
-        gains = []
-        losses = []
-
-        for i in range(1, len(self.prices)):
-            change = self.prices[i] - self.prices[i - 1]
-            if change > 0:
-                gains.append(change)
-                losses.append(0)
-            else:
-                losses.append(abs(change))
-                gains.append(0)
-
-        # Compute initial average gains and losses
-        avg_gain = sum(gains[:period]) / period
-        avg_loss = sum(losses[:period]) / period
-
-        rsi_values = []
-
-        # Calculate smoothed moving average method for the remaining RSI values
-        for i in range(period, len(self.prices)):
-            gain = gains[i - 1]
-            loss = losses[i - 1]
-
-            avg_gain = ((avg_gain * (period - 1)) + gain) / period
-            avg_loss = ((avg_loss * (period - 1)) + loss) / period
-
-            if avg_loss == 0:
-                rs = float("inf")  # Avoid division by zero
-            else:
-                rs = avg_gain / avg_loss
-
-            rsi = 100 - (100 / (1 + rs))
-            rsi_values.append((rsi))
-        self.rsi_values = rsi_values
+        self.load_prices(from_date, to_date)
+        self.rsi_values = IndicatorEngine.rsi_series(np.array(self.prices), IndicatorEngine.RSI_PERIOD).tolist()
 
     def calculate_macd(self, given_date):
         """
@@ -175,77 +442,33 @@ class BotIndicators:
         Returns:
             None: The MACD values and signals are stored in instance variables.
         """
-        fast_period = self.thresholds["macd_fast_ema"]
-        slow_period = self.thresholds["macd_slow_ema"]
-        signal_period = self.thresholds["macd_signal_ema"]
+        fast_period = int(self.thresholds["macd_fast_ema"])
+        slow_period = int(self.thresholds["macd_slow_ema"])
+        signal_period = int(self.thresholds["macd_signal_ema"])
 
-        required_period = 100
-        from_date = given_date - timedelta(days=required_period)
+        required_period = self.warmup["macd"]
+        from_date = given_date - required_period * self.bar
         to_date = given_date
-        BinanceAPI.get_prices_day_range(self, from_date, to_date)
+        self.load_prices(from_date, to_date)
 
         if len(self.prices) < required_period:
             print("Not enough data for MACD")
-
-        # Calculate EMA multipliers
-        multiplier_fast = 2 / (fast_period + 1)
-        multiplier_slow = 2 / (slow_period + 1)
-        multiplier_signal = 2 / (signal_period + 1)
-
-        # Initialize EMA lists with None values
-        ema_fast_list = [None] * len(self.prices)
-        ema_slow_list = [None] * len(self.prices)
-
-        # Compute first EMA as a simple moving average (SMA)
-        ema_fast = sum(self.prices[:fast_period]) / fast_period
-        ema_slow = sum(self.prices[:slow_period]) / slow_period
-
-        # Compute the remaining EMA values iteratively
-        for i in range(slow_period, len(self.prices)):
-            ema_fast = (self.prices[i] - ema_fast) * multiplier_fast + ema_fast
-            ema_slow = (self.prices[i] - ema_slow) * multiplier_slow + ema_slow
-            ema_fast_list[i] = ema_fast
-            ema_slow_list[i] = ema_slow
-
-        # Calculate MACD line by subtracting fast EMA from slow EMA
-        macd_line = [None] * len(self.prices)
-        for i in range(len(self.prices)):
-            if ema_fast_list[i] is not None and ema_slow_list[i] is not None:
-                macd_line[i] = ema_fast_list[i] - ema_slow_list[i]
-
-        # Generate Signal Line by applying EMA to MACD line
-        valid_macd = [m for m in macd_line if m is not None]
-        if len(valid_macd) < signal_period:
+        if len(self.prices) - slow_period < signal_period:
             print("Not enough data for Signal Line")
 
-        signal_ema = sum(valid_macd[:signal_period]) / signal_period
-        signal_line = [None] * (slow_period + signal_period - 2) + [signal_ema]
-
-        for i in range(0, len(valid_macd)):
-            signal_ema = (valid_macd[i] - signal_ema) * multiplier_signal + signal_ema
-            signal_line.append(signal_ema)
-
-        # Generate Buy/Sell/Hold signals based on MACD crossovers
-        if len(macd_line) < 2 or len(signal_line) < 2 or macd_line[-1] is None or macd_line[-2] is None:
-            print("Not enough data for MACD signals")
-
-        if (
-            macd_line[-1] > signal_line[-1] and macd_line[-2] <= signal_line[-2]
-        ):
-            self.macd_flag = 1
-            status = "Buy"
-        elif (
-            macd_line[-1] < signal_line[-1] and macd_line[-2] >= signal_line[-2]
-        ):
-            self.macd_flag = -1
-            status = "Sell"
-        else:
-            self.macd_flag = 0
-            status = "Hold"
+        result = IndicatorEngine.macd(np.array(self.prices), fast_period, slow_period, signal_period)
+
+        # Buy/Sell/Hold signal from the MACD crossover on the latest day
+        self.macd_flag = int(result["macd_flags"][-1])
+        self.macd = float(result["macd_line"][-1])
 
-        self.macd = macd_line[-1]
-        self.macd_line_filtered = [m for m in macd_line]
-        self.signal_line_filtered = [s for s in signal_line]
+        # Lists for the indicator graphs; the signal line keeps its seed value in front of the EMA values
+        self.macd_line_filtered = IndicatorEngine.to_list(result["macd_line"])
+        self.signal_line_filtered = (
+            [None] * (slow_period + signal_period - 2)
+            + [float(result["signal_seed"])]
+            + result["signal_line"][slow_period:].tolist()
+        )
 
     def calculate_supertrend(self, given_date):
         """
@@ -257,80 +480,23 @@ class BotIndicators:
         Returns:
             None: The Supertrend values and signals are stored in instance variables.
         """
-        atr_period = self.thresholds["supertrend_atr_period"]
-        multiplier = self.thresholds["supertrend_multiplier"]
-        #period = atr_period * 3
-        period = 100
+        atr_period = int(self.thresholds["supertrend_atr_period"])
+        period = self.warmup["supertrend"]
 
-        #BinanceAPI.get_prices(self, period + 1)  # Fetch prices only if not already fetched
-        from_date = given_date - timedelta(days=period)
+        from_date = given_date - period * self.bar
         to_date = given_date 
-        BinanceAPI.get_prices_day_range(self, from_date, to_date)
-        
-        tr_list  = []
-        atr = [None] * len(self.prices)
-        supertrend = [None] * len(self.prices)
-        for i in range(len(self.prices)):
-            tr = max(self.highs[i] - self.lows[i],
-                     abs(self.highs[i] - self.prices[i - 1]) if i > 0 else 0,
-                     abs(self.lows[i] - self.prices[i - 1]) if i > 0 else 0)
-            tr_list.append(tr)
-             # Compute First ATR value using SMA
-        atr[atr_period - 1] = sum(tr_list[:atr_period]) / atr_period  # First ATR is SMA
-
-            # Compute Remaining ATR values using EMA formula
-        for i in range(atr_period, len(self.prices)):
-            atr[i] = ((atr[i - 1] * (atr_period - 1)) + tr_list[i]) / atr_period  # EMA ATR formula
-        upper = [None]* len(self.prices)
-        lower = [None]* len(self.prices)
-
-        multiplier = 1
-        for i in range(atr_period, len(self.prices)):   
-            mid = (self.highs[i] + self.lows[i]) / 2
-            upper[i] = mid + (multiplier * atr[i])
-            lower[i] = mid - (multiplier * atr[i])
-            if i == atr_period:
-                supertrend[i] = (lower[i])
-            else:
-
-                if self.prices[i] > supertrend[i-1]:
-                    supertrend[i] = lower[i]
-                else:
-                    supertrend[i] = upper[i]
-            #print("price  -", self.prices[i], atr[i],upper[i], lower[i])  
-        """Generates Buy or Sell signals based on Supertrend."""
-    
-        green_line = [None] * len(self.prices)
-        red_line = [None] * len(self.prices)
-        for i in range(atr_period, len(self.prices)):
-            if supertrend[i] < self.prices[i]:
-                green_line[i] = supertrend[i]
-            else:
-                red_line[i] = supertrend[i]
-        self.supertrend_green = [m for m in green_line ]
-        self.supertrend_prices = [s for s in self.prices ]
-        self.supertrend_red = [p for p in red_line]
-
-        min_supertrend = min(s for s in supertrend if s != None)
-        max_supertrend = max(s for s in supertrend if s != None)
-        #plot_macd(min_supertrend-5000, max_supertrend+5000, macd_line_filtered, "buy", signal_line_filtered, "prices", price_line, "sell")
-
-        signals = [None] * len(self.prices)
-        for i in range(atr_period+1, len(self.prices)):
-            # if supertrend[i] is None or supertrend[i-1] is None:
-            #     continue
-            if i > 0 and self.prices[i] > supertrend[i] :# and self.prices[i - 1] < supertrend[i - 1]:
-                signals[i] = "BUY"
-            elif i > 0 and self.prices[i] < supertrend[i] :#and self.prices[i - 1] > supertrend[i - 1]:
-                signals[i]="SELL"
-            else:
-                signals[i]="HOLD"
-            #print(self.prices[i], supertrend[i], signals[i])
-        self.supertrend = supertrend[-1]
-        if signals[-1]=="BUY":
-            self.st_flag = 1
-        elif signals[-1]=="SELL":
-            self.st_flag=-1
-        else:
-            self.st_flag=0
+        self.load_prices(from_date, to_date)
+
+        # Bands are drawn one ATR either side of the candle midpoint
+        prices = np.array(self.prices)
+        result = IndicatorEngine.supertrend(prices, self.highs, self.lows, atr_period)
+        supertrend = result["supertrend"]
+
+        # Split the line into its buy (below price) and sell (above price) parts for the graphs
+        self.supertrend_green = IndicatorEngine.to_list(np.where(supertrend < prices, supertrend, np.nan))
+        self.supertrend_red = IndicatorEngine.to_list(np.where(supertrend >= prices, supertrend, np.nan))
+        self.supertrend_prices = list(self.prices)
+
+        self.supertrend = float(supertrend[-1])
+        self.st_flag = int(result["st_flags"][-1])
         print("supertrend ", self.prices[-1] , supertrend[-1] ,  self.prices[-2] ,  supertrend[-2])
@@ -1,10 +1,9 @@
 import matplotlib.pyplot as plt
+import numpy as np
 import matplotlib.dates as mdates
 from matplotlib.figure import Figure
-from matplotlib.patches import Rectangle
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
-from api import BinanceAPI
 from utils import Utils
 from datetime import datetime, timedelta
 
@@ -17,23 +16,31 @@ class BTCCandlestickChart:
             bi_class: A class that holds the trading data and technical indicators.
         """
         self.parent = parent
+        self.source = bi_class.source  # Market data provider shared with the indicators
+        self.interval = bi_class.interval  # Candle interval, the same as the indicators use
+        self.width = bi_class.bar / timedelta(days=1)  # Candle width in chart date units (days)
+        self.symbol = bi_class.symbol  # Trading pair shown in the title
 
-    def get_ohlc_data(self, trading_preference, from_date, to_date):
+    def get_ohlc_data(self, trading_preference, from_date, to_date, snapshot=None):
         """Fetches the OHLC data for the specified date range.
         
-        If trading_preference is 1, it fetches data for the last 30 days.
+        If trading_preference is 1, it fetches data for the last 30 days (30 candles of the interval).
         
         Args:
             trading_preference: An integer indicating the preferred trading duration.
             from_date: The start date for fetching OHLC data.
             to_date: The end date for fetching OHLC data.
+            snapshot: Optional MarketSnapshot of the current tick, reused in live mode instead of a new request.
         """
         if trading_preference == 1:
-            from_date = Utils.get_date() - timedelta(days=30)
+            if snapshot is not None:
+                self.ohlc_data = snapshot.get_ohlc_day_range(snapshot.to_date - timedelta(days=30 * self.width), snapshot.to_date)
+                return
+            from_date = Utils.get_date() - timedelta(days=30 * self.width)
             to_date = Utils.get_date()
 
-        # Get OHLC data from Binance API
-        self.ohlc_data = BinanceAPI.get_ohlc_day_range(from_date, to_date)
+        # Get OHLC data from the market data source
+        self.ohlc_data = self.source.get_ohlc_day_range(from_date, to_date, self.symbol, self.interval)
 
     def plot_indicator_graphs(self, bi_class):
         """Plots RSI, MACD, Supertrend, and Prices in a 2x2 Matplotlib figure inside Tkinter without explicitly passing X values.
@@ -104,7 +111,7 @@ class BTCCandlestickChart:
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
     def plot_candlestick_chart(self, fig, ax):
-        """Plots the BTC/USDT candlestick chart inside Tkinter.
+        """Plots the candlestick chart of the trading pair inside Tkinter.
         
         Args:
             fig: The Matplotlib figure object.
@@ -117,17 +124,22 @@ class BTCCandlestickChart:
         self.canvas.mpl_connect("motion_notify_event", self.on_hover)
 
         # Format x-axis for dates
-        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))  # Date format
-        self.ax.xaxis.set_major_locator(mdates.DayLocator(interval=2))  # X-axis tick interval
+        if self.interval == "1d":
+            self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))  # Date format
+            self.ax.xaxis.set_major_locator(mdates.DayLocator(interval=2))  # X-axis tick interval
+        else:
+            locator = mdates.AutoDateLocator()  # Intraday candles need hour and minute ticks
+            self.ax.xaxis.set_major_locator(locator)
+            self.ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
         for label in self.ax.get_xticklabels():
             label.set_rotation(45)  # Rotate labels for better readability
             label.set_horizontalalignment('right')
 
-        # Plot each candlestick (OHLC) data
-        for x, o, h, l, c in self.ohlc_data:
-            color = 'g' if c >= o else 'r'  # Green for bullish, red for bearish candlesticks
-            self.ax.plot([x, x], [l, h], color=color)  # Wick (line between high and low)
-            self.ax.add_patch(Rectangle((x - 0.3, min(o, c)), 0.6, abs(o - c), color=color))  # Body of the candlestick
+        # Plot all candlesticks (OHLC) at once
+        x, o, h, l, c = np.asarray(self.ohlc_data, dtype=float).reshape(-1, 5).T
+        colors = np.where(c >= o, 'g', 'r')  # Green for bullish, red for bearish candlesticks
+        self.ax.vlines(x, l, h, colors=colors)  # Wicks (lines between high and low)
+        self.ax.bar(x, np.abs(o - c), width=0.6 * self.width, bottom=np.minimum(o, c), color=colors)  # Bodies of the candlesticks
 
         # Annotation for OHLC tooltip
         self.ohlc_annot = self.ax.annotate("", xy=(0, 0), xytext=(-50, 50), textcoords="offset points",
@@ -136,7 +148,7 @@ class BTCCandlestickChart:
         self.ohlc_annot.set_visible(False)
 
         # Set the title and labels for the chart
-        self.ax.set_title("BTC/USDT")
+        self.ax.set_title(Utils.pair_name(self.symbol))
         self.ax.set_ylabel("Price($)")
 
     def is_cursor_on_candlestick(self, event):
@@ -148,10 +160,9 @@ class BTCCandlestickChart:
         Returns:
             int: The index of the candlestick if hovered, None otherwise.
         """
-        for i, (x, o, h, l, c) in enumerate(self.ohlc_data):
-            if abs(x - event.xdata) < 0.3 and l <= event.ydata <= h:
-                return i
-        return None
+        x, o, h, l, c = np.asarray(self.ohlc_data, dtype=float).reshape(-1, 5).T
+        hits = np.nonzero((np.abs(x - event.xdata) < 0.3 * self.width) & (l <= event.ydata) & (event.ydata <= h))[0]
+        return int(hits[0]) if len(hits) else None
 
     def update_ohlc_annot(self, index):
         """Updates the OHLC tooltip when hovering over a candlestick.
@@ -161,7 +172,8 @@ class BTCCandlestickChart:
         """
         x, o, h, l, c = self.ohlc_data[index]
         self.ohlc_annot.xy = (x, c)  # Set the position of the annotation
-        text = f"Date: {mdates.num2date(x).strftime('%b %d')}\nOpen: {o}\nHigh: {h}\nLow: {l}\nClose: {c}"
+        date_format = '%b %d' if self.interval == "1d" else '%b %d %H:%M'
+        text = f"Date: {mdates.num2date(x).strftime(date_format)}\nOpen: {o}\nHigh: {h}\nLow: {l}\nClose: {c}"
         self.ohlc_annot.set_text(text)  # Set the text of the tooltip
         self.ohlc_annot.get_bbox_patch().set_alpha(0.9)  # Set tooltip transparency
 
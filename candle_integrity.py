@@ -0,0 +1,167 @@
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import requests
+from api import BinanceAPI
+from kline_archive import KlineArchive
+from utils import Utils
+
+
+class CandleIntegrity:
+    """
+    CandleIntegrity checks the locally cached candles (the SQLite CandleStore or a
+    KlineArchive) for holes and damage, and refetches only what is missing.
+
+    A scan indexes the stored open times of a range and reports the missing spans,
+    duplicated and misaligned open times and the share of the range that is covered.
+    A repair requests the missing spans from Binance in page-sized batches and stores the
+    closed candles; spans Binance has no candles for either (exchange outages) are
+    added to the cache's `known_gaps`, which the fetch paths also skip, so neither later
+    passes nor trading ticks ask for them again. `start` runs scan and repair for a list
+    of ranges on a background thread.
+
+    Attributes:
+        storage (CandleStore or KlineArchive): The cache being checked.
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage or BinanceAPI.get_candle_store()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @staticmethod
+    def last_closed_open_time(step):
+        """Returns the open time of the newest candle that has closed."""
+        now_ts = int(datetime.now().timestamp() * 1000)
+        return now_ts // step * step - step
+
+    def open_times(self, symbol, interval, from_ts, to_ts):
+        """Returns the stored open times inside [from_ts, to_ts] as an array, in stored order."""
+        if isinstance(self.storage, KlineArchive):
+            return self.storage.get_klines(symbol, interval, from_ts, to_ts)["open_time"]
+        return np.array([candle[0] for candle in self.storage.get_candles(symbol, interval, from_ts, to_ts)], dtype=np.int64)
+
+    def scan(self, symbol, interval, from_ts, to_ts):
+        """
+        Checks a range of the cache. The candle still forming is not expected.
+
+        Args:
+            symbol (str): Trading pair symbol.
+            interval (str): Kline interval of fixed length.
+            from_ts (int): Start of the range in milliseconds.
+            to_ts (int): End of the range in milliseconds.
+
+        Returns:
+            dict: `expected` and `present` candle counts, `coverage` (present share of
+                  expected), `missing` (start_ts, end_ts) spans, `duplicates` and
+                  `misaligned` open times, and the missing spans that are `known_gaps`.
+        """
+        step = Utils.interval_ms(interval)
+        if step is None:
+            raise ValueError(f"Unsupported interval for an integrity scan: {interval}")
+        to_ts = min(to_ts, CandleIntegrity.last_closed_open_time(step))
+        first = -(-from_ts // step) * step
+        expected = max(0, (to_ts - first) // step + 1)
+
+        open_times = self.open_times(symbol, interval, from_ts, to_ts)
+        ordered = np.sort(open_times)
+        duplicates = np.unique(ordered[1:][np.diff(ordered) == 0])
+        misaligned = np.unique(ordered[ordered % step != 0])
+        aligned = np.unique(ordered[ordered % step == 0])
+        missing = KlineArchive.missing_spans(aligned, from_ts, to_ts, step)
+        gaps = self.storage.known_gaps
+        return {
+            "symbol": symbol,
+            "interval": interval,
+            "expected": int(expected),
+            "present": len(aligned),
+            "coverage": len(aligned) / expected if expected else 1.0,
+            "missing": gaps.subtract(symbol, interval, missing, step),
+            "known_gaps": [(start, end) for start, end in gaps.get(symbol, interval) if start <= to_ts and end >= from_ts],
+            "duplicates": duplicates.tolist(),
+            "misaligned": misaligned.tolist(),
+        }
+
+    def repair(self, symbol, interval, from_ts, to_ts):
+        """
+        Scans a range and refetches its missing spans, all of them as one batch of
+        page-sized chunks. Duplicated open times in an archive are collapsed to one candle.
+
+        Returns:
+            dict: The scan report after the repair, with `fetched` (candles stored) added.
+        """
+        report = self.scan(symbol, interval, from_ts, to_ts)
+        fetched = 0
+        if report["missing"]:
+            try:
+                pages = BinanceAPI.fetch_pages(report["missing"], symbol, interval)
+            except requests.exceptions.RequestException as e:
+                print(f"Request error: {e}")
+                pages = None
+            if pages is not None:
+                last_closed = CandleIntegrity.last_closed_open_time(Utils.interval_ms(interval))
+                candles = [candle for page in pages for candle in page if candle[0] <= last_closed]
+                fetched = self.store(symbol, interval, candles)
+                # Whatever is still missing after a successful fetch does not exist on Binance either
+                self.storage.known_gaps.add(symbol, interval, self.scan(symbol, interval, from_ts, to_ts)["missing"])
+
+        if report["duplicates"] and isinstance(self.storage, KlineArchive):
+            for open_time in report["duplicates"]:
+                self.storage.append(symbol, interval, self.storage.get_klines(symbol, interval, open_time, open_time)[-1:])
+
+        report = self.scan(symbol, interval, from_ts, to_ts)
+        report["fetched"] = fetched
+        return report
+
+    def store(self, symbol, interval, candles):
+        """Writes fetched candles to the cache and returns how many were written."""
+        if not candles:
+            return 0
+        if isinstance(self.storage, KlineArchive):
+            return self.storage.append(symbol, interval, candles)
+        return len(candles) if self.storage.save_candles(symbol, interval, candles) else 0
+
+    def coverage_report(self, targets):
+        """
+        Scans several ranges without repairing them.
+
+        Args:
+            targets (list): (symbol, interval, from_ts, to_ts) tuples.
+
+        Returns:
+            list: One scan report per target.
+        """
+        return [self.scan(*target) for target in targets]
+
+    def start(self, targets, every=3600):
+        """
+        Repairs the given ranges now and then every `every` seconds on a background thread.
+
+        Args:
+            targets (list): (symbol, interval, lookback_ms) tuples; each pass checks the
+                            last `lookback_ms` milliseconds up to the present.
+            every (float): Seconds between passes.
+        """
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, args=(targets, every), name="candle-integrity", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def run(self, targets, every):
+        while not self.stop_event.is_set():
+            now_ts = int(time.time() * 1000)
+            for symbol, interval, lookback_ms in targets:
+                if self.stop_event.is_set():
+                    return
+                report = self.repair(symbol, interval, now_ts - lookback_ms, now_ts)
+                if report["fetched"] or report["missing"]:
+                    print(f"Candle integrity {symbol} {interval}: fetched {report['fetched']}, "
+                          f"coverage {report['coverage']:.2%}, {len(report['missing'])} spans still missing")
+            self.stop_event.wait(every)
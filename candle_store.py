@@ -0,0 +1,138 @@
+import sqlite3
+import threading
+from known_gaps import KnownGaps
+
+# Path to the local candle cache
+CANDLE_DATABASE_PATH = "assets/klines.db"
+
+
+class CandleStore:
+    """
+    Persists closed Binance klines on disk so that historical windows are only downloaded once.
+
+    Candles are keyed by (symbol, interval, open_time) and stored as
+    (open_time, open, high, low, close, volume, close_time) rows, which keeps the
+    same column positions as the raw Binance kline arrays. `known_gaps` remembers the
+    spans Binance has no candles for, so they are not requested again.
+    """
+
+    def __init__(self, path=CANDLE_DATABASE_PATH):
+        """
+        Opens (or creates) the candle database and makes sure the klines table exists.
+
+        Args:
+            path (str): Location of the SQLite file used for the cache.
+        """
+        self.path = path
+        self.lock = threading.Lock()  # The connection is shared between API worker threads
+        self.known_gaps = KnownGaps()
+        try:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS klines (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    open_time INTEGER NOT NULL,
+                    open FLOAT,
+                    high FLOAT,
+                    low FLOAT,
+                    close FLOAT,
+                    volume FLOAT,
+                    close_time INTEGER,
+                    PRIMARY KEY (symbol, interval, open_time)
+                ) WITHOUT ROWID
+            """)
+            self.conn.commit()
+        except sqlite3.Error as error:
+            print(f"Unable to open candle store: {error}")
+            self.conn = None
+
+    def close_connection(self):
+        """Closes the database connection."""
+        if self.conn:
+            self.conn.close()
+
+    def get_candles(self, symbol, interval, from_ts, to_ts):
+        """
+        Reads the cached candles whose open time falls inside [from_ts, to_ts].
+
+        Args:
+            symbol (str): Trading pair symbol (e.g., "BTCUSDT").
+            interval (str): Kline interval (e.g., "1d").
+            from_ts (int): Start of the range in milliseconds.
+            to_ts (int): End of the range in milliseconds.
+
+        Returns:
+            list: Candle tuples ordered by open time, empty if nothing is cached.
+        """
+        if self.conn is None:
+            return []
+        try:
+            with self.lock:
+                cursor = self.conn.execute("""
+                    SELECT open_time, open, high, low, close, volume, close_time
+                    FROM klines
+                    WHERE symbol = ? AND interval = ? AND open_time BETWEEN ? AND ?
+                    ORDER BY open_time
+                """, (symbol, interval, from_ts, to_ts))
+                return cursor.fetchall()
+        except sqlite3.Error as error:
+            print(f"Candle store error: {error}")
+            return []
+
+    def save_candles(self, symbol, interval, candles):
+        """
+        Stores candles, replacing any existing row with the same open time.
+
+        Args:
+            symbol (str): Trading pair symbol.
+            interval (str): Kline interval.
+            candles (list): Candle tuples in (open_time, open, high, low, close, volume, close_time) order.
+
+        Returns:
+            bool: True if the candles were written, False otherwise.
+        """
+        if self.conn is None or not candles:
+            return False
+        try:
+            with self.lock:
+                self.conn.executemany("""
+                    INSERT OR REPLACE INTO klines
+                        (symbol, interval, open_time, open, high, low, close, volume, close_time)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(symbol, interval, *candle[:7]) for candle in candles])
+                self.conn.commit()
+            return True
+        except sqlite3.Error as error:
+            print(f"Candle store error: {error}")
+            return False
+
+    @staticmethod
+    def missing_spans(cached_open_times, from_ts, to_ts, step):
+        """
+        Works out which parts of a range are not covered by the cached open times.
+
+        Args:
+            cached_open_times (list): Open times already available locally.
+            from_ts (int): Start of the requested range in milliseconds.
+            to_ts (int): End of the requested range in milliseconds.
+            step (int): Candle length in milliseconds.
+
+        Returns:
+            list: (start_ts, end_ts) pairs of contiguous missing candles, in order.
+        """
+        cached = set(cached_open_times)
+        spans = []
+        span_start = None
+        open_time = -(-from_ts // step) * step  # First candle boundary at or after from_ts
+        while open_time <= to_ts:
+            if open_time in cached:
+                if span_start is not None:
+                    spans.append((span_start, open_time - step))
+                    span_start = None
+            elif span_start is None:
+                span_start = open_time
+            open_time += step
+        if span_start is not None:
+            spans.append((span_start, to_ts))
+        return spans
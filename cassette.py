@@ -0,0 +1,154 @@
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+import requests
+from requests.structures import CaseInsensitiveDict
+from api import BinanceAPI
+
+
+class Cassette:
+    """
+    Cassette records the HTTP traffic of a BinanceSession to a gzipped JSON-lines file
+    and plays it back later without a network connection, so a live session can be
+    re-run on identical inputs to compare performance before and after a change.
+
+    Each line holds the request path and parameters, the response status, body and
+    rate-limit headers, when the request was sent (seconds from the start of the
+    recording) and how long it took. On replay a request is answered by the next unused
+    recording with the same path and parameters, or, since live windows end at the
+    current time, by the next unused recording of the same path and parameters apart
+    from startTime and endTime, so each symbol and interval gets its own responses back
+    in the order they were recorded. Replay runs at full speed, or with `realtime` set
+    keeps the recorded timing: each response is held back until as long after the start
+    of the replay as its request was sent after the start of the recording, and then for
+    as long as the original request took.
+
+    Only BinanceSession traffic is recorded; the workstation leaves the websocket stream
+    and the background candle repairs off while a cassette is attached.
+
+    Attributes:
+        path (str): Cassette file.
+        mode (str): "record" or "replay".
+        realtime (bool): Reproduce the recorded request spacing and response times when replaying.
+        entries (list): Recorded exchanges, oldest first.
+    """
+
+    HEADERS = ("Content-Type", "X-MBX-USED-WEIGHT-1M", "Retry-After")  # Headers worth keeping
+    TIME_PARAMS = ("startTime", "endTime")  # Move with the clock, so they are ignored when no exact match is left
+
+    def __init__(self, path, mode="record", realtime=False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.realtime = realtime
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.entries = []
+        self.session = None
+        if mode == "replay":
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+        self.by_request = defaultdict(deque)  # (path, params) -> indexes of unused entries
+        self.by_caller = defaultdict(deque)  # (path, params without times) -> indexes of unused entries
+        for index, entry in enumerate(self.entries):
+            self.by_request[(entry["path"], Cassette.params_key(entry["params"]))].append(index)
+            self.by_caller[(entry["path"], Cassette.caller_key(entry["params"]))].append(index)
+        self.used = set()
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    @staticmethod
+    def params_key(params):
+        """Returns query parameters in a stable, hashable form."""
+        return json.dumps({name: str(value) for name, value in (params or {}).items()}, sort_keys=True)
+
+    @staticmethod
+    def caller_key(params):
+        """Returns query parameters without the time range, identifying what a live window asks for."""
+        return Cassette.params_key({name: value for name, value in (params or {}).items() if name not in Cassette.TIME_PARAMS})
+
+    def __enter__(self):
+        return self.start(BinanceAPI.session)  # The session every BinanceAPI request goes through
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self, session):
+        """Attaches the cassette to a BinanceSession."""
+        self.session = session
+        session.cassette = self
+        self.started = time.monotonic()
+        return self
+
+    def stop(self):
+        """Detaches the cassette and, when recording, writes the file."""
+        if self.session is not None and self.session.cassette is self:
+            self.session.cassette = None
+        self.session = None
+        if self.mode == "record":
+            self.save()
+
+    def save(self):
+        with self.lock:
+            entries = list(self.entries)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def record(self, url, params, response, sent_at, elapsed):
+        """Keeps one request and the response it got."""
+        entry = {
+            "at": round(sent_at - self.started, 4),
+            "elapsed": round(elapsed, 4),
+            "path": urlparse(url).path,
+            "params": {name: str(value) for name, value in (params or {}).items()},
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in self.HEADERS if name in response.headers},
+            "body": response.text,
+        }
+        with self.lock:
+            self.entries.append(entry)
+
+    def replay(self, url, params):
+        """
+        Answers a request from the cassette.
+
+        Returns:
+            requests.Response: The recorded response.
+
+        Raises:
+            requests.exceptions.ConnectionError: If no unused recording of the request is left.
+        """
+        path = urlparse(url).path
+        with self.lock:
+            index = Cassette.next_unused(self.by_request[(path, Cassette.params_key(params))], self.used)
+            if index is None:
+                index = Cassette.next_unused(self.by_caller[(path, Cassette.caller_key(params))], self.used)
+            if index is None:
+                raise requests.exceptions.ConnectionError(f"No recorded response left for {path}")
+            self.used.add(index)
+        entry = self.entries[index]
+        if self.realtime:
+            time.sleep(max(0.0, self.started + entry["at"] - time.monotonic()))
+            time.sleep(entry["elapsed"])
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["body"].encode()
+        response.encoding = "utf-8"
+        response.url = url
+        return response
+
+    @staticmethod
+    def next_unused(indexes, used):
+        """Pops indexes already used elsewhere and returns the first unused one, or None."""
+        while indexes and indexes[0] in used:
+            indexes.popleft()
+        return indexes.popleft() if indexes else None
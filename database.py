@@ -6,6 +6,10 @@ from utils import Utils
 DATABASE_PATH = "assets/bitcoin.db"
 DATABASE_TEST_PATH = "assets/bitcoin_test.db"
 
+# Account balances outside this range are not written back
+MIN_ACCOUNT_BALANCE = 500
+MAX_ACCOUNT_BALANCE = 20000
+
 class DatabaseManager:
     """
     Handles database operations for user management and balances in a cryptocurrency trading application.
@@ -114,7 +118,7 @@ class DatabaseManager:
             current_balance = row[0]
             new_balance = current_balance + amount
             self.balance = new_balance
-            if new_balance < 20000 and new_balance > 500:  # Ensure balance is within valid range
+            if new_balance < MAX_ACCOUNT_BALANCE and new_balance > MIN_ACCOUNT_BALANCE:  # Ensure balance is within valid range
                 # Update the balance in the database
                 self.cursor.execute("UPDATE user_profile SET account_balance = ? WHERE username = ?", (new_balance, username))
                 self.conn.commit()
@@ -171,6 +175,19 @@ class DatabaseManager:
             print(f"Database error: {error}")
             return 
 
+    def get_all_risk_thresholds(self):
+        """
+        Fetches the risk thresholds of every risk level from the database.
+
+        Returns:
+            pd.DataFrame: One row of thresholds per risk level, ordered by level.
+        """
+        try:
+            return pd.read_sql_query("SELECT * FROM risk_thresholds ORDER BY risk_level", self.conn)
+        except sqlite3.Error as error:
+            print(f"Database error: {error}")
+            return 
+
     def update_trade_history_buy(self, given_date, user_obj, ab_class, bi_class):
         """
         Updates the trade history with a buy trade.
@@ -0,0 +1,278 @@
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from api import BinanceAPI
+from candle_store import CandleStore
+from fake_stream import FakeStreamServer
+from market_data import BinanceMarketData, FileMarketData, SyntheticMarketData
+from utils import Utils
+
+
+class FakeBinanceHandler(BaseHTTPRequestHandler):
+    """Passes every GET request to the FakeBinanceServer that owns the HTTP server."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+    def do_GET(self):
+        parts = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        status, body, headers = self.server.fake.handle(parts.path, query)
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Load tests send thousands of requests
+
+
+class FakeBinanceServer:
+    """
+    FakeBinanceServer is a local stand-in for the Binance REST API, so BinanceAPI, the
+    indicators and the bot loop can be benchmarked on a machine without network access.
+
+    It answers /api/v3/klines and /api/v3/ticker/price in the Binance format from any
+    MarketDataSource: recorded candles (FileMarketData, ArchiveMarketData) or generated
+    ones (SyntheticMarketData, the default). Adverse conditions are injected on purpose:
+    a fixed latency plus jitter, a share of 500 responses, a share of 429 responses with
+    Retry-After, a smaller page limit than Binance's 1000 and a per-minute request weight
+    limit reported in X-MBX-USED-WEIGHT-1M. With `stream` set, a FakeStreamServer runs
+    beside it and `publish` pushes the current trade and candle of a symbol to it.
+
+    Attributes:
+        source (MarketDataSource): Where the served candles and prices come from.
+        latency (float): Seconds every response is delayed by.
+        jitter (float): Up to this many extra seconds of random delay.
+        error_rate (float): Share of requests answered with HTTP 500.
+        rate_limit_rate (float): Share of requests answered with HTTP 429.
+        retry_after (int): Retry-After seconds sent with the injected 429 responses.
+        page_limit (int): Most candles returned by one /klines request.
+        weight_limit (int): Request weight allowed per minute, or None for no limit.
+        stream (FakeStreamServer): The stream server when started with `stream`, else None.
+        stats (dict): Counts of requests, errors, rate-limited requests and candles served.
+    """
+
+    DEFAULT_PAGE_LIMIT = 500  # /klines limit when none is given, as on Binance
+    MAX_PAGE_LIMIT = 1000
+
+    def __init__(self, source=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=1, page_limit=MAX_PAGE_LIMIT, weight_limit=None, seed=None):
+        self.source = source or SyntheticMarketData()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.page_limit = page_limit
+        self.weight_limit = weight_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = int(time.time() // 60)
+        self.used_weight = 0
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0, "candles": 0}
+        self.server = ThreadingHTTPServer((host, port), FakeBinanceHandler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.host, self.port = self.server.server_address[:2]
+        self.thread = None
+        self.stream = None
+
+    @property
+    def url(self):
+        """API root to use as BinanceAPI.API_BASE_URL or AsyncBinanceAPI's base_url."""
+        return f"http://{self.host}:{self.port}/api/v3"
+
+    def start(self, stream=False):
+        """Starts serving on a background thread, and the stream server too when `stream` is set."""
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-binance", daemon=True)
+        self.thread.start()
+        if stream:
+            self.stream = FakeStreamServer(self.host).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.stream is not None:
+            self.stream.stop()
+
+    def add_weight(self, weight):
+        """Books the weight of a request and returns the weight used in the current minute."""
+        with self.lock:
+            window = int(time.time() // 60)
+            if window != self.window:
+                self.window, self.used_weight = window, 0
+            self.used_weight += weight
+            return self.used_weight
+
+    def handle(self, path, query):
+        """
+        Answers one request.
+
+        Returns:
+            tuple: (status, JSON body, extra headers).
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            roll = self.random.random()
+        if delay > 0:
+            time.sleep(delay)
+
+        if path.endswith("/klines"):
+            weight = BinanceAPI.KLINES_WEIGHT
+        elif path.endswith("/ticker/price"):
+            weight = BinanceAPI.TICKER_WEIGHT if "symbol" in query else BinanceAPI.TICKER_BATCH_WEIGHT
+        else:
+            return 404, {"code": -1000, "msg": f"Unknown endpoint {path}"}, {}
+
+        used = self.add_weight(weight)
+        headers = {"X-MBX-USED-WEIGHT-1M": used}
+        if roll < self.rate_limit_rate or (self.weight_limit is not None and used > self.weight_limit):
+            with self.lock:
+                self.stats["rate_limited"] += 1
+            headers["Retry-After"] = self.retry_after
+            return 429, {"code": -1003, "msg": "Too many requests."}, headers
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self.lock:
+                self.stats["errors"] += 1
+            return 500, {"code": -1000, "msg": "An unknown error occurred while processing the request."}, headers
+
+        try:
+            if path.endswith("/klines"):
+                return 200, self.klines(query), headers
+            return 200, self.ticker(query), headers
+        except (KeyError, ValueError) as e:
+            return 400, {"code": -1100, "msg": f"Illegal parameter: {e}"}, headers
+
+    def klines(self, query):
+        """Returns /klines rows for the query, at most `page_limit` of them."""
+        step = Utils.interval_ms(query["interval"])
+        if step is None:
+            raise ValueError(f"interval {query['interval']}")
+        limit = min(int(query.get("limit", self.DEFAULT_PAGE_LIMIT)), self.MAX_PAGE_LIMIT, self.page_limit)
+        to_ts = int(query.get("endTime", time.time() * 1000))
+        from_ts = int(query["startTime"]) if "startTime" in query else to_ts - limit * step + 1
+
+        klines = self.source.get_kline_array(from_ts, to_ts, query["symbol"], query["interval"])
+        klines = klines[:limit] if "startTime" in query else klines[-limit:]
+        with self.lock:
+            self.stats["candles"] += len(klines)
+        return [
+            [open_time, f"{open_:.8f}", f"{high:.8f}", f"{low:.8f}", f"{close:.8f}", f"{volume:.8f}",
+             close_time, f"{close * volume:.8f}", 0, "0", "0", "0"]
+            for open_time, open_, high, low, close, volume, close_time in klines.tolist()
+        ]
+
+    def ticker(self, query):
+        """Returns the /ticker/price answer for one symbol or a list of symbols."""
+        if "symbols" in query:
+            return [{"symbol": symbol, "price": f"{self.price(symbol):.8f}"} for symbol in json.loads(query["symbols"])]
+        return {"symbol": query["symbol"], "price": f"{self.price(query['symbol']):.8f}"}
+
+    def price(self, symbol):
+        price = self.source.get_ticker_price(symbol)
+        if not isinstance(price, float):
+            raise ValueError(f"symbol {symbol}")
+        return price
+
+    def publish(self, symbol="BTCUSDT", interval="1d"):
+        """Pushes the current price as a trade and the forming candle to the stream clients."""
+        if self.stream is None:
+            return
+        now_ts = int(time.time() * 1000)
+        step = Utils.interval_ms(interval) or 86_400_000
+        self.stream.push_trade(symbol, self.price(symbol), now_ts)
+        klines = self.source.get_kline_array(now_ts // step * step, now_ts, symbol, interval)
+        if len(klines):
+            self.stream.push_kline(symbol, interval, klines.tolist()[-1], closed=False)
+
+
+def benchmark(server, days=365, symbols=("BTCUSDT", "ETHUSDT", "SOLUSDT"), interval="1d"):
+    """
+    Times BinanceAPI, the indicator pipeline and the backtest loop against a running
+    FakeBinanceServer, with an empty temporary candle store so every range is fetched.
+    The backtest reads `interval` candles through that store, like the klines step.
+
+    Returns:
+        dict: Seconds taken by each step and the request counters of server and client.
+    """
+    from backtest import Backtester  # Imported here so the server alone does not need the bot modules
+
+    BinanceAPI.API_BASE_URL = server.url
+    BinanceAPI.candle_store = CandleStore(tempfile.mkstemp(suffix=".db")[1])
+    BinanceAPI.cache.clear()
+    to_date = datetime.now() - timedelta(days=1)
+    from_date = to_date - timedelta(days=days)
+    from_ts, to_ts = int(from_date.timestamp() * 1000), int(to_date.timestamp() * 1000)
+    timings = {}
+
+    started = time.perf_counter()
+    BinanceAPI.get_many_klines(from_ts, to_ts, list(symbols), interval)
+    timings["klines_seconds"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(20):
+        BinanceAPI.request_ticker_prices(list(symbols))
+    timings["ticker_seconds_per_request"] = (time.perf_counter() - started) / 20
+
+    thresholds = {
+        "invest_thres": [10], "rsi_oversold": [30], "rsi_overbought": [70], "macd_fast_ema": [12],
+        "macd_slow_ema": [26], "macd_signal_ema": [9], "supertrend_atr_period": [10], "supertrend_multiplier": [3],
+    }
+    started = time.perf_counter()
+    result = Backtester(thresholds, from_date, to_date, 10000, source=BinanceMarketData(), interval=interval, symbol=symbols[0]).run()
+    timings["backtest_seconds"] = time.perf_counter() - started
+    timings["backtest_trades"] = result["stats"]["trades"]
+
+    timings.update({f"server_{name}": count for name, count in server.stats.items()})
+    timings["client_requests"] = BinanceAPI.session.request_count
+    timings["client_retries"] = BinanceAPI.session.retry_count
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Binance API stand-in for load tests")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data", help="CSV or Parquet candles to serve instead of generated ones")
+    parser.add_argument("--symbol", default="BTCUSDT", help="Symbol of the --data candles")
+    parser.add_argument("--interval", default="1d", help="Interval of the --data candles")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--page-limit", type=int, default=FakeBinanceServer.MAX_PAGE_LIMIT)
+    parser.add_argument("--weight-limit", type=int)
+    parser.add_argument("--stream", action="store_true", help="Also run a stream server fed once a second")
+    parser.add_argument("--benchmark", action="store_true", help="Run the benchmark against the server and exit")
+    args = parser.parse_args()
+
+    source = FileMarketData(args.data, args.symbol, args.interval) if args.data else None
+    server = FakeBinanceServer(
+        source, port=0 if args.benchmark else args.port, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, page_limit=args.page_limit,
+        weight_limit=args.weight_limit,
+    ).start(stream=args.stream)
+
+    if args.benchmark:
+        for name, value in benchmark(server).items():
+            print(f"{name}: {value:.4f}" if isinstance(value, float) else f"{name}: {value}")
+        server.stop()
+    else:
+        print(f"Serving {server.url}" + (f" and {server.stream.url}" if server.stream else ""))
+        try:
+            while True:
+                time.sleep(1)
+                server.publish(args.symbol, args.interval)
+        except KeyboardInterrupt:
+            server.stop()
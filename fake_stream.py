@@ -0,0 +1,137 @@
+import json
+import socket
+import threading
+import time
+from stream import WebSocket
+
+
+class FakeStreamServer:
+    """
+    FakeStreamServer is a local ws:// stand-in for the Binance market streams, so
+    BinanceStream can be exercised without a network connection.
+
+    Messages are pushed by the test in the combined-stream format
+    {"stream": ..., "data": ...}; clients can be dropped to exercise reconnects.
+
+    Attributes:
+        host (str): Interface the server listens on.
+        port (int): Port the server listens on (picked by the OS when 0 is given).
+        clients (list): WebSocket connections currently open.
+        connections (int): Handshakes accepted since the server started.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.server = socket.create_server((host, port))
+        self.host, self.port = self.server.getsockname()[:2]
+        self.clients = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+
+    @property
+    def url(self):
+        """Base stream URL to pass to BinanceStream."""
+        return f"ws://{self.host}:{self.port}/stream"
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.accept_loop, name="fake-stream", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.drop_clients()
+        self.server.close()
+
+    def accept_loop(self):
+        while self.running:
+            try:
+                sock, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.serve_client, args=(sock,), daemon=True).start()
+
+    def serve_client(self, sock):
+        """Completes the upgrade handshake, then reads (and drops) client frames until the client leaves."""
+        ws = WebSocket(sock, mask=False)
+        try:
+            ws.reader.readline()
+            headers = WebSocket.read_headers(ws.reader)
+            sock.sendall((
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {WebSocket.accept_key(headers['sec-websocket-key'])}\r\n\r\n"
+            ).encode())
+        except (OSError, KeyError):
+            ws.close()
+            return
+
+        with self.lock:
+            self.clients.append(ws)
+            self.connections += 1
+        try:
+            while ws.recv() is not None:
+                pass
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            with self.lock:
+                if ws in self.clients:
+                    self.clients.remove(ws)
+            ws.close()
+
+    def wait_for_clients(self, count=1, timeout=5):
+        """Waits until `count` handshakes have been accepted in total; returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if self.connections >= count and self.clients:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def push(self, stream, data):
+        """Sends one combined-stream message to every connected client."""
+        message = json.dumps({"stream": stream, "data": data})
+        with self.lock:
+            clients = list(self.clients)
+        for ws in clients:
+            try:
+                ws.send(WebSocket.OP_TEXT, message)
+            except OSError:
+                pass
+
+    def push_trade(self, symbol, price, trade_time=None):
+        """Sends a trade event like the <symbol>@trade stream."""
+        trade_time = trade_time or int(time.time() * 1000)
+        self.push(f"{symbol.lower()}@trade", {
+            "e": "trade", "E": trade_time, "s": symbol, "p": str(price), "q": "0.001", "T": trade_time
+        })
+
+    def push_kline(self, symbol, interval, candle, closed=False):
+        """Sends a candle (open_time, open, high, low, close, volume, close_time) like the <symbol>@kline_<interval> stream."""
+        open_time, open_, high, low, close, volume, close_time = candle
+        self.push(f"{symbol.lower()}@kline_{interval}", {
+            "e": "kline", "E": int(time.time() * 1000), "s": symbol,
+            "k": {
+                "t": open_time, "T": close_time, "s": symbol, "i": interval,
+                "o": str(open_), "h": str(high), "l": str(low), "c": str(close), "v": str(volume), "x": closed
+            }
+        })
+
+    def ping(self, payload=b"ping"):
+        """Sends a ping to every client; BinanceStream has to answer it to stay connected."""
+        with self.lock:
+            clients = list(self.clients)
+        for ws in clients:
+            ws.send(WebSocket.OP_PING, payload)
+
+    def drop_clients(self):
+        """Closes every client connection without a close frame, like a network drop."""
+        with self.lock:
+            clients, self.clients = self.clients, []
+        for ws in clients:
+            ws.close()
@@ -0,0 +1,446 @@
+import math
+import numpy as np
+
+
+class IndicatorEngine:
+    """
+    IndicatorEngine computes RSI, MACD and Supertrend over whole NumPy price arrays.
+
+    Every function reproduces the arithmetic of the matching BotIndicators method
+    (seeding, warm-up offsets and flag rules included), so the same window gives the
+    same values, but runs as array operations instead of per-candle Python loops.
+    Positions that a BotIndicators list would hold as None are NaN here.
+
+    Prices run along the last axis, so a 2-D array evaluates a batch of equally long
+    windows (one per row) in the same call. `compute_levels` evaluates several threshold
+    sets (e.g. all risk levels) on the same window, computing each shared intermediate once.
+    """
+
+    RSI_PERIOD = 14  # Period used by BotIndicators.calculate_rsi and calculate_historical_rsi
+
+    @staticmethod
+    def smooth(values, alpha, seed):
+        """
+        Runs the recursion y[i] = y[i-1] + alpha * (values[i] - y[i-1]) starting from `seed`.
+
+        This is the update behind both the EMA (alpha = 2 / (n + 1)) and Wilder's
+        average (alpha = 1 / n). It is evaluated in fixed-size blocks with a closed form,
+        so each block is a handful of array operations and the powers of (1 - alpha)
+        stay well inside floating point range.
+
+        Args:
+            values (np.ndarray): Inputs to smooth.
+            alpha (float): Smoothing factor between 0 and 1.
+            seed (float): Value of the average before the first input (one per row for 2-D values).
+
+        Returns:
+            np.ndarray: The smoothed value after each input.
+        """
+        values = np.asarray(values, dtype=float)
+        decay = 1.0 - alpha
+        if decay <= 0.0:
+            return values.copy()
+
+        block = 64 if decay >= 0.01 else 8
+        offsets = np.arange(block)
+        growth = decay ** -offsets.astype(float)  # (1 - alpha)^-j
+        shrink = decay ** offsets.astype(float)   # (1 - alpha)^j
+
+        result = np.empty_like(values)
+        previous = np.asarray(seed, dtype=float)[..., None]
+        for start in range(0, values.shape[-1], block):
+            chunk = values[..., start:start + block]
+            size = chunk.shape[-1]
+            weighted = np.cumsum(chunk * growth[:size], axis=-1)
+            result[..., start:start + size] = shrink[:size] * (decay * previous + alpha * weighted)
+            previous = result[..., start + size - 1:start + size]
+        return result
+
+    @staticmethod
+    def convergence_steps(alpha, tolerance):
+        """
+        Number of updates after which the seed of a `smooth` recursion weighs less than
+        `tolerance` in the result, i.e. the smallest n with (1 - alpha)^n <= tolerance.
+        """
+        decay = 1.0 - alpha
+        if decay <= 0.0:
+            return 0
+        return math.ceil(math.log(tolerance) / math.log(decay))
+
+    @staticmethod
+    def warmup_bars(thresholds, tolerance, rsi_period=RSI_PERIOD):
+        """
+        Shortest windows whose MACD and Supertrend values no longer depend on where the
+        window starts by more than `tolerance` (relative weight of the seed averages).
+
+        MACD needs its slow EMA seeded and then both the slow and the signal EMA run
+        until their seeds have decayed; Supertrend needs its ATR seeded and decayed.
+        RSI is evaluated on a fixed window of `rsi_period + 1` closes, so it is reported as is.
+
+        Args:
+            thresholds (dict): Risk thresholds as returned by BotIndicators.get_risk_thresholds.
+            tolerance (float): Largest acceptable seed weight, e.g. 0.01.
+            rsi_period (int): RSI period.
+
+        Returns:
+            dict: Bars needed by `rsi`, `macd` and `supertrend`, and the `total` to fetch.
+        """
+        slow_period = int(thresholds["macd_slow_ema"])
+        signal_period = int(thresholds["macd_signal_ema"])
+        atr_period = int(thresholds["supertrend_atr_period"])
+        macd_steps = max(
+            IndicatorEngine.convergence_steps(2 / (slow_period + 1), tolerance),
+            IndicatorEngine.convergence_steps(2 / (signal_period + 1), tolerance),
+        )
+        bars = {
+            "rsi": rsi_period + 1,
+            "macd": max(slow_period + macd_steps + 1, slow_period + signal_period),  # +1 for the crossover
+            "supertrend": atr_period + IndicatorEngine.convergence_steps(1 / atr_period, tolerance) + 1,
+        }
+        bars["total"] = max(bars.values())
+        return bars
+
+    @staticmethod
+    def cached(cache, key, calculate):
+        """
+        Returns `cache[key]`, calculating and storing it first if needed. With no cache
+        the value is just calculated. Cached arrays are shared, so they must not be modified.
+        """
+        if cache is None:
+            return calculate()
+        if key not in cache:
+            cache[key] = calculate()
+        return cache[key]
+
+    @staticmethod
+    def gains_losses(closes):
+        """Splits consecutive close changes into gains and (positive) losses."""
+        changes = np.diff(np.asarray(closes, dtype=float), axis=-1)
+        gains = np.where(changes > 0, changes, 0.0)
+        losses = np.where(changes > 0, 0.0, -changes)
+        return gains, losses
+
+    @staticmethod
+    def rsi_last(closes, period=RSI_PERIOD):
+        """
+        RSI of the latest close, as calculated by BotIndicators.calculate_rsi.
+
+        The averages are seeded from the first `period` changes of the window and
+        smoothed once more with the latest change.
+
+        Args:
+            closes (np.ndarray): Closing prices of the RSI window (at least period + 1).
+            period (int): RSI period.
+
+        Returns:
+            float: The RSI value (an array of them for 2-D closes).
+        """
+        gains, losses = IndicatorEngine.gains_losses(closes)
+        avg_gain = ((gains[..., :period].sum(axis=-1) / period) * (period - 1) + gains[..., -1]) / period
+        avg_loss = ((losses[..., :period].sum(axis=-1) / period) * (period - 1) + losses[..., -1]) / period
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = np.where(avg_loss != 0, avg_gain / avg_loss, 100)  # Prevent division by zero
+        rsi = 100 - (100 / (1 + rs))
+        return rsi.item() if rsi.ndim == 0 else rsi
+
+    @staticmethod
+    def wilder_averages(closes, period=RSI_PERIOD):
+        """
+        Wilder-smoothed average gain and loss behind `rsi_series`.
+
+        Args:
+            closes (np.ndarray): Closing prices.
+            period (int): RSI period.
+
+        Returns:
+            tuple: (avg_gain, avg_loss) arrays, one value per close from index `period` on.
+        """
+        gains, losses = IndicatorEngine.gains_losses(closes)
+        alpha = 1 / period
+        avg_gain = IndicatorEngine.smooth(gains[..., period - 1:], alpha, gains[..., :period].sum(axis=-1) / period)
+        avg_loss = IndicatorEngine.smooth(losses[..., period - 1:], alpha, losses[..., :period].sum(axis=-1) / period)
+        return avg_gain, avg_loss
+
+    @staticmethod
+    def rsi_series(closes, period=RSI_PERIOD):
+        """
+        Wilder RSI for every close from index `period` on, as calculated by
+        BotIndicators.calculate_historical_rsi.
+
+        Args:
+            closes (np.ndarray): Closing prices.
+            period (int): RSI period.
+
+        Returns:
+            np.ndarray: RSI values, one per close after the warm-up.
+        """
+        avg_gain, avg_loss = IndicatorEngine.wilder_averages(closes, period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        return np.where(avg_loss == 0, 100.0, rsi)
+
+    @staticmethod
+    def rsi_flag(rsi, thresholds):
+        """Returns 1 (buy) below the oversold level, -1 (sell) above the overbought level, else 0."""
+        if rsi > thresholds["rsi_overbought"]:
+            return -1
+        if rsi < thresholds["rsi_oversold"]:
+            return 1
+        return 0
+
+    @staticmethod
+    def rsi_flags(rsi, thresholds):
+        """Array version of `rsi_flag`."""
+        return np.where(rsi > thresholds["rsi_overbought"], -1, np.where(rsi < thresholds["rsi_oversold"], 1, 0))
+
+    @staticmethod
+    def ema(closes, period, start, cache=None):
+        """
+        EMA of `closes[start:]`, seeded with the simple average of the first `period` closes.
+        """
+        return IndicatorEngine.cached(cache, ("ema", period, start), lambda: IndicatorEngine.smooth(
+            closes[..., start:], 2 / (period + 1), closes[..., :period].sum(axis=-1) / period
+        ))
+
+    @staticmethod
+    def macd(closes, fast_period, slow_period, signal_period, cache=None):
+        """
+        MACD and signal lines as calculated by BotIndicators.calculate_macd.
+
+        Both EMAs are seeded with simple averages and advanced from index `slow_period`,
+        and the signal EMA is seeded with the average of the first `signal_period` MACD values.
+
+        Args:
+            closes (np.ndarray): Closing prices.
+            fast_period (int): Fast EMA period.
+            slow_period (int): Slow EMA period.
+            signal_period (int): Signal EMA period.
+            cache (dict): Intermediates shared with other calls on the same closes, see `compute_levels`.
+
+        Returns:
+            dict: `ema_fast`, `ema_slow`, `macd_line` and `signal_line` aligned with `closes`
+                  (NaN during warm-up), `signal_seed`, and `macd_flags`, the crossover flag
+                  at every close.
+        """
+        closes = np.asarray(closes, dtype=float)
+        fast_period, slow_period, signal_period = int(fast_period), int(slow_period), int(signal_period)
+        key = ("macd", fast_period, slow_period, signal_period)
+        if cache is not None and key in cache:
+            return cache[key]
+
+        ema_fast = IndicatorEngine.ema(closes, fast_period, slow_period, cache)
+        ema_slow = IndicatorEngine.ema(closes, slow_period, slow_period, cache)
+        valid_macd = ema_fast - ema_slow
+
+        signal_seed = valid_macd[..., :signal_period].sum(axis=-1) / signal_period
+        valid_signal = IndicatorEngine.smooth(valid_macd, 2 / (signal_period + 1), signal_seed)
+
+        ema_fast_line, ema_slow_line, macd_line, signal_line = (np.full(closes.shape, np.nan) for _ in range(4))
+        ema_fast_line[..., slow_period:] = ema_fast
+        ema_slow_line[..., slow_period:] = ema_slow
+        macd_line[..., slow_period:] = valid_macd
+        signal_line[..., slow_period:] = valid_signal
+
+        # Crossover of the MACD line through the signal line between consecutive closes
+        macd_flags = np.zeros(closes.shape, dtype=int)
+        above, below = macd_line[..., 1:] > signal_line[..., 1:], macd_line[..., 1:] < signal_line[..., 1:]
+        was_at_or_below = macd_line[..., :-1] <= signal_line[..., :-1]
+        was_at_or_above = macd_line[..., :-1] >= signal_line[..., :-1]
+        macd_flags[..., 1:][above & was_at_or_below] = 1
+        macd_flags[..., 1:][below & was_at_or_above] = -1
+
+        result = {
+            "ema_fast": ema_fast_line,
+            "ema_slow": ema_slow_line,
+            "macd_line": macd_line,
+            "signal_line": signal_line,
+            "signal_seed": signal_seed,
+            "macd_flags": macd_flags,
+        }
+        if cache is not None:
+            cache[key] = result
+        return result
+
+    @staticmethod
+    def true_range(closes, highs, lows):
+        """True range of every candle; the first candle uses its high-low range only."""
+        closes, highs, lows = (np.asarray(a, dtype=float) for a in (closes, highs, lows))
+        tr = highs - lows
+        tr[..., 1:] = np.maximum.reduce([
+            tr[..., 1:], np.abs(highs[..., 1:] - closes[..., :-1]), np.abs(lows[..., 1:] - closes[..., :-1])
+        ])
+        return tr
+
+    @staticmethod
+    def supertrend(closes, highs, lows, atr_period, multiplier=1, tr=None, cache=None):
+        """
+        Supertrend line as calculated by BotIndicators.calculate_supertrend.
+
+        The line starts on the lower band at index `atr_period` and then sits on the
+        lower band while the close stays above the previous line, on the upper band otherwise.
+
+        Args:
+            closes (np.ndarray): Closing prices.
+            highs (np.ndarray): High prices.
+            lows (np.ndarray): Low prices.
+            atr_period (int): ATR period.
+            multiplier (float): Band width in ATRs. BotIndicators always draws its bands
+                                at 1 ATR, so that is the default.
+            tr (np.ndarray): Precomputed true range, calculated here if omitted.
+            cache (dict): Intermediates shared with other calls on the same prices, see `compute_levels`.
+
+        Returns:
+            dict: `atr`, `upper`, `lower` and `supertrend` arrays aligned with `closes`
+                  (NaN during warm-up), and `st_flags`, the Buy (1) / Sell (-1) / Hold (0)
+                  signal at every close.
+        """
+        closes, highs, lows = (np.asarray(a, dtype=float) for a in (closes, highs, lows))
+        atr_period = int(atr_period)
+        key = ("supertrend", atr_period, multiplier)
+        if cache is not None and key in cache:
+            return cache[key]
+        size = closes.shape[-1]
+        if tr is None:
+            tr = IndicatorEngine.cached(cache, ("tr",), lambda: IndicatorEngine.true_range(closes, highs, lows))
+
+        def average_true_range():
+            atr = np.full(closes.shape, np.nan)
+            atr[..., atr_period - 1] = tr[..., :atr_period].sum(axis=-1) / atr_period  # First ATR is SMA
+            atr[..., atr_period:] = IndicatorEngine.smooth(tr[..., atr_period:], 1 / atr_period, atr[..., atr_period - 1])
+            return atr
+        atr = IndicatorEngine.cached(cache, ("atr", atr_period), average_true_range)
+
+        mid = IndicatorEngine.cached(cache, ("mid",), lambda: (highs + lows) / 2)
+        upper = np.full(closes.shape, np.nan)
+        lower = np.full(closes.shape, np.nan)
+        upper[..., atr_period:] = mid[..., atr_period:] + multiplier * atr[..., atr_period:]
+        lower[..., atr_period:] = mid[..., atr_period:] - multiplier * atr[..., atr_period:]
+
+        # A close above the previous upper band always switches to the lower band and a close
+        # at or below the previous lower band always switches to the upper band; in between
+        # the line stays on the band it was already on.
+        on_lower = np.full(closes.shape, -1)
+        on_lower[..., atr_period] = 1
+        above_upper = closes[..., atr_period + 1:] > upper[..., atr_period:-1]
+        below_lower = closes[..., atr_period + 1:] <= lower[..., atr_period:-1]
+        on_lower[..., atr_period + 1:] = np.where(above_upper, 1, np.where(below_lower, 0, -1))
+        decided = np.maximum.accumulate(np.where(on_lower >= 0, np.arange(size), 0), axis=-1)
+        on_lower = np.take_along_axis(on_lower, decided, axis=-1) == 1
+
+        supertrend = np.where(on_lower, lower, upper)
+        supertrend[..., :atr_period] = np.nan
+
+        st_flags = np.zeros(closes.shape, dtype=int)
+        st_flags[..., atr_period + 1:] = np.sign(closes[..., atr_period + 1:] - supertrend[..., atr_period + 1:])
+
+        result = {
+            "atr": atr,
+            "upper": upper,
+            "lower": lower,
+            "supertrend": supertrend,
+            "st_flags": st_flags,
+        }
+        if cache is not None:
+            cache[key] = result
+        return result
+
+    @staticmethod
+    def compute(closes, highs, lows, thresholds, rsi_period=RSI_PERIOD, cache=None):
+        """
+        Computes every indicator for a price window in one call.
+
+        Args:
+            closes (np.ndarray): Closing prices, oldest first.
+            highs (np.ndarray): High prices.
+            lows (np.ndarray): Low prices.
+            thresholds (dict): Risk thresholds as returned by BotIndicators.get_risk_thresholds.
+            rsi_period (int): RSI period.
+            cache (dict): Intermediates shared with other calls on the same prices, see `compute_levels`.
+
+        Returns:
+            dict: The RSI of the last `rsi_period + 1` closes and the historical RSI series,
+                  the MACD and Supertrend series from `macd` and `supertrend`, and the
+                  `rsi_flag`, `macd_flag` and `st_flag` of the latest close. For 2-D input
+                  the latest-close values are arrays with one entry per window.
+        """
+        closes = np.asarray(closes, dtype=float)
+        result = {}
+        result["rsi"], result["rsi_values"] = IndicatorEngine.cached(cache, ("rsi", rsi_period), lambda: (
+            IndicatorEngine.rsi_last(closes[..., -(rsi_period + 1):], rsi_period),
+            IndicatorEngine.rsi_series(closes, rsi_period),
+        ))
+        result["rsi_flag"] = IndicatorEngine.rsi_flags(result["rsi"], thresholds)
+
+        result.update(IndicatorEngine.macd(
+            closes, thresholds["macd_fast_ema"], thresholds["macd_slow_ema"], thresholds["macd_signal_ema"], cache
+        ))
+        result["macd"] = result["macd_line"][..., -1]
+        result["macd_flag"] = result["macd_flags"][..., -1]
+
+        result.update(IndicatorEngine.supertrend(closes, highs, lows, thresholds["supertrend_atr_period"], cache=cache))
+        result["supertrend_value"] = result["supertrend"][..., -1]
+        result["st_flag"] = result["st_flags"][..., -1]
+
+        if closes.ndim == 1:
+            for key in ("rsi_flag", "macd", "macd_flag", "supertrend_value", "st_flag"):
+                result[key] = result[key].item()  # Plain Python numbers for a single window
+        return result
+
+    @staticmethod
+    def compute_levels(closes, highs, lows, levels, rsi_period=RSI_PERIOD):
+        """
+        Runs `compute` for several threshold sets (e.g. every risk level) on one price window.
+
+        The sets share one cache, so the RSI series, true range, midpoints, each EMA of a
+        given period and seed, each ATR period and any MACD or Supertrend whose periods
+        match another set's are calculated once; only the flags are derived per set.
+        Arrays shared between sets are the same objects and must not be modified.
+
+        Args:
+            closes (np.ndarray): Closing prices, oldest first (2-D for a batch of windows).
+            highs (np.ndarray): High prices.
+            lows (np.ndarray): Low prices.
+            levels (dict or list): Threshold dicts as returned by BotIndicators.get_risk_thresholds,
+                                   keyed by risk level or in a list.
+            rsi_period (int): RSI period.
+
+        Returns:
+            dict or list: One `compute` result per threshold set, keyed or ordered like `levels`.
+        """
+        closes, highs, lows = (np.asarray(a, dtype=float) for a in (closes, highs, lows))
+        cache = {}
+        if isinstance(levels, dict):
+            return {level: IndicatorEngine.compute(closes, highs, lows, thresholds, rsi_period, cache)
+                    for level, thresholds in levels.items()}
+        return [IndicatorEngine.compute(closes, highs, lows, thresholds, rsi_period, cache) for thresholds in levels]
+
+    @staticmethod
+    def compute_klines(klines, thresholds, rsi_period=RSI_PERIOD):
+        """Runs `compute` on a KLINE_DTYPE array (e.g. a KlineArchive slice) without copying its columns into lists."""
+        return IndicatorEngine.compute(klines["close"], klines["high"], klines["low"], thresholds, rsi_period)
+
+    @staticmethod
+    def window_batches(starts, ends):
+        """
+        Groups windows [start, end) of a price array by length so each group can be
+        evaluated as one 2-D batch.
+
+        Args:
+            starts (np.ndarray): Index of the first candle of each window.
+            ends (np.ndarray): Index one past the last candle of each window.
+
+        Returns:
+            list: (rows, indices) pairs, where `rows` are the window numbers in the group and
+                  `indices` is a (len(rows), length) matrix of candle positions.
+        """
+        lengths = ends - starts
+        return [
+            (rows, starts[rows, None] + np.arange(length))
+            for length in np.unique(lengths)
+            for rows in [np.flatnonzero(lengths == length)]
+        ]
+
+    @staticmethod
+    def to_list(values):
+        """Converts a NaN-padded array back into the None-padded list BotIndicators exposes."""
+        return [None if math.isnan(value) else value for value in values.tolist()]
@@ -0,0 +1,218 @@
+import os
+import threading
+from datetime import datetime, timezone
+import numpy as np
+from known_gaps import KnownGaps
+
+# Root folder of the binary kline archive
+KLINE_ARCHIVE_PATH = "assets/archive"
+
+# One candle: the same columns and order as the candle tuples used everywhere else
+KLINE_DTYPE = np.dtype([
+    ("open_time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("close_time", "<i8"),
+])
+
+
+class KlineArchive:
+    """
+    KlineArchive keeps long kline histories (e.g. years of 1-minute candles) on disk as
+    raw KLINE_DTYPE records, one file per symbol, interval and UTC month.
+
+    Files have no header, so appending is a plain write at the end and reading is an
+    np.memmap of the whole file: a time range inside one month is returned as a view of
+    the mapped file without copying, and only ranges spanning several months are joined
+    into a new array. A month of 1-minute candles takes about 2.5 MB.
+
+    Writers (e.g. a downloading ArchiveMarketData and the CandleIntegrity repair thread)
+    may share an archive: each month file is read, merged and written under its own lock,
+    shared by every KlineArchive of the process, so concurrent appends cannot interleave.
+
+    Attributes:
+        root (str): Folder holding <symbol>/<interval>/<YYYY-MM>.klines files.
+        known_gaps (KnownGaps): Spans Binance has no candles for, so they are not requested again.
+    """
+
+    month_locks = {}  # Absolute month file path -> lock held while the file is read, merged and written
+    month_locks_lock = threading.Lock()
+
+    def __init__(self, root=KLINE_ARCHIVE_PATH):
+        self.root = root
+        self.lock = threading.Lock()
+        self.maps = {}  # (path, size) -> memmap, so repeated reads reuse the mapping
+        self.known_gaps = KnownGaps()
+
+    @staticmethod
+    def month_key(open_time):
+        """Returns (year, month) of a millisecond timestamp in UTC."""
+        moment = datetime.fromtimestamp(open_time / 1000, tz=timezone.utc)
+        return moment.year, moment.month
+
+    @staticmethod
+    def month_start(year, month):
+        """Returns the first millisecond of a UTC month."""
+        return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+    @staticmethod
+    def to_array(candles):
+        """Turns candle tuples (or an array with the same fields) into a KLINE_DTYPE array."""
+        if isinstance(candles, np.ndarray) and candles.dtype == KLINE_DTYPE:
+            return candles
+        return np.array([tuple(candle[:7]) for candle in candles], dtype=KLINE_DTYPE)
+
+    @staticmethod
+    def month_lock(path):
+        """Returns the write lock of a month file, creating it on first use."""
+        key = os.path.abspath(path)
+        with KlineArchive.month_locks_lock:
+            return KlineArchive.month_locks.setdefault(key, threading.Lock())
+
+    def month_path(self, symbol, interval, year, month):
+        return os.path.join(self.root, symbol, interval, f"{year:04d}-{month:02d}.klines")
+
+    def months(self, symbol, interval):
+        """Returns the (year, month) pairs stored for a symbol and interval, oldest first."""
+        folder = os.path.join(self.root, symbol, interval)
+        if not os.path.isdir(folder):
+            return []
+        names = sorted(name for name in os.listdir(folder) if name.endswith(".klines"))
+        return [(int(name[:4]), int(name[5:7])) for name in names]
+
+    def read_month(self, symbol, interval, year, month):
+        """
+        Maps one month file read-only.
+
+        Returns:
+            numpy.ndarray: KLINE_DTYPE records ordered by open time (empty if the month is not stored).
+        """
+        path = self.month_path(symbol, interval, year, month)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        count = size // KLINE_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        with self.lock:
+            mapped = self.maps.get((path, size))
+            if mapped is None:
+                mapped = np.memmap(path, dtype=KLINE_DTYPE, mode="r", shape=(count,))
+                self.maps = {key: value for key, value in self.maps.items() if key[0] != path}
+                self.maps[(path, size)] = mapped
+        return mapped
+
+    def append(self, symbol, interval, candles):
+        """
+        Adds candles to the archive.
+
+        Candles newer than the last stored one of their month are appended to the file;
+        a month that receives older candles (filling a gap) is merged and rewritten.
+
+        Args:
+            symbol (str): Trading pair symbol.
+            interval (str): Kline interval.
+            candles (list or numpy.ndarray): Candle tuples or KLINE_DTYPE records.
+
+        Returns:
+            int: The number of candles that were not stored before.
+        """
+        records = KlineArchive.to_array(candles)
+        if len(records) == 0:
+            return 0
+        records = records[np.argsort(records["open_time"], kind="stable")]
+
+        added = 0
+        open_times = records["open_time"]
+        year, month = KlineArchive.month_key(int(open_times[0]))
+        while KlineArchive.month_start(year, month) <= open_times[-1]:
+            next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+            lo = np.searchsorted(open_times, KlineArchive.month_start(year, month), "left")
+            hi = np.searchsorted(open_times, KlineArchive.month_start(next_year, next_month), "left")
+            if hi > lo:
+                added += self.append_month(symbol, interval, year, month, records[lo:hi])
+            year, month = next_year, next_month
+        return added
+
+    def append_month(self, symbol, interval, year, month, records):
+        """Stores the records of one month, appending when possible and rewriting the file otherwise."""
+        path = self.month_path(symbol, interval, year, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with KlineArchive.month_lock(path):
+            return self.merge_month(path, symbol, interval, year, month, records)
+
+    def merge_month(self, path, symbol, interval, year, month, records):
+        """Does the read-merge-write of `append_month`; the caller holds the month's lock."""
+        stored = self.read_month(symbol, interval, year, month)
+        _, unique = np.unique(records["open_time"][::-1], return_index=True)
+        records = records[::-1][unique]  # Last copy of each open time, ordered
+
+        if len(stored) == 0 or records["open_time"][0] > stored["open_time"][-1]:
+            with open(path, "ab") as f:
+                f.write(records.tobytes())
+            return len(records)
+
+        new = ~np.isin(records["open_time"], stored["open_time"])
+        merged = np.concatenate([stored[~np.isin(stored["open_time"], records["open_time"])], records])
+        merged = merged[np.argsort(merged["open_time"], kind="stable")]
+        temp = path + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(merged.tobytes())
+        with self.lock:
+            self.maps = {key: value for key, value in self.maps.items() if key[0] != path}
+        del stored
+        os.replace(temp, path)
+        return int(new.sum())
+
+    def get_klines(self, symbol, interval, from_ts, to_ts):
+        """
+        Returns the candles whose open time falls inside [from_ts, to_ts].
+
+        Returns:
+            numpy.ndarray: KLINE_DTYPE records ordered by open time; a read-only view of the
+                           mapped file when the range lies inside one month.
+        """
+        parts = []
+        for year, month in self.months(symbol, interval):
+            next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+            if KlineArchive.month_start(next_year, next_month) <= from_ts or KlineArchive.month_start(year, month) > to_ts:
+                continue
+            records = self.read_month(symbol, interval, year, month)
+            open_times = records["open_time"]
+            parts.append(records[np.searchsorted(open_times, from_ts, "left"):np.searchsorted(open_times, to_ts, "right")])
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+    @staticmethod
+    def missing_spans(open_times, from_ts, to_ts, step):
+        """
+        Works out which parts of a range have no candle, like CandleStore.missing_spans but
+        vectorized for long minute histories.
+
+        Returns:
+            list: (start_ts, end_ts) pairs of contiguous missing candles, in order.
+        """
+        first = -(-from_ts // step) * step
+        if first > to_ts:
+            return []
+        open_times = np.asarray(open_times, dtype=np.int64)
+        open_times = open_times[(open_times >= first) & (open_times <= to_ts)]
+        if len(open_times) == 0:
+            return [(first, to_ts)]
+
+        spans = []
+        if open_times[0] > first:
+            spans.append((first, int(open_times[0]) - step))
+        gaps = np.nonzero(np.diff(open_times) > step)[0]
+        spans.extend((int(open_times[i]) + step, int(open_times[i + 1]) - step) for i in gaps)
+        if open_times[-1] + step <= to_ts:
+            spans.append((int(open_times[-1]) + step, to_ts))
+        return spans
@@ -0,0 +1,152 @@
+import argparse
+import os
+import re
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from candle_store import CandleStore
+from kline_archive import KLINE_DTYPE, KlineArchive
+from market_data import FileMarketData
+from utils import Utils
+
+
+class KlineImporter:
+    """
+    KlineImporter seeds the local candle storage from Binance public-data kline dumps
+    (data.binance.vision), so years of history come from disk instead of thousands of
+    rate-limited /klines requests.
+
+    Dumps are the monthly or daily files named like BTCUSDT-1m-2024-01.zip or
+    BTCUSDT-1m-2024-01-15.csv, either zipped or extracted. Files are grouped by symbol,
+    interval and month; the groups are parsed and written in parallel, each into its own
+    KlineArchive month file. Every candle is validated (aligned open time, matching close
+    time, positive prices, high and low enclosing open and close) and duplicates are
+    dropped, both inside the dump and against what the archive already holds.
+
+    Attributes:
+        archive (KlineArchive): Where the candles are written.
+        store (CandleStore): Also receives the candles when given (e.g. daily candles for BinanceAPI).
+        workers (int): Groups processed at the same time.
+    """
+
+    FILE_PATTERN = re.compile(r"^(?P<symbol>[A-Z0-9]+)-(?P<interval>\w+)-(?P<year>\d{4})-(?P<month>\d{2})(?:-\d{2})?\.(?:zip|csv)$")
+
+    def __init__(self, archive=None, store=None, workers=os.cpu_count() or 4):
+        self.archive = archive or KlineArchive()
+        self.store = store
+        self.workers = workers
+
+    @staticmethod
+    def find_dumps(folder):
+        """
+        Lists the dump files under a folder.
+
+        Returns:
+            dict: File paths in name order, keyed by (symbol, interval, year, month).
+        """
+        groups = defaultdict(list)
+        for root, _, names in os.walk(folder):
+            for name in sorted(names):
+                match = KlineImporter.FILE_PATTERN.match(name)
+                if match:
+                    key = (match["symbol"], match["interval"], int(match["year"]), int(match["month"]))
+                    groups[key].append(os.path.join(root, name))
+        return dict(sorted(groups.items()))
+
+    @staticmethod
+    def read_dump(path):
+        """Reads a .csv dump or every .csv member of a .zip dump into one KLINE_DTYPE array."""
+        if not path.endswith(".zip"):
+            return FileMarketData.read(path)
+        with zipfile.ZipFile(path) as dump:
+            parts = []
+            for member in dump.namelist():
+                if member.endswith(".csv"):
+                    with dump.open(member) as f:
+                        parts.append(FileMarketData.read_csv(f))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=KLINE_DTYPE)
+
+    @staticmethod
+    def validate(klines, step):
+        """
+        Splits candles into valid ones and a count of rejected ones.
+
+        Args:
+            klines (numpy.ndarray): KLINE_DTYPE records.
+            step (int): Candle length in milliseconds, or None for calendar intervals.
+
+        Returns:
+            tuple: (valid KLINE_DTYPE records ordered by open time without duplicates, rejected count).
+        """
+        prices = np.stack([klines[field] for field in ("open", "high", "low", "close")])
+        valid = np.isfinite(prices).all(axis=0) & (prices > 0).all(axis=0)
+        valid &= (klines["high"] >= np.maximum(klines["open"], klines["close"]))
+        valid &= (klines["low"] <= np.minimum(klines["open"], klines["close"]))
+        valid &= np.isfinite(klines["volume"]) & (klines["volume"] >= 0)
+        valid &= klines["close_time"] > klines["open_time"]
+        if step is not None:
+            valid &= (klines["open_time"] % step == 0) & (klines["close_time"] == klines["open_time"] + step - 1)
+
+        klines = klines[valid]
+        _, unique = np.unique(klines["open_time"], return_index=True)
+        return klines[unique], int((~valid).sum())
+
+    def import_group(self, symbol, interval, paths):
+        """
+        Imports the dump files of one symbol, interval and month.
+
+        Returns:
+            dict: Counts of candles `read`, `rejected`, `duplicates` and newly `added`.
+        """
+        klines = np.concatenate([KlineImporter.read_dump(path) for path in paths])
+        valid, rejected = KlineImporter.validate(klines, Utils.interval_ms(interval))
+        added = self.archive.append(symbol, interval, valid)
+        if self.store is not None:
+            self.store.save_candles(symbol, interval, valid.tolist())
+        return {"read": len(klines), "rejected": rejected, "duplicates": len(klines) - rejected - len(valid), "added": added}
+
+    def import_folder(self, folder):
+        """
+        Imports every dump under a folder.
+
+        Args:
+            folder (str): Folder holding the dump files, searched recursively.
+
+        Returns:
+            dict: Totals of `files`, `read`, `rejected`, `duplicates` and `added` candles,
+                  the `failed` files with their errors, and `elapsed_seconds`.
+        """
+        started = time.perf_counter()
+        groups = KlineImporter.find_dumps(folder)
+        totals = {"files": sum(len(paths) for paths in groups.values()), "read": 0, "rejected": 0, "duplicates": 0, "added": 0, "failed": []}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(groups)))) as executor:
+            futures = {key: executor.submit(self.import_group, key[0], key[1], paths) for key, paths in groups.items()}
+            for (symbol, interval, year, month), future in futures.items():
+                try:
+                    counts = future.result()
+                except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+                    print(f"Could not import {symbol} {interval} {year}-{month:02d}: {e}")
+                    totals["failed"].append((groups[(symbol, interval, year, month)], str(e)))
+                    continue
+                for name in ("read", "rejected", "duplicates", "added"):
+                    totals[name] += counts[name]
+
+        totals["elapsed_seconds"] = time.perf_counter() - started
+        return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import Binance public-data kline dumps into the local archive")
+    parser.add_argument("folder", help="Folder with <SYMBOL>-<interval>-<YYYY>-<MM>[.zip|.csv] files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--store", action="store_true", help="Also save the candles in the SQLite candle store")
+    args = parser.parse_args()
+
+    importer = KlineImporter(store=CandleStore() if args.store else None, workers=args.workers)
+    result = importer.import_folder(args.folder)
+    print(f"{result['files']} files, {result['read']} candles read, {result['added']} added, "
+          f"{result['duplicates']} duplicates, {result['rejected']} rejected, "
+          f"{len(result['failed'])} failed in {result['elapsed_seconds']:.1f}s")
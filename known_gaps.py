@@ -0,0 +1,72 @@
+import threading
+import time
+
+
+class KnownGaps:
+    """
+    KnownGaps remembers the spans of a candle cache that the exchange has no candles for
+    (exchange outages, ranges before a pair was listed), so the paths that fill the cache
+    stop requesting them on every call.
+
+    Each CandleStore and KlineArchive holds one, next to the candles it describes. A span
+    is only recorded after a successful fetch of it came back without candles, and only
+    for candles that have closed, so the forming candle is always requested again.
+
+    Attributes:
+        spans (dict): Sorted (start_ts, end_ts) spans keyed by (symbol, interval).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = {}
+
+    def get(self, symbol, interval):
+        """Returns the known gaps of a symbol and interval, oldest first."""
+        with self.lock:
+            return list(self.spans.get((symbol, interval), []))
+
+    def add(self, symbol, interval, spans):
+        """Remembers spans that have no candles on the exchange."""
+        if not spans:
+            return
+        with self.lock:
+            known = set(self.spans.get((symbol, interval), []))
+            known.update((int(start), int(end)) for start, end in spans)
+            self.spans[(symbol, interval)] = sorted(known)
+
+    @staticmethod
+    def closed(spans, step):
+        """Clips spans to the candles that have closed, dropping spans without a closed candle."""
+        last_closed = int(time.time() * 1000) // step * step - step
+        return [(start, min(end, last_closed)) for start, end in spans if start <= last_closed]
+
+    def subtract(self, symbol, interval, spans, step):
+        """
+        Removes the known gaps from spans about to be requested.
+
+        Args:
+            spans (list): (start_ts, end_ts) spans of missing candles, in order.
+            step (int): Candle length in milliseconds.
+
+        Returns:
+            list: The parts of `spans` that still have to be requested.
+        """
+        known = self.get(symbol, interval)
+        if not known:
+            return spans
+        remaining = []
+        for start, end in spans:
+            pieces = [(start, end)]
+            for gap_start, gap_end in known:
+                pieces = [
+                    piece
+                    for piece_start, piece_end in pieces
+                    for piece in (
+                        ((piece_start, piece_end),) if gap_end < piece_start or gap_start > piece_end else
+                        ((piece_start, gap_start - 1), ((gap_end // step + 1) * step, piece_end))
+                    )
+                ]
+            # Keep only pieces that still hold a candle boundary
+            remaining.extend((piece_start, piece_end) for piece_start, piece_end in pieces
+                             if -(-piece_start // step) * step <= piece_end)
+        return remaining
@@ -1,5 +1,16 @@
+import argparse
+from cassette import Cassette
 from ui import LoginPage
 
 if __name__ == "__main__":
-    LoginPage().mainloop()
-    
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Bitcoin trading bot")
+    parser.add_argument("--record", metavar="CASSETTE", help="Record the Binance API traffic of this session")
+    parser.add_argument("--replay", metavar="CASSETTE", help="Answer Binance API requests from a recorded session")
+    parser.add_argument("--realtime", action="store_true", help="Replay with the recorded response times")
+    args = parser.parse_args()
+
+    if args.record or args.replay:
+        with Cassette(args.record or args.replay, "replay" if args.replay else "record", args.realtime):
+            LoginPage().mainloop()
+    else:
+        LoginPage().mainloop()
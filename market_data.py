@@ -0,0 +1,652 @@
+from datetime import datetime, timedelta
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+import requests
+import tempfile
+import zlib
+from api import BinanceAPI
+from kline_archive import KLINE_DTYPE, KlineArchive
+from known_gaps import KnownGaps
+from utils import Utils
+
+
+class MarketSnapshot:
+    """
+    MarketSnapshot holds one OHLC window fetched for a trading tick so that RSI, MACD,
+    Supertrend and the trade price can all be read from it instead of each going back
+    to Binance. It answers the same questions as the BinanceAPI range helpers for any
+    window that lies inside the one it was fetched for.
+
+    The window is kept as one KLINE_DTYPE array, so sub-windows and price columns are
+    views into it rather than new Python lists.
+
+    Attributes:
+        symbol (str): The trading pair the candles belong to.
+        from_date (datetime): Start of the fetched window.
+        to_date (datetime): End of the fetched window.
+        from_ts (int): Start of the fetched window in milliseconds.
+        to_ts (int): End of the fetched window in milliseconds.
+        interval (str): Kline interval of the candles.
+        step (int): Candle length in milliseconds.
+        klines (numpy.ndarray): KLINE_DTYPE records ordered by open time.
+        open_times (numpy.ndarray): Open time of each candle, used to slice sub-windows.
+    """
+
+    def __init__(self, candles, from_date, to_date, symbol="BTCUSDT", interval="1d"):
+        self.symbol = symbol
+        self.interval = interval
+        self.step = Utils.interval_ms(interval) or 86_400_000
+        self.from_date = from_date
+        self.to_date = to_date
+        self.from_ts = int(from_date.timestamp() * 1000)
+        self.to_ts = int(to_date.timestamp() * 1000)
+        self.klines = KlineArchive.to_array(candles)
+        self.open_times = self.klines["open_time"]
+
+    @property
+    def candles(self):
+        """Candle tuples (open_time, open, high, low, close, volume, close_time) of the window."""
+        return self.klines.tolist()
+
+    @staticmethod
+    def fetch(given_date, lookback, symbol="BTCUSDT", source=None, interval="1d"):
+        """
+        Fetches the window of `lookback` ending on `given_date` in a single request.
+
+        Args:
+            given_date (datetime): The last day of the window.
+            lookback (timedelta): How long before `given_date` the window starts.
+            symbol (str): Trading pair symbol.
+            source (MarketDataSource): Where the candles come from; MarketDataSource.default(interval) if not given.
+            interval (str): Kline interval (e.g., "1d", "4h").
+
+        Returns:
+            MarketSnapshot: The snapshot, or None if the candles could not be fetched.
+        """
+        from_date = given_date - lookback
+        source = source or MarketDataSource.default(interval)
+        try:
+            klines = source.get_kline_array(int(from_date.timestamp() * 1000), int(given_date.timestamp() * 1000), symbol, interval)
+        except requests.exceptions.RequestException as e:
+            print(f"Request error: {e}")
+            return None
+        except (ValueError, KeyError, IndexError) as e:
+            print(f"Data processing error: {e}")
+            return None
+        return MarketSnapshot(klines, from_date, given_date, symbol, interval)
+
+    @staticmethod
+    def fetch_many(given_date, lookback, symbols, source=None, interval="1d"):
+        """
+        Fetches the same window for several symbols with one batched source request.
+
+        Returns:
+            dict: MarketSnapshot keyed by symbol, or None if the candles could not be fetched.
+        """
+        from_date = given_date - lookback
+        source = source or MarketDataSource.default(interval)
+        try:
+            klines = source.get_kline_arrays(int(from_date.timestamp() * 1000), int(given_date.timestamp() * 1000), symbols, interval)
+        except requests.exceptions.RequestException as e:
+            print(f"Request error: {e}")
+            return None
+        except (ValueError, KeyError, IndexError) as e:
+            print(f"Data processing error: {e}")
+            return None
+        return {symbol: MarketSnapshot(klines[symbol], from_date, given_date, symbol, interval) for symbol in symbols}
+
+    @staticmethod
+    def ohlc_rows(klines):
+        """
+        Returns [date number, open, high, low, close] rows for the candlestick chart as one
+        (n, 5) array, with the dates in local time like BinanceAPI.get_ohlc_day_range.
+        """
+        rows = np.empty((len(klines), 5))
+        if len(klines):
+            first = int(klines["open_time"][0])
+            rows[:, 0] = mdates.date2num(datetime.fromtimestamp(first / 1000)) + (klines["open_time"] - first) / 86_400_000
+            for column, field in enumerate(("open", "high", "low", "close"), start=1):
+                rows[:, column] = klines[field]
+        return rows
+
+    def advance(self, candles, to_date):
+        """
+        Moves the window forward to `to_date`, merging in newer candles and dropping the
+        ones that fall out of the front, so a live snapshot can be kept without refetching it.
+
+        Args:
+            candles (list): Recent candle tuples, oldest first. A candle with the same open
+                            time as one already held replaces it.
+            to_date (datetime): The new end of the window.
+        """
+        new = KlineArchive.to_array(candles)
+        merged = np.concatenate([self.klines[~np.isin(self.open_times, new["open_time"])], new])
+        merged = merged[np.argsort(merged["open_time"], kind="stable")]
+        self.from_date = to_date - (self.to_date - self.from_date)
+        self.to_date = to_date
+        self.from_ts = int(self.from_date.timestamp() * 1000)
+        self.to_ts = int(to_date.timestamp() * 1000)
+        self.klines = merged[(merged["open_time"] >= self.from_ts) & (merged["open_time"] <= self.to_ts)]
+        self.open_times = self.klines["open_time"]
+
+    def covers(self, from_date, to_date):
+        """Returns True if the window [from_date, to_date] lies inside the snapshot."""
+        from_ts = int(from_date.timestamp() * 1000)
+        to_ts = int(to_date.timestamp() * 1000)
+        return self.from_ts <= from_ts and to_ts <= self.to_ts
+
+    def get_kline_array(self, from_ts, to_ts):
+        """Returns a view of the candles whose open time falls inside [from_ts, to_ts]."""
+        start = np.searchsorted(self.open_times, from_ts, "left")
+        end = np.searchsorted(self.open_times, to_ts, "right")
+        return self.klines[start:end]
+
+    def get_candles(self, from_ts, to_ts):
+        """Returns the candles whose open time falls inside [from_ts, to_ts] as tuples."""
+        return self.get_kline_array(from_ts, to_ts).tolist()
+
+    def get_prices_day_range(self, data, from_date, to_date):
+        """
+        Fills `data.prices`, `data.highs` and `data.lows` for a date range, like
+        BinanceAPI.get_prices_day_range but without a network request. The price
+        columns are array views into the snapshot.
+
+        Args:
+            data (object): Object that receives the price lists.
+            from_date (datetime): Start of the range.
+            to_date (datetime): End of the range.
+
+        Returns:
+            int: The number of candles found.
+        """
+        klines = self.get_kline_array(int(from_date.timestamp() * 1000), int(to_date.timestamp() * 1000))
+        data.prices = klines["close"]  # Closing prices
+        data.highs = klines["high"]    # High prices
+        data.lows = klines["low"]      # Low prices
+        return len(data.prices)
+
+    def get_price_on_day(self, given_date):
+        """
+        Returns the closing price for a day, like BinanceAPI.get_price_on_day.
+
+        Args:
+            given_date (datetime): The day to look up.
+
+        Returns:
+            float: Closing price for that day, or error message if not found.
+        """
+        from_ts = int(given_date.timestamp() * 1000) - self.step
+        to_ts = int(given_date.timestamp() * 1000)
+        klines = self.get_kline_array(from_ts, to_ts)
+        if len(klines):
+            return float(klines["close"][0])
+        print("No data found for that day.")
+        return "No data found for that day."
+
+    def get_ohlc_day_range(self, from_date, to_date):
+        """
+        Returns [date number, open, high, low, close] rows for the candlestick chart, like
+        BinanceAPI.get_ohlc_day_range.
+
+        Args:
+            from_date (datetime): Start of the range.
+            to_date (datetime): End of the range.
+
+        Returns:
+            numpy.ndarray: (n, 5) OHLC rows ordered by date.
+        """
+        return MarketSnapshot.ohlc_rows(self.get_kline_array(int(from_date.timestamp() * 1000), int(to_date.timestamp() * 1000)))
+
+
+class MarketDataSource:
+    """
+    MarketDataSource is where BotIndicators, MarketSnapshot and the chart get their
+    candles from. Subclasses provide `get_klines` or `get_kline_array` (and
+    `get_ticker_price` when they have a live price); the day-based helpers are built on
+    top of them and behave like the BinanceAPI helpers of the same name.
+    """
+
+    def get_klines(self, from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        """
+        Returns the candles whose open time falls inside [from_ts, to_ts].
+
+        Returns:
+            list: Candle tuples (open_time, open, high, low, close, volume, close_time) ordered by open time.
+        """
+        return self.get_kline_array(from_ts, to_ts, symbol, interval).tolist()
+
+    @staticmethod
+    def default(interval="1d", resample=None):
+        """
+        Returns the source used when none is given. Intraday intervals (3m to 12h) are
+        resampled from the 1m archive (ResampledMarketData), so one download serves every
+        timeframe; 1m, 1d and longer come from Binance through the candle store, since a
+        long daily history would otherwise mean 1,440 minute candles per bar.
+
+        Args:
+            interval (str): Kline interval the caller will ask for.
+            resample (bool): True to resample any whole-minute interval (1d included) from
+                             the 1m archive, False to never resample; None for the rule above.
+
+        Returns:
+            MarketDataSource: A ResampledMarketData or BinanceMarketData.
+        """
+        step = Utils.interval_ms(interval)
+        if interval == "1m" or step is None or step % 60_000 or resample is False:
+            return BinanceMarketData()
+        if resample is None and step >= 86_400_000:
+            return BinanceMarketData()
+        return ResampledMarketData()
+
+    def get_kline_array(self, from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        """
+        Returns the same candles as `get_klines` as one KLINE_DTYPE array.
+
+        Returns:
+            numpy.ndarray: KLINE_DTYPE records ordered by open time.
+        """
+        return KlineArchive.to_array(self.get_klines(from_ts, to_ts, symbol, interval))
+
+    def get_kline_arrays(self, from_ts, to_ts, symbols, interval="1d"):
+        """
+        Returns the candles of several symbols for the same range; sources that can batch
+        the requests (Binance) override this.
+
+        Returns:
+            dict: KLINE_DTYPE arrays keyed by symbol.
+        """
+        return {symbol: self.get_kline_array(from_ts, to_ts, symbol, interval) for symbol in symbols}
+
+    def get_ticker_price(self, symbol="BTCUSDT"):
+        """Returns the latest price; sources without a live ticker use the close of their last daily candle."""
+        now_ts = int(datetime.now().timestamp() * 1000)
+        klines = self.get_kline_array(0, now_ts, symbol)
+        if len(klines):
+            return float(klines["close"][-1])
+        return "No data found for that day."
+
+    def get_ticker_prices(self, symbols):
+        """Returns the latest price of several symbols as {symbol: price}, like BinanceAPI.get_ticker_prices."""
+        return {symbol: self.get_ticker_price(symbol) for symbol in symbols}
+
+    def get_price_on_day(self, given_date, symbol="BTCUSDT", interval="1d"):
+        """
+        Returns the closing price for a day, like BinanceAPI.get_price_on_day.
+
+        Args:
+            given_date (datetime): The day to look up.
+            symbol (str): Trading pair symbol.
+            interval (str): Kline interval; the price is the close of the first candle
+                            opening within one interval before `given_date`.
+
+        Returns:
+            float: Closing price for that day, or error message if not found.
+        """
+        to_ts = int(given_date.timestamp() * 1000)
+        from_ts = to_ts - (Utils.interval_ms(interval) or 86_400_000)
+        try:
+            klines = self.get_kline_array(from_ts, to_ts, symbol, interval)
+            if len(klines):
+                return float(klines["close"][0])
+            print("No data found for that day.")
+            return "No data found for that day."
+        except requests.exceptions.RequestException as e:
+            print(f"Request error: {e}")
+            return f"Request error: {e}"
+        except (ValueError, KeyError, IndexError) as e:
+            print(f"Data processing error: {e}")
+            return f"Data processing error: {e}"
+
+    def get_prices_day_range(self, data, from_date, to_date, symbol="BTCUSDT", interval="1d"):
+        """
+        Fills `data.prices`, `data.highs` and `data.lows` for a date range, like
+        BinanceAPI.get_prices_day_range, as array columns.
+
+        Returns:
+            int: The number of candles found, 0 on errors.
+        """
+        try:
+            klines = self.get_kline_array(int(from_date.timestamp() * 1000), int(to_date.timestamp() * 1000), symbol, interval)
+        except requests.exceptions.RequestException as e:
+            print(f"Request error: {e}")
+            return 0
+        except (ValueError, KeyError, IndexError) as e:
+            print(f"Data processing error: {e}")
+            return 0
+        data.prices = klines["close"]  # Closing prices
+        data.highs = klines["high"]    # High prices
+        data.lows = klines["low"]      # Low prices
+        expected = Utils.expected_candles(int(from_date.timestamp() * 1000), int(to_date.timestamp() * 1000), interval)
+        if expected is not None and len(data.prices) < expected:
+            print(f"Expected {expected} {interval} candles, got {len(data.prices)}")
+        return len(data.prices)
+
+    def get_ohlc_day_range(self, from_date, to_date, symbol="BTCUSDT", interval="1d"):
+        """
+        Returns [date number, open, high, low, close] rows for the candlestick chart, like
+        BinanceAPI.get_ohlc_day_range.
+
+        Returns:
+            numpy.ndarray: (n, 5) OHLC rows ordered by date, or None on errors.
+        """
+        try:
+            klines = self.get_kline_array(int(from_date.timestamp() * 1000), int(to_date.timestamp() * 1000), symbol, interval)
+        except requests.exceptions.RequestException as e:
+            print(f"Request error: {e}")
+            return None
+        except (ValueError, KeyError, IndexError) as e:
+            print(f"Data processing error: {e}")
+            return None
+        return MarketSnapshot.ohlc_rows(klines)
+
+    @staticmethod
+    def resample(klines, step):
+        """
+        Aggregates candles into bars of `step` milliseconds aligned to the epoch, the way
+        Binance builds its own intervals: first open, highest high, lowest low, last close
+        and summed volume. A bar still being filled closes at the end of its interval.
+
+        Args:
+            klines (numpy.ndarray): KLINE_DTYPE records of a finer interval, ordered by open time.
+            step (int): Bar length in milliseconds.
+
+        Returns:
+            numpy.ndarray: KLINE_DTYPE bars ordered by open time.
+        """
+        if len(klines) == 0:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        buckets = klines["open_time"] // step * step
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(klines)] - 1
+
+        bars = np.empty(len(starts), dtype=KLINE_DTYPE)
+        bars["open_time"] = buckets[starts]
+        bars["open"] = klines["open"][starts]
+        bars["high"] = np.maximum.reduceat(klines["high"], starts)
+        bars["low"] = np.minimum.reduceat(klines["low"], starts)
+        bars["close"] = klines["close"][ends]
+        bars["volume"] = np.add.reduceat(klines["volume"], starts)
+        bars["close_time"] = bars["open_time"] + step - 1
+        return bars
+
+
+class BinanceMarketData(MarketDataSource):
+    """Live candles and prices from Binance, through the local candle store."""
+
+    def get_klines(self, from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        return BinanceAPI.get_klines(from_ts, to_ts, symbol, interval)
+
+    def get_kline_arrays(self, from_ts, to_ts, symbols, interval="1d"):
+        klines = BinanceAPI.get_many_klines(from_ts, to_ts, symbols, interval)
+        return {symbol: KlineArchive.to_array(candles) for symbol, candles in klines.items()}
+
+    def get_ticker_price(self, symbol="BTCUSDT"):
+        return BinanceAPI.get_ticker_price(symbol)
+
+    def get_ticker_prices(self, symbols):
+        return BinanceAPI.get_ticker_prices(symbols)
+
+
+class InMemoryMarketData(MarketDataSource):
+    """
+    Candles held in memory, for offline backtests and benchmarks.
+
+    Attributes:
+        klines (dict): KLINE_DTYPE arrays ordered by open time, keyed by (symbol, interval).
+    """
+
+    def __init__(self, candles=None, symbol="BTCUSDT", interval="1d"):
+        """
+        Initializes the source.
+
+        Args:
+            candles (list or numpy.ndarray): Optional candles to start with.
+            symbol (str): Trading pair the candles belong to.
+            interval (str): Kline interval of the candles.
+        """
+        self.klines = {}
+        if candles is not None and len(candles):
+            self.add_candles(candles, symbol, interval)
+
+    def add_candles(self, candles, symbol="BTCUSDT", interval="1d"):
+        """Adds candle tuples or KLINE_DTYPE records; a candle with an open time already held replaces it."""
+        new = KlineArchive.to_array(candles)
+        held = self.klines.get((symbol, interval), np.empty(0, dtype=KLINE_DTYPE))
+        merged = np.concatenate([held[~np.isin(held["open_time"], new["open_time"])], new])
+        self.klines[(symbol, interval)] = merged[np.argsort(merged["open_time"], kind="stable")]
+
+    def get_kline_array(self, from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        klines = self.klines.get((symbol, interval), np.empty(0, dtype=KLINE_DTYPE))
+        start = np.searchsorted(klines["open_time"], from_ts, "left")
+        end = np.searchsorted(klines["open_time"], to_ts, "right")
+        return klines[start:end]
+
+
+class FileMarketData(InMemoryMarketData):
+    """
+    Candles read from a CSV or Parquet file, for backtests that run entirely offline.
+
+    CSV files may have a header with open_time, open, high, low, close, volume and
+    close_time columns, or no header with the columns in Binance /klines order (as in the
+    Binance public data dumps). Parquet files need pyarrow or fastparquet for pandas.
+    """
+
+    COLUMNS = list(KLINE_DTYPE.names)
+
+    def __init__(self, path, symbol="BTCUSDT", interval="1d"):
+        """
+        Loads the file.
+
+        Args:
+            path (str): .csv or .parquet file.
+            symbol (str): Trading pair the candles belong to.
+            interval (str): Kline interval of the candles.
+        """
+        super().__init__()
+        self.load(path, symbol, interval)
+
+    def load(self, path, symbol="BTCUSDT", interval="1d"):
+        """Adds the candles of another file, e.g. the next month of a dump."""
+        self.add_candles(FileMarketData.read(path), symbol, interval)
+
+    @staticmethod
+    def read(path):
+        """Reads a CSV or Parquet file into a KLINE_DTYPE array."""
+        if str(path).endswith(".parquet"):
+            return FileMarketData.to_klines(pd.read_parquet(path))
+        with open(path, "rb") as f:
+            return FileMarketData.read_csv(f)
+
+    @staticmethod
+    def read_csv(f):
+        """Reads CSV candles, with or without a header, from a binary file object (e.g. a ZIP member)."""
+        has_header = not f.readline().split(b",")[0].strip().lstrip(b"-").isdigit()
+        f.seek(0)
+        if has_header:
+            frame = pd.read_csv(f, usecols=FileMarketData.COLUMNS)
+        else:
+            frame = pd.read_csv(f, header=None, usecols=range(len(FileMarketData.COLUMNS)), names=FileMarketData.COLUMNS)
+        return FileMarketData.to_klines(frame)
+
+    @staticmethod
+    def to_klines(frame):
+        """Turns a frame with the KLINE_DTYPE columns into a KLINE_DTYPE array, converting microsecond timestamps."""
+        klines = np.empty(len(frame), dtype=KLINE_DTYPE)
+        for column in FileMarketData.COLUMNS:
+            klines[column] = frame[column].to_numpy()
+        if len(klines) and klines["open_time"][0] > 10 ** 14:
+            klines["open_time"] //= 1000  # Microsecond timestamps
+            klines["close_time"] //= 1000
+        return klines
+
+    @staticmethod
+    def write(path, candles):
+        """Saves candle tuples or KLINE_DTYPE records to a CSV or Parquet file that FileMarketData can load."""
+        frame = pd.DataFrame(KlineArchive.to_array(candles))
+        if str(path).endswith(".parquet"):
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False)
+
+
+class ArchiveMarketData(MarketDataSource):
+    """
+    Candles read from a memory-mapped KlineArchive, for long minute-level histories.
+
+    Ranges are returned as views of the mapped month files, so indicators and the chart
+    read them without building Python lists. With `download` set, candles missing from
+    the archive are fetched from Binance and appended (closed candles only) first.
+
+    Attributes:
+        archive (KlineArchive): The archive to read from.
+        download (bool): Fill missing spans from Binance.
+    """
+
+    api_archives = {}  # API root other than Binance -> temporary KlineArchive of its candles
+
+    def __init__(self, archive=None, download=False):
+        self.archive = archive or ArchiveMarketData.api_archive()
+        self.download = download
+
+    @staticmethod
+    def api_archive():
+        """
+        Returns the default archive for the API root BinanceAPI currently talks to: the
+        shared one under assets/archive for Binance, and a temporary one per root for a
+        stand-in (e.g. FakeBinanceServer), so stand-in candles never mix with Binance history.
+        """
+        base_url = BinanceAPI.API_BASE_URL
+        if base_url == BinanceAPI.BINANCE_API_URL:
+            return KlineArchive()
+        if base_url not in ArchiveMarketData.api_archives:
+            ArchiveMarketData.api_archives[base_url] = KlineArchive(tempfile.mkdtemp(prefix="klines-"))
+        return ArchiveMarketData.api_archives[base_url]
+
+    def get_kline_array(self, from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        klines = self.archive.get_klines(symbol, interval, from_ts, to_ts)
+        step = Utils.interval_ms(interval)
+        if not self.download or step is None:
+            return klines
+
+        missing = KlineArchive.missing_spans(klines["open_time"], from_ts, to_ts, step)
+        missing = self.archive.known_gaps.subtract(symbol, interval, missing, step)
+        if not missing:
+            return klines
+        count = sum((end - start) // step + 1 for start, end in missing)
+        if count > BinanceAPI.KLINES_PAGE_LIMIT:
+            print(f"Downloading {count} {symbol} {interval} candles into the archive")
+        now_ts = int(datetime.now().timestamp() * 1000)
+        fetched = KlineArchive.to_array(
+            [candle for page in BinanceAPI.fetch_pages(missing, symbol, interval) for candle in page]
+        )
+        self.archive.append(symbol, interval, fetched[fetched["close_time"] < now_ts])
+        self.archive.known_gaps.add(symbol, interval, [  # Closed candles the fetch did not return do not exist
+            gap for start, end in KnownGaps.closed(missing, step)
+            for gap in KlineArchive.missing_spans(fetched["open_time"], start, end, step)
+        ])
+        klines = self.archive.get_klines(symbol, interval, from_ts, to_ts)
+        forming = fetched[(fetched["close_time"] >= now_ts) & (fetched["open_time"] <= to_ts)]
+        return np.concatenate([klines, forming]) if len(forming) else klines
+
+    def get_ticker_price(self, symbol="BTCUSDT"):
+        if self.download:
+            return BinanceAPI.get_ticker_price(symbol)
+        return super().get_ticker_price(symbol)
+
+    def get_ticker_prices(self, symbols):
+        if self.download:
+            return BinanceAPI.get_ticker_prices(symbols)
+        return super().get_ticker_prices(symbols)
+
+
+class ResampledMarketData(MarketDataSource):
+    """
+    Builds every interval from one finer interval of another source, so a single 1-minute
+    download serves the 5m, 1h, 4h and 1d bars a strategy or chart asks for.
+
+    Intervals that are not a whole multiple of the base interval (and the calendar
+    intervals 1w and 1M) are passed through to the underlying source.
+
+    Attributes:
+        base (MarketDataSource): Source of the base candles; a downloading archive by default.
+        base_interval (str): Interval that is resampled.
+    """
+
+    def __init__(self, base=None, base_interval="1m"):
+        self.base = base or ArchiveMarketData(download=True)
+        self.base_interval = base_interval
+
+    def get_kline_array(self, from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        step = Utils.interval_ms(interval)
+        base_step = Utils.interval_ms(self.base_interval)
+        if interval == self.base_interval or step is None or step % base_step:
+            return self.base.get_kline_array(from_ts, to_ts, symbol, interval)
+
+        first_bar = -(-from_ts // step) * step  # Bars opening inside [from_ts, to_ts]
+        last_bar = to_ts // step * step
+        if last_bar < first_bar:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        now_ts = int(datetime.now().timestamp() * 1000)
+        base = self.base.get_kline_array(first_bar, min(last_bar + step - 1, now_ts), symbol, self.base_interval)
+        return MarketDataSource.resample(base, step)
+
+    def get_ticker_price(self, symbol="BTCUSDT"):
+        return self.base.get_ticker_price(symbol)
+
+    def get_ticker_prices(self, symbols):
+        return self.base.get_ticker_prices(symbols)
+
+
+class SyntheticMarketData(MarketDataSource):
+    """
+    Generated candles for load tests and offline demos, when there is no recorded data.
+
+    Prices are a deterministic function of time and symbol (a yearly and a shorter cycle
+    with pseudo-random noise), so any range of any interval can be produced on demand,
+    the same request always gives the same candles, and a 1d candle agrees with the 1m
+    candles inside it at its open and close. Candles are never produced past the present.
+
+    Attributes:
+        base_price (float): Price the cycles move around.
+        volatility (float): Size of the noise relative to the price.
+        seed (int): Changes every generated price.
+    """
+
+    def __init__(self, base_price=30000.0, volatility=0.02, seed=0):
+        self.base_price = base_price
+        self.volatility = volatility
+        self.seed = seed
+
+    def noise(self, timestamps, symbol, salt=0):
+        """Returns deterministic pseudo-random values in [-0.5, 0.5) for millisecond timestamps."""
+        key = (zlib.crc32(symbol.encode()) + 7919 * self.seed + 104729 * salt) % 2 ** 32
+        mixed = (np.asarray(timestamps, dtype=np.uint64) // np.uint64(1000) * np.uint64(2654435761) + np.uint64(key)) % np.uint64(2 ** 32)
+        mixed = (mixed ^ (mixed >> np.uint64(15))) * np.uint64(2246822519) % np.uint64(2 ** 32)
+        return mixed / 2 ** 32 - 0.5
+
+    def price_at(self, timestamps, symbol="BTCUSDT"):
+        """Returns the generated price at millisecond timestamps."""
+        days = np.asarray(timestamps, dtype=np.float64) / 86_400_000
+        phase = zlib.crc32(symbol.encode()) % 360 * np.pi / 180
+        cycle = 1 + 0.25 * np.sin(2 * np.pi * days / 365 + phase) + 0.1 * np.sin(2 * np.pi * days / 47)
+        return self.base_price * cycle * (1 + self.volatility * self.noise(timestamps, symbol))
+
+    def get_kline_array(self, from_ts, to_ts, symbol="BTCUSDT", interval="1d"):
+        step = Utils.interval_ms(interval) or 86_400_000
+        now_ts = int(datetime.now().timestamp() * 1000)
+        open_times = np.arange(-(-from_ts // step) * step, min(to_ts, now_ts) + 1, step, dtype=np.int64)
+
+        klines = np.empty(len(open_times), dtype=KLINE_DTYPE)
+        klines["open_time"] = open_times
+        klines["close_time"] = open_times + step - 1
+        klines["open"] = self.price_at(open_times, symbol)
+        klines["close"] = self.price_at(np.minimum(open_times + step, now_ts), symbol)
+        spread = 1 + self.volatility * np.abs(self.noise(open_times, symbol, salt=1))
+        klines["high"] = np.maximum(klines["open"], klines["close"]) * spread
+        klines["low"] = np.minimum(klines["open"], klines["close"]) / spread
+        klines["volume"] = (step / 60_000) * (5 + 10 * (self.noise(open_times, symbol, salt=2) + 0.5))
+        return klines
+
+    def get_ticker_price(self, symbol="BTCUSDT"):
+        return float(self.price_at(int(datetime.now().timestamp() * 1000), symbol))
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ResponseCache:
+    """
+    ResponseCache sits in front of BinanceAPI requests so that the same data asked for
+    several times within one UI cycle costs one network call.
+
+    Two things are combined: identical requests that are in flight at the same time
+    share one call (single flight), and results are kept for a short time to live
+    chosen per result, so a price is reused for a second while a range of closed
+    candles can be kept for minutes. Errors are never cached; every caller waiting on
+    a failed call gets its exception.
+
+    Attributes:
+        max_entries (int): Most results kept; the least recently used are dropped first.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that ran the loader.
+        coalesced (int): Lookups that waited for an identical call already in flight.
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (expires_at, value), in least recently used order
+        self.in_flight = {}  # key -> Future of the call that is loading it
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, loader, ttl):
+        """
+        Returns the cached value of `key`, or loads it once for all concurrent callers.
+
+        Args:
+            key (tuple): Identifies the request, e.g. ("ticker", "BTCUSDT").
+            loader (callable): Called without arguments to fetch the value.
+            ttl (callable): Called with the loaded value; returns how many seconds it
+                            may be reused, or None (or 0) to not cache it.
+
+        Returns:
+            The loaded or cached value.
+        """
+        owner = False
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                future = self.in_flight[key] = Future()
+                self.misses += 1
+                owner = True
+        if not owner:
+            return future.result()  # Raises the loader's exception for waiters too
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self.lock:
+                del self.in_flight[key]
+            future.set_exception(e)
+            raise
+        seconds = ttl(value)
+        with self.lock:
+            del self.in_flight[key]
+            if seconds:
+                self.entries[key] = (time.monotonic() + seconds, value)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        """Drops every cached result; calls in flight are not affected."""
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,308 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+from activate_bot import ActivateBot
+from backtest import Backtester
+from bot_indicators import BotIndicators
+from database import DatabaseManager
+from market_data import FileMarketData, MarketDataSource
+from shared_klines import SharedKlines
+from utils import Utils
+
+
+class RobustnessEngine:
+    """
+    RobustnessEngine checks whether a set of risk thresholds holds up beyond a single
+    backtest, by running the strategy (BotIndicators flags and ActivateBot's 2-of-3 rule)
+    many times and reporting the distributions of profit/loss, win rate and drawdown.
+
+    Walk-forward runs backtest rolling windows of the range. The indicators of a bar only
+    depend on the candles before it, so they are precomputed once for the whole range and
+    every window, however much it overlaps the others, is an ActivateBot.simulate call on
+    a slice of the same flag arrays.
+
+    Monte Carlo runs backtest bootstrap paths: the candles of the range are rebuilt from
+    blocks of the historical candles drawn with replacement (keeping their returns and
+    shapes), with the warm-up candles before the range left as they were. Each path needs
+    its own indicators, so the runs are spread over a process pool whose workers map the
+    historical candles from shared memory.
+
+    Attributes:
+        thresholds (dict): Risk thresholds as returned by BotIndicators.get_risk_thresholds.
+        from_date (datetime): First day of the range.
+        to_date (datetime): Last day of the range.
+        balance (float): Account balance every run starts with.
+        symbol (str): Trading pair.
+        interval (str): Bar length the strategy trades on.
+        workers (int): Worker processes for Monte Carlo runs.
+        warmup_tolerance (float): Seed weight the indicator windows are sized for, see BotIndicators.warmup_for.
+    """
+
+    METRICS = ("profit_loss", "trades", "win_rate", "max_drawdown", "max_drawdown_pct")
+    PERCENTILES = (5, 25, 50, 75, 95)
+
+    worker_source = None  # Historical candles, set in each worker process by `init_worker`
+
+    def __init__(self, thresholds, from_date, to_date, balance=10000, source=None, symbol="BTCUSDT", interval="1d",
+                 workers=os.cpu_count() or 1, warmup_tolerance=BotIndicators.WARMUP_TOLERANCE):
+        self.thresholds = thresholds
+        self.from_date = from_date
+        self.to_date = to_date
+        self.balance = balance
+        self.source = source or MarketDataSource.default(interval)
+        self.symbol = symbol
+        self.interval = interval
+        self.workers = workers
+        self.warmup_tolerance = warmup_tolerance
+
+    @staticmethod
+    def metrics(simulation, balance):
+        """
+        Reduces an ActivateBot.simulate result to the measures the engine reports.
+
+        Returns:
+            dict: `profit_loss`, `trades`, `win_rate` (share of trades with a profit, NaN
+                  without trades), `max_drawdown` (dollars) and `max_drawdown_pct`.
+        """
+        trades = len(simulation["exits"])
+        equity = simulation["equity"]
+        max_drawdown, max_drawdown_pct = Backtester.max_drawdown(equity[~np.isnan(equity)], balance)
+        return {
+            "profit_loss": simulation["final_balance"] - balance,
+            "trades": trades,
+            "win_rate": float((simulation["profit_loss"] > 0).sum() / trades) if trades else math.nan,
+            "max_drawdown": max_drawdown,
+            "max_drawdown_pct": max_drawdown_pct,
+        }
+
+    @staticmethod
+    def summarize(runs):
+        """
+        Aggregates run measures into distributions.
+
+        Args:
+            runs (list): `metrics` dicts.
+
+        Returns:
+            dict: Per measure the `mean`, `std`, `min`, `max` and percentiles (`p5` ... `p95`)
+                  over the runs that have a value, and `profitable`, the share of runs with a profit.
+        """
+        summary = {}
+        for name in RobustnessEngine.METRICS:
+            values = np.array([run[name] for run in runs], dtype=float)
+            values = values[~np.isnan(values)]
+            if not len(values):
+                summary[name] = None
+                continue
+            summary[name] = {"mean": float(values.mean()), "std": float(values.std()),
+                             "min": float(values.min()), "max": float(values.max())}
+            for percentile, value in zip(RobustnessEngine.PERCENTILES, np.percentile(values, RobustnessEngine.PERCENTILES)):
+                summary[name][f"p{percentile}"] = float(value)
+        summary["profitable"] = sum(1 for run in runs if run["profit_loss"] > 0) / len(runs) if runs else math.nan
+        return summary
+
+    def walk_forward(self, window, step):
+        """
+        Backtests rolling windows of the range from one indicator precomputation.
+
+        Args:
+            window (timedelta): Length of each window.
+            step (timedelta): Distance between the starts of consecutive windows.
+
+        Returns:
+            dict: `windows`, the `metrics` of each window with its `from_date` and `to_date`,
+                  `summary` of their distributions, and `stats` with the number of windows
+                  and `elapsed_seconds`. None if the prices could not be fetched.
+        """
+        started = time.perf_counter()
+        backtester = Backtester(
+            {name: [value] for name, value in self.thresholds.items()}, self.from_date, self.to_date, self.balance,
+            source=self.source, interval=self.interval, symbol=self.symbol, warmup_tolerance=self.warmup_tolerance,
+        )
+        bi = backtester.bi
+        if not bi.precompute_range(self.from_date, self.to_date):
+            return None
+        pre = bi.precomputed
+        prices = backtester.bar_prices(pre["bars"])
+        window_bars, step_bars = window // bi.bar, max(1, step // bi.bar)
+
+        windows = []
+        for first in range(0, pre["bars"] - window_bars + 1, step_bars):
+            last = first + window_bars
+            simulation = ActivateBot.simulate(
+                prices[first:last], pre["rsi_flag"][first:last], pre["macd_flag"][first:last], pre["st_flag"][first:last],
+                bi.thresholds["invest_thres"], self.balance,
+            )
+            windows.append({
+                "from_date": self.from_date + first * bi.bar,
+                "to_date": self.from_date + (last - 1) * bi.bar,
+                **RobustnessEngine.metrics(simulation, self.balance),
+            })
+
+        return {
+            "windows": windows,
+            "summary": RobustnessEngine.summarize(windows),
+            "stats": {"windows": len(windows), "elapsed_seconds": time.perf_counter() - started},
+        }
+
+    @staticmethod
+    def bootstrap(klines, from_ts, seed, block):
+        """
+        Builds a bootstrap path of candles.
+
+        Candles opened before `from_ts` (the indicator warm-up) are kept. The rest are
+        replaced by blocks of `block` consecutive historical candles drawn with replacement
+        from that part: each drawn candle contributes its close-to-close return and its
+        open, high and low relative to its close, and the path keeps the original times.
+
+        Args:
+            klines (np.ndarray): Historical KLINE_DTYPE candles ordered by open time.
+            from_ts (int): Open time of the first candle to resample.
+            seed (int): Random seed of the path.
+            block (int): Candles per block; longer blocks keep more of the autocorrelation.
+
+        Returns:
+            np.ndarray: The path as a new KLINE_DTYPE array.
+        """
+        first = int(np.searchsorted(klines["open_time"], from_ts, "left"))
+        count = len(klines) - first
+        path = klines.copy()
+        if first == 0 or count < 1:
+            return path
+
+        block = max(1, min(block, count))
+        starts = np.random.default_rng(seed).integers(first, len(klines) - block + 1, -(-count // block))
+        drawn = (starts[:, None] + np.arange(block)).ravel()[:count]
+
+        closes = klines["close"]
+        log_returns = np.log(closes[drawn] / closes[drawn - 1])
+        new_closes = closes[first - 1] * np.exp(np.cumsum(log_returns))
+        for field in ("open", "high", "low"):
+            path[field][first:] = new_closes * (klines[field][drawn] / closes[drawn])
+        path["close"][first:] = new_closes
+        path["volume"][first:] = klines["volume"][drawn]
+        return path
+
+    @staticmethod
+    def init_worker(descriptor):
+        """Maps the shared historical candles in a worker process."""
+        RobustnessEngine.worker_source = SharedKlines.attach(descriptor)
+
+    @staticmethod
+    def run_path(job):
+        """
+        Backtests one bootstrap path on the worker's candles.
+
+        Args:
+            job (tuple): (thresholds, from_date, to_date, balance, symbol, interval, seed, block, warmup_tolerance).
+
+        Returns:
+            dict: The `metrics` of the run with its `seed`.
+        """
+        thresholds, from_date, to_date, balance, symbol, interval, seed, block, warmup_tolerance = job
+        path = RobustnessEngine.bootstrap(RobustnessEngine.worker_source, int(from_date.timestamp() * 1000), seed, block)
+        backtester = Backtester(
+            {name: [value] for name, value in thresholds.items()}, from_date, to_date, balance,
+            source=SharedKlines.as_source(path, symbol, interval), interval=interval, symbol=symbol,
+            warmup_tolerance=warmup_tolerance,
+        )
+        if not backtester.bi.precompute_range(from_date, to_date):
+            return {"seed": seed, **{name: math.nan for name in RobustnessEngine.METRICS}}
+        pre = backtester.bi.precomputed
+        prices = backtester.bar_prices(pre["bars"])
+        simulation = ActivateBot.simulate(
+            prices, pre["rsi_flag"], pre["macd_flag"], pre["st_flag"], backtester.bi.thresholds["invest_thres"], balance
+        )
+        return {"seed": seed, **RobustnessEngine.metrics(simulation, balance)}
+
+    def monte_carlo(self, runs, block=10, seed=0):
+        """
+        Backtests bootstrap paths of the range in parallel.
+
+        Args:
+            runs (int): Number of paths.
+            block (int): Candles per bootstrap block.
+            seed (int): Seed of the first path; path i uses seed + i, so results are repeatable.
+
+        Returns:
+            dict: `runs`, the `metrics` of each path with its `seed`, `summary` of their
+                  distributions, and `stats` with the number of `paths`, `workers`,
+                  `elapsed_seconds` and `runs_per_second`. None if the candles could not be fetched.
+        """
+        started = time.perf_counter()
+        bar = Utils.interval_ms(self.interval)
+        from_ts = int(self.from_date.timestamp() * 1000) - BotIndicators.warmup_for(self.thresholds, self.warmup_tolerance)["total"] * bar
+        klines = self.source.get_kline_array(from_ts, int(self.to_date.timestamp() * 1000), self.symbol, self.interval)
+        if not len(klines):
+            print("No candles for the Monte Carlo range")
+            return None
+
+        jobs = [(self.thresholds, self.from_date, self.to_date, self.balance, self.symbol, self.interval, seed + i, block,
+                 self.warmup_tolerance) for i in range(runs)]
+        workers = max(1, min(self.workers, len(jobs)))
+        if workers == 1:
+            RobustnessEngine.worker_source = klines
+            results = [RobustnessEngine.run_path(job) for job in jobs]
+        else:
+            with SharedKlines(klines) as shared, ProcessPoolExecutor(
+                max_workers=workers, initializer=RobustnessEngine.init_worker, initargs=(shared.descriptor,),
+            ) as executor:
+                results = list(executor.map(RobustnessEngine.run_path, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+        elapsed = time.perf_counter() - started
+        return {
+            "runs": results,
+            "summary": RobustnessEngine.summarize([run for run in results if not math.isnan(run["profit_loss"])]),
+            "stats": {
+                "paths": len(jobs),
+                "workers": workers,
+                "elapsed_seconds": elapsed,
+                "runs_per_second": len(jobs) / elapsed if elapsed > 0 else float("inf"),
+            },
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward and Monte Carlo robustness runs of a risk level")
+    parser.add_argument("from_date", help="First day, YYYY-MM-DD")
+    parser.add_argument("to_date", help="Last day, YYYY-MM-DD")
+    parser.add_argument("--level", type=int, default=2, help="Risk level whose thresholds are tested")
+    parser.add_argument("--data", help="CSV or Parquet candles to use instead of Binance")
+    parser.add_argument("--resample", action="store_true", help="Build the bars from the 1m archive, even 1d")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--balance", type=float, default=10000)
+    parser.add_argument("--window", type=int, default=180, help="Walk-forward window in bars")
+    parser.add_argument("--step", type=int, default=30, help="Walk-forward step in bars")
+    parser.add_argument("--runs", type=int, default=1000, help="Monte Carlo paths")
+    parser.add_argument("--block", type=int, default=10, help="Bootstrap block in bars")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--warmup-tolerance", type=float, default=BotIndicators.WARMUP_TOLERANCE,
+                        help="Seed weight the indicator windows are sized for")
+    args = parser.parse_args()
+
+    db = DatabaseManager(True)
+    thresholds = BotIndicators.thresholds_by_level(db.get_all_risk_thresholds())[args.level]
+    db.close_connection()
+    if args.data:
+        source = FileMarketData(args.data, args.symbol, args.interval)
+    else:
+        source = MarketDataSource.default(args.interval, resample=True if args.resample else None)
+    engine = RobustnessEngine(thresholds, datetime.strptime(args.from_date, "%Y-%m-%d"), datetime.strptime(args.to_date, "%Y-%m-%d"),
+                              args.balance, source, args.symbol, args.interval, args.workers, args.warmup_tolerance)
+    bar = timedelta(milliseconds=Utils.interval_ms(args.interval))
+
+    for name, outcome in (("Walk-forward", engine.walk_forward(args.window * bar, args.step * bar)),
+                          ("Monte Carlo", engine.monte_carlo(args.runs, args.block))):
+        if outcome is None:
+            continue
+        print(f"{name}: {outcome['stats']}")
+        for metric in RobustnessEngine.METRICS:
+            stats = outcome["summary"][metric]
+            if stats is not None:
+                print(f"  {metric:17s} mean {stats['mean']:10.2f}  p5 {stats['p5']:10.2f}  p50 {stats['p50']:10.2f}  p95 {stats['p95']:10.2f}")
+        print(f"  profitable        {outcome['summary']['profitable']:.1%}")
@@ -0,0 +1,82 @@
+from multiprocessing import shared_memory
+import numpy as np
+from kline_archive import KLINE_DTYPE, KlineArchive
+from market_data import InMemoryMarketData
+
+
+class SharedKlines:
+    """
+    SharedKlines places a KLINE_DTYPE candle array in shared memory once, so worker
+    processes read the same physical pages instead of each receiving a pickled copy.
+
+    The parent creates the block and passes its small `descriptor` to the workers, which
+    `attach` a read-only array view of it. Memory use therefore stays the same however
+    many workers are started, and attaching costs a system call rather than a copy. The
+    creating process owns the block: it has to outlive the workers and `unlink` it at the
+    end, which the context manager does.
+
+    Attributes:
+        memory (SharedMemory): The shared block.
+        klines (numpy.ndarray): KLINE_DTYPE view of the block.
+    """
+
+    attached = {}  # Blocks attached in this process by name, kept open while their views are in use
+
+    def __init__(self, candles):
+        """
+        Copies candles into a new shared block.
+
+        Args:
+            candles (list or numpy.ndarray): Candle tuples or KLINE_DTYPE records, ordered by open time.
+        """
+        records = KlineArchive.to_array(candles)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, records.nbytes))
+        self.klines = np.ndarray(len(records), dtype=KLINE_DTYPE, buffer=self.memory.buf)
+        self.klines[:] = records
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+
+    @property
+    def descriptor(self):
+        """Picklable (name, length) pair that `attach` needs to find the block."""
+        return self.memory.name, len(self.klines)
+
+    @staticmethod
+    def attach(descriptor):
+        """
+        Maps a block created by another process.
+
+        Args:
+            descriptor (tuple): The `descriptor` of the SharedKlines that created the block.
+
+        Returns:
+            numpy.ndarray: Read-only KLINE_DTYPE view of the shared candles.
+        """
+        name, length = descriptor
+        memory = SharedKlines.attached.get(name)
+        if memory is None:
+            memory = shared_memory.SharedMemory(name=name)
+            SharedKlines.attached[name] = memory
+        klines = np.ndarray(length, dtype=KLINE_DTYPE, buffer=memory.buf)
+        klines.flags.writeable = False
+        return klines
+
+    @staticmethod
+    def as_source(klines, symbol="BTCUSDT", interval="1d"):
+        """
+        Wraps candles already ordered by open time in an InMemoryMarketData without copying
+        them (add_candles would merge them into a new array).
+        """
+        source = InMemoryMarketData()
+        source.klines[(symbol, interval)] = klines
+        return source
+
+    def unlink(self):
+        """Removes the block once the workers are done with it."""
+        self.klines = None
+        self.memory.close()
+        self.memory.unlink()
@@ -0,0 +1,329 @@
+import base64
+import hashlib
+import json
+import os
+import random
+import socket
+import ssl
+import struct
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class WebSocket:
+    """
+    Minimal RFC 6455 WebSocket connection over a plain or TLS socket.
+
+    Only what the Binance market streams need is supported: text frames, fragmented
+    messages, ping/pong and close. Frames sent by a client are masked, frames sent by a
+    server are not.
+    """
+
+    GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+    OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+    def __init__(self, sock, mask=True):
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+        self.mask = mask
+        self.send_lock = threading.Lock()
+
+    @staticmethod
+    def accept_key(key):
+        """Returns the Sec-WebSocket-Accept value that answers a Sec-WebSocket-Key."""
+        return base64.b64encode(hashlib.sha1((key + WebSocket.GUID).encode()).digest()).decode()
+
+    @staticmethod
+    def connect(url, timeout=10):
+        """
+        Opens a client connection to a ws:// or wss:// URL.
+
+        Raises:
+            ConnectionError: If the server does not accept the upgrade.
+            OSError: If the socket cannot be opened.
+        """
+        parts = urlparse(url)
+        secure = parts.scheme == "wss"
+        port = parts.port or (443 if secure else 80)
+        sock = socket.create_connection((parts.hostname, port), timeout=timeout)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {parts.hostname}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        sock.sendall(request.encode())
+
+        ws = WebSocket(sock)
+        status = ws.reader.readline().decode("latin-1")
+        headers = WebSocket.read_headers(ws.reader)
+        if " 101 " not in status or headers.get("sec-websocket-accept") != WebSocket.accept_key(key):
+            ws.close()
+            raise ConnectionError(f"WebSocket upgrade refused: {status.strip()}")
+        return ws
+
+    @staticmethod
+    def read_headers(reader):
+        """Reads HTTP headers up to the blank line and returns them with lower-case names."""
+        headers = {}
+        while True:
+            line = reader.readline().decode("latin-1").strip()
+            if not line:
+                return headers
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    def read_exact(self, size):
+        data = self.reader.read(size)
+        if data is None or len(data) < size:
+            raise ConnectionError("WebSocket connection closed")
+        return data
+
+    def read_frame(self):
+        """Reads one frame and returns (fin, opcode, payload)."""
+        first, second = self.read_exact(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self.read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self.read_exact(8))[0]
+        mask = self.read_exact(4) if second & 0x80 else None
+        payload = self.read_exact(length)
+        if mask:
+            payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        return bool(first & 0x80), first & 0x0F, payload
+
+    def send(self, opcode, payload=b""):
+        """Sends one unfragmented frame."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        header = bytes([0x80 | opcode])
+        mask_bit = 0x80 if self.mask else 0
+        length = len(payload)
+        if length < 126:
+            header += bytes([mask_bit | length])
+        elif length < 1 << 16:
+            header += bytes([mask_bit | 126]) + struct.pack("!H", length)
+        else:
+            header += bytes([mask_bit | 127]) + struct.pack("!Q", length)
+        if self.mask:
+            mask = os.urandom(4)
+            header += mask
+            payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        with self.send_lock:
+            self.sock.sendall(header + payload)
+
+    def recv(self):
+        """
+        Returns the next text message, answering pings on the way.
+
+        Returns:
+            str: The message, or None once the peer has closed the connection.
+        """
+        message = b""
+        while True:
+            fin, opcode, payload = self.read_frame()
+            if opcode == self.OP_PING:
+                self.send(self.OP_PONG, payload)
+            elif opcode == self.OP_PONG:
+                continue
+            elif opcode == self.OP_CLOSE:
+                try:
+                    self.send(self.OP_CLOSE, payload[:2])
+                except OSError:
+                    pass
+                return None
+            else:
+                message += payload
+                if fin:
+                    return message.decode()
+
+    def close(self):
+        """Closes the connection without waiting for the peer."""
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class BinanceStream:
+    """
+    BinanceStream pushes live trades and candle updates for one symbol from the Binance
+    WebSocket market streams instead of polling the REST ticker.
+
+    A background thread holds the connection and reconnects with jittered backoff after
+    errors and the daily disconnect. The latest trade price and the current and previous
+    candles are kept for readers on other threads (e.g. the Tk loop), and every update is
+    also passed to the subscribed callbacks as a dict:
+    {"type": "trade", "price": float, "time": int} or
+    {"type": "kline", "candle": tuple, "closed": bool}.
+
+    Attributes:
+        symbol (str): Trading pair symbol (e.g., "BTCUSDT").
+        interval (str): Kline interval of the candle stream.
+        url (str): Combined stream URL.
+        last_price (float): Price of the latest trade, or None before the first one.
+        last_trade_time (int): Exchange time of the latest trade in milliseconds.
+        connected (bool): Whether the connection is currently open.
+        reconnects (int): How many times the connection has been re-established.
+    """
+
+    STREAM_URL = "wss://stream.binance.com:9443/stream"
+    RECV_TIMEOUT = 60  # Binance pings every 20 seconds, so a silent minute means a dead link
+    RECONNECT_BASE = 1.0
+    RECONNECT_CAP = 60.0
+    PRICE_MAX_AGE = 30  # Seconds after which the last trade price is no longer treated as live
+
+    def __init__(self, symbol="BTCUSDT", interval="1d", url=STREAM_URL):
+        self.symbol = symbol
+        self.interval = interval
+        stream = symbol.lower()
+        self.url = f"{url}?streams={stream}@trade/{stream}@kline_{interval}"
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.ws = None
+        self.last_price = None
+        self.last_trade_time = None
+        self.candles = {}
+        self.connected = False
+        self.reconnects = 0
+
+    def subscribe(self, callback):
+        """Registers `callback(event)`; it is called on the stream thread."""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def start(self):
+        """Starts the stream thread."""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name=f"stream-{self.symbol}", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        """Closes the connection and waits for the stream thread to finish."""
+        self.stop_event.set()
+        ws = self.ws
+        if ws is not None:
+            ws.close()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def run(self):
+        """Connects, dispatches messages and reconnects until `stop` is called."""
+        attempt = 0
+        first_connection = True
+        while not self.stop_event.is_set():
+            try:
+                self.ws = WebSocket.connect(self.url, timeout=self.RECV_TIMEOUT)
+                if not first_connection:
+                    self.reconnects += 1
+                first_connection = False
+                self.connected = True
+                attempt = 0
+                while not self.stop_event.is_set():
+                    message = self.ws.recv()
+                    if message is None:
+                        break
+                    try:
+                        message = json.loads(message)
+                    except ValueError as e:
+                        print(f"Stream message skipped: {e}")
+                        continue
+                    self.handle(message)
+            except (OSError, ConnectionError, ValueError) as e:
+                if not self.stop_event.is_set():
+                    print(f"Stream error: {e}")
+            finally:
+                self.connected = False
+                if self.ws is not None:
+                    self.ws.close()
+                    self.ws = None
+
+            if not self.stop_event.is_set():
+                attempt += 1
+                self.stop_event.wait(random.uniform(0, min(self.RECONNECT_CAP, self.RECONNECT_BASE * 2 ** attempt)))
+        self.connected = False
+
+    def handle(self, message):
+        """
+        Updates the latest price or candle from one stream message and notifies the subscribers.
+        Messages with missing or malformed fields are logged and skipped, so one bad message
+        cannot stop the stream thread.
+        """
+        try:
+            data = message.get("data", message)
+            kind = data.get("e")
+            if kind == "trade":
+                price, trade_time = float(data["p"]), int(data["T"])
+            elif kind == "kline":
+                k = data["k"]
+                candle = (int(k["t"]), float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"]), int(k["T"]))
+                closed = bool(k["x"])
+            else:
+                return
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            print(f"Stream message skipped: {e!r}")
+            return
+
+        if kind == "trade":
+            with self.lock:
+                self.last_price, self.last_trade_time = price, trade_time
+            event = {"type": "trade", "price": price, "time": trade_time}
+        else:
+            with self.lock:
+                self.candles[candle[0]] = (candle, closed)
+                for open_time in sorted(self.candles)[:-2]:
+                    del self.candles[open_time]  # Keep the forming candle and the one before it
+            event = {"type": "kline", "candle": candle, "closed": closed}
+
+        for callback in list(self.subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Stream subscriber error: {e}")
+
+    def live_price(self, max_age=PRICE_MAX_AGE):
+        """
+        Returns the latest trade price while the stream is connected and the trade is at
+        most `max_age` seconds old, otherwise None so callers fall back to the REST ticker.
+        """
+        with self.lock:
+            price, trade_time = self.last_price, self.last_trade_time
+        if not self.connected or price is None or time.time() * 1000 - trade_time > max_age * 1000:
+            return None
+        return price
+
+    def recent_candles(self, now_ts=None):
+        """
+        Returns the streamed candles (at most the previous and the forming one), oldest first.
+
+        A candle whose interval has ended is only returned once its final (closed) message
+        has arrived, so a partial candle is never taken for a closed one; a caller that
+        misses it fetches the candle over REST instead.
+
+        Args:
+            now_ts (int): Current time in milliseconds; the system clock if not given.
+        """
+        if now_ts is None:
+            now_ts = int(time.time() * 1000)
+        with self.lock:
+            stored = [self.candles[open_time] for open_time in sorted(self.candles)]
+        return [candle for candle, closed in stored if closed or candle[6] >= now_ts]
@@ -0,0 +1,247 @@
+from collections import deque
+import numpy as np
+from indicator_engine import IndicatorEngine
+
+
+class StreamingRSI:
+    """
+    Keeps RSI state between candles so each new candle costs O(1).
+
+    `rsi` follows BotIndicators.calculate_rsi: the average of the last `period` changes
+    smoothed once more with the latest change. `wilder_rsi` continues the Wilder averages
+    of BotIndicators.calculate_historical_rsi.
+    """
+
+    def __init__(self, period=IndicatorEngine.RSI_PERIOD):
+        self.period = period
+        self.gains = deque(maxlen=period - 1)   # Latest closed changes, without the newest one
+        self.losses = deque(maxlen=period - 1)
+        self.prev_close = None
+        self.avg_gain = None
+        self.avg_loss = None
+
+    def seed(self, closes):
+        """Builds the state from the closing prices of closed candles (at least period + 1)."""
+        gains, losses = IndicatorEngine.gains_losses(closes)
+        avg_gains, avg_losses = IndicatorEngine.wilder_averages(closes, self.period)
+        self.gains.clear()
+        self.losses.clear()
+        self.gains.extend(gains[-(self.period - 1):].tolist())
+        self.losses.extend(losses[-(self.period - 1):].tolist())
+        self.avg_gain = float(avg_gains[-1])
+        self.avg_loss = float(avg_losses[-1])
+        self.prev_close = float(closes[-1])
+
+    def step(self, close):
+        """
+        Evaluates a candle on top of the current state without changing it.
+
+        Returns:
+            tuple: (rsi, wilder_rsi, avg_gain, avg_loss) for the candle.
+        """
+        change = close - self.prev_close
+        gain, loss = max(change, 0), abs(min(change, 0))
+
+        # Windowed RSI used for the trading flag
+        avg_gain = ((sum(self.gains) + gain) / self.period * (self.period - 1) + gain) / self.period
+        avg_loss = ((sum(self.losses) + loss) / self.period * (self.period - 1) + loss) / self.period
+        rs = avg_gain / avg_loss if avg_loss != 0 else 100  # Prevent division by zero
+        rsi = 100 - (100 / (1 + rs))
+
+        # Wilder RSI carried over from the seed
+        wilder_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+        wilder_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        wilder_rsi = 100.0 if wilder_loss == 0 else 100 - (100 / (1 + wilder_gain / wilder_loss))
+        return rsi, wilder_rsi, wilder_gain, wilder_loss
+
+    def commit(self, close):
+        """Advances the state by one closed candle and returns its (rsi, wilder_rsi)."""
+        rsi, wilder_rsi, self.avg_gain, self.avg_loss = self.step(close)
+        change = close - self.prev_close
+        self.gains.append(max(change, 0))
+        self.losses.append(abs(min(change, 0)))
+        self.prev_close = close
+        return rsi, wilder_rsi
+
+
+class StreamingMACD:
+    """Keeps the fast, slow and signal EMAs between candles so each new candle costs O(1)."""
+
+    def __init__(self, fast_period, slow_period, signal_period):
+        self.fast_period = int(fast_period)
+        self.slow_period = int(slow_period)
+        self.signal_period = int(signal_period)
+        self.ema_fast = None
+        self.ema_slow = None
+        self.signal = None
+        self.macd = None
+
+    def seed(self, closes):
+        """Builds the state from the closing prices of closed candles (more than slow + signal periods)."""
+        result = IndicatorEngine.macd(closes, self.fast_period, self.slow_period, self.signal_period)
+        self.ema_fast = float(result["ema_fast"][-1])
+        self.ema_slow = float(result["ema_slow"][-1])
+        self.macd = float(result["macd_line"][-1])
+        self.signal = float(result["signal_line"][-1])
+
+    def step(self, close):
+        """
+        Evaluates a candle on top of the current state without changing it.
+
+        Returns:
+            tuple: (ema_fast, ema_slow, macd, signal, flag) for the candle, where flag is the
+                   crossover against the previous candle as in BotIndicators.calculate_macd.
+        """
+        ema_fast = (close - self.ema_fast) * (2 / (self.fast_period + 1)) + self.ema_fast
+        ema_slow = (close - self.ema_slow) * (2 / (self.slow_period + 1)) + self.ema_slow
+        macd = ema_fast - ema_slow
+        signal = (macd - self.signal) * (2 / (self.signal_period + 1)) + self.signal
+
+        if macd > signal and self.macd <= self.signal:
+            flag = 1
+        elif macd < signal and self.macd >= self.signal:
+            flag = -1
+        else:
+            flag = 0
+        return ema_fast, ema_slow, macd, signal, flag
+
+    def commit(self, close):
+        """Advances the state by one closed candle and returns its (macd, flag)."""
+        self.ema_fast, self.ema_slow, self.macd, self.signal, flag = self.step(close)
+        return self.macd, flag
+
+
+class StreamingSupertrend:
+    """Keeps the Wilder ATR and the previous Supertrend band between candles so each new candle costs O(1)."""
+
+    def __init__(self, atr_period, multiplier=1):
+        self.atr_period = int(atr_period)
+        self.multiplier = multiplier
+        self.prev_close = None
+        self.atr = None
+        self.supertrend = None
+
+    def seed(self, closes, highs, lows):
+        """Builds the state from closed candles (more than atr_period of them)."""
+        result = IndicatorEngine.supertrend(closes, highs, lows, self.atr_period, self.multiplier)
+        self.atr = float(result["atr"][-1])
+        self.supertrend = float(result["supertrend"][-1])
+        self.prev_close = float(closes[-1])
+
+    def step(self, close, high, low):
+        """
+        Evaluates a candle on top of the current state without changing it.
+
+        Returns:
+            tuple: (atr, supertrend, flag) for the candle, as in BotIndicators.calculate_supertrend.
+        """
+        tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        atr = ((self.atr * (self.atr_period - 1)) + tr) / self.atr_period
+        mid = (high + low) / 2
+        if close > self.supertrend:
+            supertrend = mid - (self.multiplier * atr)
+        else:
+            supertrend = mid + (self.multiplier * atr)
+
+        if close > supertrend:
+            flag = 1
+        elif close < supertrend:
+            flag = -1
+        else:
+            flag = 0
+        return atr, supertrend, flag
+
+    def commit(self, close, high, low):
+        """Advances the state by one closed candle and returns its (supertrend, flag)."""
+        self.atr, self.supertrend, flag = self.step(close, high, low)
+        self.prev_close = close
+        return self.supertrend, flag
+
+
+class StreamingIndicators:
+    """
+    StreamingIndicators keeps RSI, MACD and Supertrend state for live trading so every tick
+    only has to process the newest candles instead of recomputing a whole window.
+
+    Closed candles are folded into the state once; the candle that is still forming is
+    evaluated on top of the state on every tick without being committed. The values match
+    a full recompute at the moment of seeding and then keep running the same recursions,
+    so they are not re-seeded as the window moves. A missing candle makes `update` return
+    False so the caller can seed again from a full window.
+
+    Attributes:
+        thresholds (dict): Risk thresholds as returned by BotIndicators.get_risk_thresholds.
+        step (int): Candle length in milliseconds.
+        last_open_time (int): Open time of the last committed candle.
+        rsi, rsi_flag, wilder_rsi, macd, macd_flag, supertrend, st_flag: Latest indicator values.
+    """
+
+    def __init__(self, thresholds, step=86_400_000):
+        self.thresholds = thresholds
+        self.step = step
+        self.rsi_state = StreamingRSI()
+        self.macd_state = StreamingMACD(
+            thresholds["macd_fast_ema"], thresholds["macd_slow_ema"], thresholds["macd_signal_ema"]
+        )
+        self.st_state = StreamingSupertrend(thresholds["supertrend_atr_period"])
+        self.last_open_time = None
+
+    def seed(self, candles, now_ts):
+        """
+        Rebuilds the state from a full window of candles.
+
+        Args:
+            candles (list): Candle tuples (open_time, open, high, low, close, volume, close_time), oldest first.
+            now_ts (int): Current time in milliseconds, used to tell closed candles from the forming one.
+        """
+        closed = [candle for candle in candles if candle[6] < now_ts]
+        closes = np.array([candle[4] for candle in closed])
+        highs = np.array([candle[2] for candle in closed])
+        lows = np.array([candle[3] for candle in closed])
+
+        self.rsi_state.seed(closes)
+        self.macd_state.seed(closes)
+        self.st_state.seed(closes, highs, lows)
+        self.last_open_time = closed[-1][0]
+
+        # The last closed candle provides the values until a forming candle is seen
+        result = IndicatorEngine.compute(closes, highs, lows, self.thresholds)
+        self.rsi, self.rsi_flag = result["rsi"], result["rsi_flag"]
+        self.wilder_rsi = float(result["rsi_values"][-1])
+        self.macd, self.macd_flag = float(result["macd"]), result["macd_flag"]
+        self.supertrend, self.st_flag = float(result["supertrend_value"]), result["st_flag"]
+
+        self.update([candle for candle in candles if candle[6] >= now_ts], now_ts)
+
+    def update(self, candles, now_ts):
+        """
+        Folds newly closed candles into the state and evaluates the forming candle.
+
+        Args:
+            candles (list): Recent candle tuples, oldest first. Candles at or before the
+                            last committed one are ignored, and one whose close time has
+                            passed is committed, so it must be final (see
+                            BinanceStream.recent_candles).
+            now_ts (int): Current time in milliseconds.
+
+        Returns:
+            bool: False if a candle is missing between the state and `candles`, True otherwise.
+        """
+        for candle in candles:
+            open_time, high, low, close = candle[0], candle[2], candle[3], candle[4]
+            if open_time <= self.last_open_time:
+                continue
+            if open_time != self.last_open_time + self.step:
+                return False  # Gap: the caller has to seed again
+
+            if candle[6] < now_ts:
+                self.rsi, self.wilder_rsi = self.rsi_state.commit(close)
+                self.macd, self.macd_flag = self.macd_state.commit(close)
+                self.supertrend, self.st_flag = self.st_state.commit(close, high, low)
+                self.last_open_time = open_time
+            else:
+                self.rsi, self.wilder_rsi = self.rsi_state.step(close)[:2]
+                _, _, self.macd, _, self.macd_flag = self.macd_state.step(close)
+                _, self.supertrend, self.st_flag = self.st_state.step(close, high, low)
+            self.rsi_flag = IndicatorEngine.rsi_flag(self.rsi, self.thresholds)
+        return True
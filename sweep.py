@@ -0,0 +1,243 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from backtest import Backtester
+from bot_indicators import BotIndicators
+from market_data import FileMarketData, MarketDataSource
+from shared_klines import SharedKlines
+from utils import Utils
+
+
+class ParameterSweep:
+    """
+    ParameterSweep tunes the risk thresholds against history by backtesting many
+    threshold sets, spread over a pool of worker processes.
+
+    The candles of the whole range (plus the indicator warm-up) are fetched once in the
+    parent and placed in shared memory, which every worker maps read-only when it starts
+    (see SharedKlines), so the workers never touch the network or the database and do
+    not hold copies of the prices. Each threshold set is then an independent Backtester run
+    (ActivateBot's 2-of-3 rule with precomputed indicators) and the sets are sent to
+    the pool in chunks, so the sweep scales with the number of cores.
+
+    Sets come from a grid (every combination of the values in a search space) or a
+    random sample of it. Combinations that cannot work (fast EMA not faster than the
+    slow one, oversold at or above overbought) are skipped. The Supertrend multiplier is
+    not in the default space since BotIndicators draws its bands at 1 ATR regardless.
+
+    Attributes:
+        from_date (datetime): First day of the backtests.
+        to_date (datetime): Last day of the backtests.
+        balance (float): Account balance every backtest starts with.
+        base (dict): Thresholds of the parameters that are not swept (e.g. invest_thres).
+        symbol (str): Trading pair.
+        interval (str): Bar length the strategy trades on.
+        workers (int): Worker processes.
+        warmup_tolerance (float): Seed weight the indicator windows are sized for, see BotIndicators.warmup_for.
+    """
+
+    DEFAULT_SPACE = {
+        "rsi_oversold": [20, 25, 30, 35, 40],
+        "rsi_overbought": [60, 65, 70, 75, 80],
+        "macd_fast_ema": [6, 12, 26],
+        "macd_slow_ema": [13, 26, 52],
+        "macd_signal_ema": [4, 9, 18],
+        "supertrend_atr_period": [7, 10, 14, 20],
+    }
+    DEFAULT_BASE = {  # Risk level 2
+        "invest_thres": 60,
+        "rsi_oversold": 30,
+        "rsi_overbought": 70,
+        "macd_fast_ema": 12,
+        "macd_slow_ema": 26,
+        "macd_signal_ema": 9,
+        "supertrend_atr_period": 14,
+        "supertrend_multiplier": 3.0,
+    }
+
+    worker_source = None  # Candles of the sweep, set in each worker process by `init_worker`
+
+    def __init__(self, from_date, to_date, balance=10000, source=None, base=None, symbol="BTCUSDT", interval="1d",
+                 workers=os.cpu_count() or 1, warmup_tolerance=BotIndicators.WARMUP_TOLERANCE):
+        self.from_date = from_date
+        self.to_date = to_date
+        self.balance = balance
+        self.source = source or MarketDataSource.default(interval)
+        self.base = dict(base or ParameterSweep.DEFAULT_BASE)
+        self.symbol = symbol
+        self.interval = interval
+        self.workers = workers
+        self.warmup_tolerance = warmup_tolerance
+
+    @staticmethod
+    def valid(thresholds):
+        """Returns False for threshold sets whose indicators cannot give sensible signals."""
+        return (thresholds["macd_fast_ema"] < thresholds["macd_slow_ema"]
+                and thresholds["rsi_oversold"] < thresholds["rsi_overbought"])
+
+    def grid(self, space=None):
+        """
+        Lists every valid combination of a search space.
+
+        Args:
+            space (dict): Candidate values keyed by threshold name; DEFAULT_SPACE if not given.
+
+        Returns:
+            list: Complete threshold dicts (the base thresholds with the swept values applied).
+        """
+        space = space or ParameterSweep.DEFAULT_SPACE
+        names = list(space)
+        sets = ({**self.base, **dict(zip(names, values))} for values in itertools.product(*space.values()))
+        return [thresholds for thresholds in sets if ParameterSweep.valid(thresholds)]
+
+    def random_sets(self, count, space=None, seed=None):
+        """
+        Samples valid combinations of a search space without repeats.
+
+        Args:
+            count (int): Number of sets wanted; fewer are returned if the space is smaller.
+            space (dict): Candidate values keyed by threshold name; DEFAULT_SPACE if not given.
+            seed (int): Random seed, for a repeatable sample.
+
+        Returns:
+            list: Complete threshold dicts.
+        """
+        sets = self.grid(space)
+        return random.Random(seed).sample(sets, min(count, len(sets)))
+
+    def load_klines(self, threshold_sets):
+        """Fetches the candles of the range and the longest warm-up of the threshold sets in one request."""
+        bar = Utils.interval_ms(self.interval)
+        warmup = max(BotIndicators.warmup_for(thresholds, self.warmup_tolerance)["total"] for thresholds in threshold_sets)
+        from_ts = int(self.from_date.timestamp() * 1000) - warmup * bar
+        to_ts = int(self.to_date.timestamp() * 1000)
+        return self.source.get_kline_array(from_ts, to_ts, self.symbol, self.interval)
+
+    @staticmethod
+    def init_worker(descriptor, symbol, interval):
+        """Maps the shared sweep candles in a worker process as its market data source."""
+        ParameterSweep.worker_source = SharedKlines.as_source(SharedKlines.attach(descriptor), symbol, interval)
+
+    @staticmethod
+    def evaluate(job):
+        """
+        Backtests one threshold set on the worker's candles.
+
+        Args:
+            job (tuple): (thresholds, from_date, to_date, balance, symbol, interval, warmup_tolerance).
+
+        Returns:
+            dict: The `thresholds` with the `profit_loss`, `final_balance`, `trades`, `wins`,
+                  `max_drawdown` (dollars) and `max_drawdown_pct` (of the peak) of the run.
+        """
+        thresholds, from_date, to_date, balance, symbol, interval, warmup_tolerance = job
+        backtester = Backtester(
+            {name: [value] for name, value in thresholds.items()}, from_date, to_date, balance,
+            source=ParameterSweep.worker_source, interval=interval, symbol=symbol, warmup_tolerance=warmup_tolerance,
+        )
+        result = backtester.run()
+
+        max_drawdown, max_drawdown_pct = Backtester.max_drawdown([equity for _, equity in result["equity_curve"]], balance)
+
+        return {
+            "thresholds": thresholds,
+            "profit_loss": result["stats"]["total_profit_loss"],
+            "final_balance": result["stats"]["final_balance"],
+            "trades": len(result["trades"]),
+            "wins": sum(1 for trade in result["trades"] if trade["profit_loss"] > 0),
+            "max_drawdown": max_drawdown,
+            "max_drawdown_pct": max_drawdown_pct,
+        }
+
+    def run(self, threshold_sets, rank_by="profit_loss"):
+        """
+        Backtests threshold sets in parallel and ranks them.
+
+        Args:
+            threshold_sets (list): Complete threshold dicts, e.g. from `grid` or `random_sets`.
+            rank_by (str): "profit_loss" (highest first) or "max_drawdown_pct" (lowest first);
+                           ties go to the other measure.
+
+        Returns:
+            dict: `results`, one `evaluate` dict per set in rank order, and `stats` with the
+                  number of `sets`, `workers`, `elapsed_seconds` and `sets_per_second`.
+                  None if the candles could not be fetched.
+        """
+        started = time.perf_counter()
+        if not threshold_sets:
+            print("No threshold sets to sweep")
+            return None
+        klines = self.load_klines(threshold_sets)
+        if not len(klines):
+            print("No candles for the sweep range")
+            return None
+
+        jobs = [(thresholds, self.from_date, self.to_date, self.balance, self.symbol, self.interval, self.warmup_tolerance)
+                for thresholds in threshold_sets]
+        workers = max(1, min(self.workers, len(jobs)))
+        if workers == 1:
+            ParameterSweep.worker_source = SharedKlines.as_source(klines, self.symbol, self.interval)
+            results = [ParameterSweep.evaluate(job) for job in jobs]
+        else:
+            with SharedKlines(klines) as shared, ProcessPoolExecutor(
+                max_workers=workers, initializer=ParameterSweep.init_worker,
+                initargs=(shared.descriptor, self.symbol, self.interval),
+            ) as executor:
+                results = list(executor.map(ParameterSweep.evaluate, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+        if rank_by == "max_drawdown_pct":
+            results.sort(key=lambda result: (result["max_drawdown_pct"], -result["profit_loss"]))
+        else:
+            results.sort(key=lambda result: (-result["profit_loss"], result["max_drawdown_pct"]))
+
+        elapsed = time.perf_counter() - started
+        return {
+            "results": results,
+            "stats": {
+                "sets": len(jobs),
+                "workers": workers,
+                "elapsed_seconds": elapsed,
+                "sets_per_second": len(jobs) / elapsed if elapsed > 0 else float("inf"),
+            },
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest a grid or random sample of risk thresholds in parallel")
+    parser.add_argument("from_date", help="First day, YYYY-MM-DD")
+    parser.add_argument("to_date", help="Last day, YYYY-MM-DD")
+    parser.add_argument("--data", help="CSV or Parquet candles to use instead of Binance")
+    parser.add_argument("--resample", action="store_true", help="Build the bars from the 1m archive, even 1d")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--balance", type=float, default=10000)
+    parser.add_argument("--random", type=int, help="Sample this many sets instead of the whole grid")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--warmup-tolerance", type=float, default=BotIndicators.WARMUP_TOLERANCE,
+                        help="Seed weight the indicator windows are sized for")
+    parser.add_argument("--rank-by", choices=("profit_loss", "max_drawdown_pct"), default="profit_loss")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.data:
+        source = FileMarketData(args.data, args.symbol, args.interval)
+    else:
+        source = MarketDataSource.default(args.interval, resample=True if args.resample else None)
+    sweep = ParameterSweep(datetime.strptime(args.from_date, "%Y-%m-%d"), datetime.strptime(args.to_date, "%Y-%m-%d"),
+                           args.balance, source, symbol=args.symbol, interval=args.interval, workers=args.workers,
+                           warmup_tolerance=args.warmup_tolerance)
+    sets = sweep.random_sets(args.random, seed=args.seed) if args.random else sweep.grid()
+    outcome = sweep.run(sets, args.rank_by)
+    if outcome is not None:
+        for result in outcome["results"][:args.top]:
+            swept = {name: result["thresholds"][name] for name in ParameterSweep.DEFAULT_SPACE}
+            print(f"{result['profit_loss']:10.2f} P&L  {result['max_drawdown_pct']:6.2f}% drawdown  "
+                  f"{result['trades']:3d} trades  {swept}")
+        stats = outcome["stats"]
+        print(f"{stats['sets']} sets on {stats['workers']} workers in {stats['elapsed_seconds']:.1f}s "
+              f"({stats['sets_per_second']:.1f} sets/s)")
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+from backtest import Backtester
+from market_data import SyntheticMarketData
+
+THRESHOLDS = {
+    "invest_thres": [60], "rsi_oversold": [30], "rsi_overbought": [70],
+    "macd_fast_ema": [12], "macd_slow_ema": [26], "macd_signal_ema": [9],
+    "supertrend_atr_period": [14], "supertrend_multiplier": [3.0],
+}
+TRADE_KEYS = ("buy_price", "sell_price", "money_in", "profit_loss", "balance_after")
+
+
+def run(interval, seed, **options):
+    source = SyntheticMarketData(volatility=0.04, seed=seed)
+    return Backtester(THRESHOLDS, datetime(2021, 1, 1), datetime(2021, 6, 30), 10000,
+                      source=source, interval=interval, **options).run()
+
+
+def assert_same_run(expected, actual):
+    assert len(actual["trades"]) == len(expected["trades"])
+    for expected_trade, actual_trade in zip(expected["trades"], actual["trades"]):
+        assert (actual_trade["buying_time"], actual_trade["selling_time"]) == (expected_trade["buying_time"], expected_trade["selling_time"])
+        for key in TRADE_KEYS:
+            assert actual_trade[key] == pytest.approx(expected_trade[key])
+    for key in ("trades", "final_balance", "total_profit_loss"):
+        assert actual["stats"][key] == pytest.approx(expected["stats"][key])
+    assert [day for day, _ in actual["equity_curve"]] == [day for day, _ in expected["equity_curve"]]
+    assert [equity for _, equity in actual["equity_curve"]] == pytest.approx([equity for _, equity in expected["equity_curve"]])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("interval", ["1d", "4h"])
+def test_simulate_matches_the_day_loop(interval, seed):
+    loop = run(interval, seed, vectorized=False)
+    assert loop["stats"]["trades"] > 0
+    assert_same_run(loop, run(interval, seed))
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_precomputed_range_matches_daily_windows(seed):
+    assert_same_run(run("1d", seed, precompute=False), run("1d", seed, vectorized=False))
+
+
+@pytest.mark.parametrize("max_trades", [1, 3])
+def test_max_trades_stops_both_paths_at_the_same_bar(max_trades):
+    loop = run("1d", 0, vectorized=False, max_trades=max_trades)
+    assert_same_run(loop, run("1d", 0, max_trades=max_trades))
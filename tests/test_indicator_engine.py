@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+from indicator_engine import IndicatorEngine
+from market_data import SyntheticMarketData
+
+DAY = 86_400_000
+LEVELS = [
+    {"rsi_oversold": 30, "rsi_overbought": 70, "macd_fast_ema": 12, "macd_slow_ema": 26, "macd_signal_ema": 9, "supertrend_atr_period": 14},
+    {"rsi_oversold": 25, "rsi_overbought": 75, "macd_fast_ema": 6, "macd_slow_ema": 13, "macd_signal_ema": 4, "supertrend_atr_period": 7},
+    {"rsi_oversold": 35, "rsi_overbought": 65, "macd_fast_ema": 26, "macd_slow_ema": 52, "macd_signal_ema": 18, "supertrend_atr_period": 20},
+]
+
+
+# Loops of the original BotIndicators calculations, kept as the reference for the engine
+
+def loop_rsi(prices, period=14):
+    gains, losses = [], []
+    for i in range(1, period + 1):
+        change = prices[i] - prices[i - 1]
+        gains.append(max(change, 0))
+        losses.append(abs(min(change, 0)))
+    avg_gain, avg_loss = sum(gains) / period, sum(losses) / period
+    change = prices[-1] - prices[-2]
+    avg_gain = ((avg_gain * (period - 1)) + max(change, 0)) / period
+    avg_loss = ((avg_loss * (period - 1)) + abs(min(change, 0))) / period
+    rs = avg_gain / avg_loss if avg_loss != 0 else 100
+    return 100 - (100 / (1 + rs))
+
+
+def loop_historical_rsi(prices, period=14):
+    gains, losses = [], []
+    for i in range(1, len(prices)):
+        change = prices[i] - prices[i - 1]
+        gains.append(change if change > 0 else 0)
+        losses.append(0 if change > 0 else abs(change))
+    avg_gain, avg_loss = sum(gains[:period]) / period, sum(losses[:period]) / period
+    values = []
+    for i in range(period, len(prices)):
+        avg_gain = ((avg_gain * (period - 1)) + gains[i - 1]) / period
+        avg_loss = ((avg_loss * (period - 1)) + losses[i - 1]) / period
+        rs = float("inf") if avg_loss == 0 else avg_gain / avg_loss
+        values.append(100 - (100 / (1 + rs)))
+    return values
+
+
+def loop_macd(prices, fast_period, slow_period, signal_period):
+    ema_fast = sum(prices[:fast_period]) / fast_period
+    ema_slow = sum(prices[:slow_period]) / slow_period
+    macd_line = [None] * len(prices)
+    for i in range(slow_period, len(prices)):
+        ema_fast = (prices[i] - ema_fast) * (2 / (fast_period + 1)) + ema_fast
+        ema_slow = (prices[i] - ema_slow) * (2 / (slow_period + 1)) + ema_slow
+        macd_line[i] = ema_fast - ema_slow
+    valid_macd = [m for m in macd_line if m is not None]
+    signal_ema = sum(valid_macd[:signal_period]) / signal_period
+    signal_line = [None] * (slow_period + signal_period - 2) + [signal_ema]
+    for value in valid_macd:
+        signal_ema = (value - signal_ema) * (2 / (signal_period + 1)) + signal_ema
+        signal_line.append(signal_ema)
+    if macd_line[-1] > signal_line[-1] and macd_line[-2] <= signal_line[-2]:
+        flag = 1
+    elif macd_line[-1] < signal_line[-1] and macd_line[-2] >= signal_line[-2]:
+        flag = -1
+    else:
+        flag = 0
+    return valid_macd, signal_line[-len(valid_macd):], flag
+
+
+def loop_supertrend(prices, highs, lows, atr_period):
+    tr_list = [max(highs[i] - lows[i],
+                   abs(highs[i] - prices[i - 1]) if i > 0 else 0,
+                   abs(lows[i] - prices[i - 1]) if i > 0 else 0) for i in range(len(prices))]
+    atr = [None] * len(prices)
+    atr[atr_period - 1] = sum(tr_list[:atr_period]) / atr_period
+    for i in range(atr_period, len(prices)):
+        atr[i] = ((atr[i - 1] * (atr_period - 1)) + tr_list[i]) / atr_period
+    supertrend = [None] * len(prices)
+    for i in range(atr_period, len(prices)):
+        mid = (highs[i] + lows[i]) / 2
+        upper, lower = mid + atr[i], mid - atr[i]
+        if i == atr_period or prices[i] > supertrend[i - 1]:
+            supertrend[i] = lower
+        else:
+            supertrend[i] = upper
+    flag = 1 if prices[-1] > supertrend[-1] else -1 if prices[-1] < supertrend[-1] else 0
+    return supertrend[atr_period:], flag
+
+
+@pytest.fixture(params=[0, 1, 2])
+def window(request):
+    klines = SyntheticMarketData(volatility=0.04, seed=request.param).get_kline_array(0, 99 * DAY, "BTCUSDT", "1d")
+    return klines["close"], klines["high"], klines["low"]
+
+
+@pytest.mark.parametrize("thresholds", LEVELS)
+def test_engine_matches_the_original_loops(window, thresholds):
+    closes, highs, lows = window
+    prices = closes.tolist()
+    result = IndicatorEngine.compute(closes, highs, lows, thresholds)
+
+    assert result["rsi"] == pytest.approx(loop_rsi(prices[-15:]), abs=1e-9)
+    assert np.allclose(result["rsi_values"], loop_historical_rsi(prices), atol=1e-9)
+
+    slow = thresholds["macd_slow_ema"]
+    macd_line, signal_line, macd_flag = loop_macd(prices, thresholds["macd_fast_ema"], slow, thresholds["macd_signal_ema"])
+    assert np.allclose(result["macd_line"][slow:], macd_line, atol=1e-9)
+    assert np.allclose(result["signal_line"][slow:], signal_line, atol=1e-9)
+    assert result["macd_flag"] == macd_flag
+
+    atr_period = thresholds["supertrend_atr_period"]
+    supertrend, st_flag = loop_supertrend(prices, highs.tolist(), lows.tolist(), atr_period)
+    assert np.allclose(result["supertrend"][atr_period:], supertrend, atol=1e-9)
+    assert result["st_flag"] == st_flag
+
+
+def test_levels_match_separate_computations(window):
+    closes, highs, lows = window
+    for level, separate in zip(IndicatorEngine.compute_levels(closes, highs, lows, LEVELS),
+                               (IndicatorEngine.compute(closes, highs, lows, thresholds) for thresholds in LEVELS)):
+        for key in ("rsi", "macd", "supertrend_value", "rsi_flag", "macd_flag", "st_flag"):
+            assert level[key] == pytest.approx(separate[key])
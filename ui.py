@@ -8,6 +8,10 @@ import re
 from btccschart import BTCCandlestickChart
 from bot_indicators import BotIndicators
 from activate_bot import ActivateBot
+from backtest import Backtester
+from stream import BinanceStream
+from candle_integrity import CandleIntegrity
+from market_data import ArchiveMarketData, ResampledMarketData
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import pandas as pd
@@ -512,7 +516,8 @@ class BotIndicatorsPage(BasePage):
         if self.user_obj.trading_preference == 1:
             to_date = Utils.get_date()
 
-        # Calculate all indicators
+        # Calculate all indicators from a single price window
+        self.bi.take_snapshot(to_date)
         self.bi.calculate_macd(to_date)
         self.bi.calculate_supertrend(to_date)
         self.bi.calculate_historical_rsi(to_date)
@@ -615,11 +620,37 @@ class WorkStationPage(BasePage):
         self.to_date = self.bi.to_date  # End date
 
         self.running_buy = True  # Indicates whether buy loop is active
-        self.after(1000, self.run_buy_loop)  # Start buy loop
+        self.stream = None  # Live trade and candle feed, replaces ticker polling in live mode
+        self.integrity = None  # Background repair of the candle cache in live mode
+        if self.bi.continuous_trade:
+            # The websocket feed and the background repairs bypass the cassette, so a recorded or
+            # replayed session polls the REST API from this thread only and stays repeatable
+            if BinanceAPI.session.cassette is None:
+                self.start_live_feeds()
+            self.after(1000, self.run_buy_loop)  # Start buy loop
+        else:
+            self.after(1000, self.run_backtest)  # Replay the date range without waiting between days
 
         # Load historical data for visualization
         self.chart.get_ohlc_data(self.user_obj.trading_preference, self.user_obj.from_date, self.user_obj.to_date)
 
+    def start_live_feeds(self):
+        """
+        Starts the trade and candle stream and the background repair of the cache the
+        indicators read from.
+        """
+        self.stream = BinanceStream(self.bi.symbol, self.bi.interval)
+        self.stream.start()
+        source = self.bi.source
+        if isinstance(source, ResampledMarketData) and isinstance(source.base, ArchiveMarketData):
+            # The indicator bars are resampled from the 1m archive, so that is the cache to keep free of gaps
+            self.integrity = CandleIntegrity(source.base.archive)
+            cached_interval = source.base_interval
+        else:
+            self.integrity = CandleIntegrity()  # Keeps the cached indicator window free of gaps
+            cached_interval = self.bi.interval
+        self.integrity.start([(self.bi.symbol, cached_interval, int(self.bi.warmup["total"] * self.bi.bar.total_seconds() * 1000))])
+
     def run_buy_loop(self):
         """
         Executes the buying logic in a loop, based on indicator flags and user preferences.
@@ -633,16 +664,19 @@ class WorkStationPage(BasePage):
                 return  # Exit loop if date range ends or loop is inactive
 
         print('buy activated for this date: ', self.from_date)
-        print("btc value: ", BinanceAPI.get_price_on_day(self.from_date))
-
-        # Calculate trading indicators for the current date
-        self.bi.calculate_rsi(self.from_date)
-        self.bi.calculate_macd(self.from_date)
-        self.bi.calculate_supertrend(self.from_date)
+        # Live ticks advance the indicators incrementally; historical days use one price window each
+        if self.bi.continuous_trade:
+            self.bi.calculate_live(self.from_date, self.stream_candles())
+        else:
+            self.bi.take_snapshot(self.from_date)
+            self.bi.calculate_rsi(self.from_date)
+            self.bi.calculate_macd(self.from_date)
+            self.bi.calculate_supertrend(self.from_date)
+        print("btc value: ", self.bi.get_price_on_day(self.from_date))
 
         # Update OHLC chart data for fixed date trading
         if self.user_obj.trading_preference == 1:
-            self.chart.get_ohlc_data(self.user_obj.trading_preference, self.user_obj.from_date, self.user_obj.to_date)
+            self.chart.get_ohlc_data(self.user_obj.trading_preference, self.user_obj.from_date, self.user_obj.to_date, self.bi.snapshot)
 
         print("rsi flag = ", self.bi.rsi_flag)
         print("macd flag = ", self.bi.macd_flag)
@@ -666,6 +700,32 @@ class WorkStationPage(BasePage):
             self.from_date += timedelta(days=1)
             self.after(1000, self.run_buy_loop)
 
+    def run_backtest(self):
+        """
+        Runs the historical date range through the headless Backtester in one pass,
+        records its trade and shows the final state.
+        """
+        balance = self.user_obj.db.get_account_balance(self.user_obj.username)
+        backtester = Backtester(self.user_obj.thresholds, self.from_date, self.to_date, balance, max_trades=1)
+        result = backtester.run()
+        print("backtest stats: ", result["stats"])
+
+        # Show the indicators of the last simulated day
+        self.bi = backtester.bi
+        self.ab.bi_class = self.bi
+        self.from_date = result["stats"]["last_day"]
+
+        for trade in result["trades"]:
+            self.ab.record_trade(trade)
+        if result["open_position"] is not None:
+            self.ab.record_trade(result["open_position"])
+        self.running_buy = not result["trades"] and result["open_position"] is None
+
+        if result["trades"]:
+            self.run_display_loop()  # Start visual update loop
+        else:
+            self.display_indicators()
+
     def run_display_loop(self):
         """
         Runs a loop to continuously update and display indicators.
@@ -682,16 +742,19 @@ class WorkStationPage(BasePage):
             return  # Exit loop if date range ends
 
         print('sell activated for this date: ', self.from_date)
-        print("btc value: ", BinanceAPI.get_price_on_day(self.from_date))
-
-        # Calculate trading indicators
-        self.bi.calculate_rsi(self.from_date)
-        self.bi.calculate_macd(self.from_date)
-        self.bi.calculate_supertrend(self.from_date)
+        # Live ticks advance the indicators incrementally; historical days use one price window each
+        if self.bi.continuous_trade:
+            self.bi.calculate_live(self.from_date, self.stream_candles())
+        else:
+            self.bi.take_snapshot(self.from_date)
+            self.bi.calculate_rsi(self.from_date)
+            self.bi.calculate_macd(self.from_date)
+            self.bi.calculate_supertrend(self.from_date)
+        print("btc value: ", self.bi.get_price_on_day(self.from_date))
 
         # Update OHLC chart data if in fixed mode
         if self.user_obj.trading_preference == 1:
-            self.chart.get_ohlc_data(self.user_obj.trading_preference, self.user_obj.from_date, self.user_obj.to_date)
+            self.chart.get_ohlc_data(self.user_obj.trading_preference, self.user_obj.from_date, self.user_obj.to_date, self.bi.snapshot)
 
         print("rsi flag = ", self.bi.rsi_flag)
         print("macd flag = ", self.bi.macd_flag)
@@ -711,12 +774,28 @@ class WorkStationPage(BasePage):
             self.from_date += timedelta(days=1)
             self.after(1000, self.run_sell_loop)
 
+    def current_price(self):
+        """
+        Returns the latest Bitcoin price, from the live stream while it is connected and
+        its last trade is recent, and from the market data source's ticker otherwise.
+        """
+        price = self.stream.live_price() if self.stream is not None else None
+        if price is not None:
+            return price
+        return self.bi.source.get_ticker_price(self.bi.symbol)
+
+    def stream_candles(self):
+        """Returns the latest streamed candles, or None if the stream is not connected."""
+        if self.stream is not None and self.stream.connected:
+            return self.stream.recent_candles(int(self.from_date.timestamp() * 1000))
+        return None
+
     def display_indicators(self):
         """
         Displays real-time and historical indicators, trading status, and performance metrics.
         Also updates the candlestick chart and flag icons.
         """
-        price = BinanceAPI.get_ticker_price()
+        price = self.current_price()
         
         if isinstance(price, float):
             price_text = f"Bitcoin Price: ${price:.2f}"
@@ -788,7 +867,9 @@ class WorkStationPage(BasePage):
         """
         Periodically updates the displayed real-time Bitcoin price.
         """
-        price = BinanceAPI.get_ticker_price()
+        if not self.winfo_exists():
+            return
+        price = self.current_price()
         
         if isinstance(price, float):
             price_text = f"Bitcoin Price: ${price:.2f}"
@@ -801,12 +882,17 @@ class WorkStationPage(BasePage):
         else:
             self.price_label.config(text=price_text)
 
-        self.after(2000, self.update_price)  # Schedule next update
+        # Streamed prices are read from memory, so they can be refreshed more often than the REST ticker
+        self.after(500 if self.stream is not None else 2000, self.update_price)  # Schedule next update
 
     def go_homepage(self):
         """
         Navigates back to the HomePage and destroys the current frame.
         """
+        if self.stream is not None:
+            self.stream.stop()
+        if self.integrity is not None:
+            self.integrity.stop()
         self.navigate_to(HomePage, self.user_obj)
         self.destroy()
     
@@ -34,3 +34,45 @@ class Utils:
 
         # Return the current date and time as a datetime object
         return dubai_time  # The full datetime object, like 'get_localtime', but no formatting
+
+    # Length of each fixed-size Binance kline interval in milliseconds
+    INTERVAL_MS = {
+        "1m": 60_000,
+        "3m": 3 * 60_000,
+        "5m": 5 * 60_000,
+        "15m": 15 * 60_000,
+        "30m": 30 * 60_000,
+        "1h": 3_600_000,
+        "2h": 2 * 3_600_000,
+        "4h": 4 * 3_600_000,
+        "6h": 6 * 3_600_000,
+        "8h": 8 * 3_600_000,
+        "12h": 12 * 3_600_000,
+        "1d": 86_400_000,
+        "3d": 3 * 86_400_000,
+    }
+
+    @staticmethod
+    def interval_ms(interval):
+        # Return the candle length in milliseconds, or None for calendar intervals like "1w" and "1M"
+        return Utils.INTERVAL_MS.get(interval)
+
+
+    # Quote assets recognised when splitting a symbol like "ETHUSDT" into "ETH/USDT"
+    QUOTE_ASSETS = ("USDT", "USDC", "FDUSD", "BUSD", "BTC", "ETH", "BNB", "EUR", "TRY")
+
+    @staticmethod
+    def pair_name(symbol):
+        # Return a symbol as BASE/QUOTE for display, or unchanged if the quote asset is unknown
+        for quote in Utils.QUOTE_ASSETS:
+            if symbol.endswith(quote) and len(symbol) > len(quote):
+                return f"{symbol[:-len(quote)]}/{quote}"
+        return symbol
+
+    @staticmethod
+    def expected_candles(from_ts, to_ts, interval):
+        # Return how many candles of a fixed-length interval open inside [from_ts, to_ts], or None for calendar intervals
+        step = Utils.interval_ms(interval)
+        if step is None:
+            return None
+        return max(0, to_ts // step - -(-from_ts // step) + 1)